@@ -4,65 +4,35 @@ import plotly.express as px
 import plotly.graph_objects as go
 import math
 import datetime
+import time
 import numpy
+import collections
+import sqlite3
+from fleet_data import (
+    YEAR_OPTIONS, BENCHMARK_YEAR, ANALYSIS_LIFESPAN_YEARS, TANKER_ROUTES, BENCHMARK_2024, CII_RATING_DATA_BY_TYPE, GFI_COMPLIANCE_ZONES_DF,
+)
+from fleet_compliance import ROUTE_CII_TYPE_INDEX, cii_rating_counts, rate_cii
+from fleet_figures import FIGURE_CACHE, cii_band_figure, cii_overview_figure, gfi_zone_figure
+from fleet_finance import PROJECTED_ANNUAL_NET_CASH_FLOW, cumulative_cash_flow, discounted_payback, npv, npv_grid
+from fleet_ingest import ingest_fleet
+from fleet_live import RESULT_CACHE, SESSION_MEMORY_BUDGET_BYTES, cached_live_results, live_results_for, remember_live_results, session_bytes
+from fleet_montecarlo import (
+    DEFAULT_DISTRIBUTIONS, DEFAULT_INPUT_CORRELATIONS, DEFAULT_ROUTE_CORRELATION, DISTRIBUTION_KINDS, UNCERTAIN_INPUTS, InputDistribution, simulate, with_percentile_band,
+)
+from fleet_optimizer import GFI_LIMIT_COLUMNS, CompositionProblem, gfi_zone_limit, optimize_composition
+from fleet_pathway import (
+    DEFAULT_ANCHOR_YEARS, DEFAULT_CHARTER_BY_ANCHOR, DEFAULT_OWNED_BY_ANCHOR, PATHWAY_END_YEAR, PATHWAY_START_YEAR, FleetTrajectory, evaluate_pathway, fleet_cii_records,
+    fleet_on_pathway_categories,
+)
+from fleet_profiler import PROFILE_HISTORY, RerunProfiler, profiles_json, summarize
+from fleet_sensitivity import one_at_a_time, tornado_figure
+from fleet_state import OWNED_WIDGET_KEYS_BY_YEAR, FleetState
+from fleet_store import METRIC_LABELS, ORDER_COLUMNS, SCENARIO_STORE, ScenarioRecord
 
 # --- 1. SET PAGE CONFIG (MUST BE FIRST STREAMLIT COMMAND) ---
 st.set_page_config(layout="wide")
-
-# --- Configuration ---
-YEAR_OPTIONS = [2030, 2040, 2050]
-BENCHMARK_YEAR = 2024
-ANALYSIS_LIFESPAN_YEARS = 25
-MILLION = 1_000_000
-
-# ... (Keep TANKER_ROUTES, OWNED_SHIP_CATEGORIES_BY_YEAR, get_empty_owned_ships_dict_for_year,
-#      ALL_CHARTER_FACTORS, DEFAULT_INPUTS_2030, DEFAULT_INPUTS_2040, DEFAULT_INPUTS_2050,
-#      ALL_YEAR_DEFAULT_INPUTS, FALLBACK_OWNED_SHIP_CATEGORIES, EMPTY_ROUTE_DEFAULTS,
-#      ROUTE_REVENUES_BY_YEAR, BENCHMARK_2024, CII_YEARS_DATA, CII_RATING_DATA_BY_TYPE,
-#      PETROBRAS_CII_POINTS, CII_CHART_Y_MAX - these should be complete from previous versions) ...
-TANKER_ROUTES = {
-    "vlcc_china": "VLCC (to China)", "afra_europe": "Aframax (to Europe)",
-    "pana_houston": "Panamax (to Houston)", "suez_seasia": "Suezmax (to SE Asia)",
-    "suez_sing": "Suezmax (to Singapore)", "mr_ny": "MR Tankers (to New York)"
-}
-ROUTE_KEYS = list(TANKER_ROUTES.keys())
-OWNED_SHIP_CATEGORIES_BY_YEAR = {
-    2030: ["Diesel Ships", "B30 Ships", "Methanol Ships", "Ammonia Ships", "B30 EET Ships"],
-    2040: ["Diesel Ships", "B50 Ships", "Methanol Ships", "Ammonia Ships", "BlueH2 Ships", "Methane Ships", "VLSFO OCCS Ships", "B50 EET Ships"],
-    2050: ["Diesel Ships", "B100 Ships", "Methanol Ships", "Ammonia Ships", "eH2 Ships", "eMethane Ships", "eDiesel Ships", "B100 EET Ships", "Bio Methane Ships"]
-}
-def get_empty_owned_ships_dict_for_year(year):
-    categories = OWNED_SHIP_CATEGORIES_BY_YEAR.get(year, [])
-    return {cat.lower().replace(' ', '_').replace('(','').replace(')',''): 0 for cat in categories}
-ALL_CHARTER_FACTORS = {2024: {"vlcc_china": (4.5, 6.96*0.95), "suez_seasia": (5.8, 4.66*0.95), "suez_sing": (5.8, 4.66*0.95), "afra_europe": (9.2, 3.68*0.95), "pana_houston": (11.4, 2.63*0.95), "mr_ny": (10.5, 2.25*0.95)}, 2030: {"vlcc_china": (4.5, 6.96), "suez_seasia": (5.8, 4.66), "suez_sing": (5.8, 4.66), "afra_europe": (9.2, 3.68), "pana_houston": (11.4, 2.63), "mr_ny": (10.5, 2.25)}, 2040: {"vlcc_china": (4.5, 7.24), "suez_seasia": (5.8, 4.84), "suez_sing": (5.8, 4.84), "afra_europe": (9.2, 3.83), "pana_houston": (11.4, 2.74), "mr_ny": (10.5, 2.34)}, 2050: {"vlcc_china": (4.5, 7.52), "suez_seasia": (5.8, 5.03), "suez_sing": (5.8, 5.03), "afra_europe": (9.2, 3.98), "pana_houston": (11.4, 2.85), "mr_ny": (10.5, 2.43)}}
-DEFAULT_INPUTS_2030 = {"vlcc_china":   {"owned_ships": {"diesel_ships": 4, "b30_ships": 14, "methanol_ships": 0, "ammonia_ships": 0, "b30_eet_ships": 0}, "tco": 538.21,    "ghg": 1.69,     "charter": 12, "total_fuel_cost_route": 291.8803459},    "suez_seasia":  {"owned_ships": {"diesel_ships": 2, "b30_ships": 7,  "methanol_ships": 0, "ammonia_ships": 0, "b30_eet_ships": 0}, "tco": 174.7,     "ghg": 0.4,      "charter": 6,  "total_fuel_cost_route": 68.43707857},    "suez_sing":    {"owned_ships": {"diesel_ships": 10, "b30_ships": 8, "methanol_ships": 2, "ammonia_ships": 0, "b30_eet_ships": 0}, "tco": 402.75,    "ghg": 0.91,     "charter": 0,  "total_fuel_cost_route": 172.0750921},    "afra_europe":  {"owned_ships": {"diesel_ships": 5, "b30_ships": 0,  "methanol_ships": 0, "ammonia_ships": 0, "b30_eet_ships": 0}, "tco": 52.4165,   "ghg": 0.2437,   "charter": 28, "total_fuel_cost_route": 28.750511},    "pana_houston": {"owned_ships": {"diesel_ships": 1, "b30_ships": 0,  "methanol_ships": 0, "ammonia_ships": 0, "b30_eet_ships": 0}, "tco": 8.79673,   "ghg": 0.04292,  "charter": 8,  "total_fuel_cost_route": 5.251384651},    "mr_ny":        {"owned_ships": {"diesel_ships": 4, "b30_ships": 0,  "methanol_ships": 0, "ammonia_ships": 0, "b30_eet_ships": 0}, "tco": 31.0053,   "ghg": 0.12959,  "charter": 21, "total_fuel_cost_route": 16.41581277}}
-DEFAULT_INPUTS_2040 = {"vlcc_china":   {"owned_ships": {"diesel_ships": 4, "b50_ships": 1, "methanol_ships": 0, "ammonia_ships": 0, "blueh2_ships": 0, "methane_ships": 12, "vlsfo_occs_ships":0, "b50_eet_ships":0}, "tco": 848.85, "ghg": 0.64, "charter": 5, "total_fuel_cost_route": 427.8787256},    "suez_seasia":  {"owned_ships": {"diesel_ships": 2, "b50_ships": 2, "methanol_ships": 0, "ammonia_ships": 0, "blueh2_ships":0, "methane_ships":8, "vlsfo_occs_ships":0, "b50_eet_ships":0 }, "tco": 357.2, "ghg": 0.2, "charter": 2, "total_fuel_cost_route": 128.0633766},    "suez_sing":    {"owned_ships": {"diesel_ships": 0, "b50_ships": 8, "methanol_ships": 2, "ammonia_ships": 0, "blueh2_ships":0, "methane_ships":7, "vlsfo_occs_ships":0, "b50_eet_ships":0 }, "tco": 500.31, "ghg": 0.27, "charter": 4, "total_fuel_cost_route": 168.5662639},    "afra_europe":  {"owned_ships": {"diesel_ships": 5, "b50_ships": 0, "methanol_ships": 0, "ammonia_ships": 0, "blueh2_ships":0, "methane_ships":0, "vlsfo_occs_ships":0, "b50_eet_ships":0 }, "tco": 81.69102,  "ghg": 0.239923,"charter": 18, "total_fuel_cost_route": 26.05253146},    "pana_houston": {"owned_ships": get_empty_owned_ships_dict_for_year(2040), "tco": 0.0, "ghg": 0.0, "charter": 7, "total_fuel_cost_route": 0.0},    "mr_ny":        {"owned_ships": get_empty_owned_ships_dict_for_year(2040), "tco": 0.0, "ghg": 0.0, "charter": 22, "total_fuel_cost_route": 0.0}}
-DEFAULT_INPUTS_2050 = {"vlcc_china":   {"owned_ships": {"diesel_ships":0, "b100_ships":0, "methanol_ships":0, "ammonia_ships":18, "eh2_ships":0, "emethane_ships":0, "ediesel_ships":0, "b100_eet_ships":0, "bio_methane_ships":0}, "tco": 960.76, "ghg": 0.02376, "charter": 1, "total_fuel_cost_route": 696.2729488},    "suez_seasia":  {"owned_ships": {"diesel_ships":0, "b100_ships":8, "methanol_ships":0, "ammonia_ships":4, "eh2_ships":0, "emethane_ships":0, "ediesel_ships":0, "b100_eet_ships":0, "bio_methane_ships":0}, "tco": 555.78, "ghg": 0.01877, "charter": 1, "total_fuel_cost_route": 150.5271399},    "suez_sing":    {"owned_ships": {"diesel_ships":0, "b100_ships":12, "methanol_ships":0, "ammonia_ships":5, "eh2_ships":0, "emethane_ships":0, "ediesel_ships":0, "b100_eet_ships":0, "bio_methane_ships":0}, "tco": 780.3, "ghg": 0.02754, "charter": 3, "total_fuel_cost_route": 207.6813632},    "afra_europe":  {"owned_ships": get_empty_owned_ships_dict_for_year(2050), "tco": 0.0, "ghg": 0.0, "charter": 18, "total_fuel_cost_route": 0.0},    "pana_houston": {"owned_ships": get_empty_owned_ships_dict_for_year(2050), "tco": 0.0, "ghg": 0.0, "charter": 6, "total_fuel_cost_route": 0.0},    "mr_ny":        {"owned_ships": get_empty_owned_ships_dict_for_year(2050), "tco": 0.0, "ghg": 0.0, "charter": 20, "total_fuel_cost_route": 0.0}}
-ALL_YEAR_DEFAULT_INPUTS = {2030: DEFAULT_INPUTS_2030, 2040: DEFAULT_INPUTS_2040, 2050: DEFAULT_INPUTS_2050}
-FALLBACK_OWNED_SHIP_CATEGORIES = OWNED_SHIP_CATEGORIES_BY_YEAR[2030]
-EMPTY_ROUTE_DEFAULTS = {"owned_ships": {cat.lower().replace(' ', '_').replace('(','').replace(')',''): 0 for cat in FALLBACK_OWNED_SHIP_CATEGORIES}, "charter": 0, "tco": 0.0, "ghg": 0.0, "total_fuel_cost_route": 0.0}
-ROUTE_REVENUES_BY_YEAR = {2024: {"vlcc_china": 27022.67, "afra_europe": 20831.95, "pana_houston": 4142.955, "suez_seasia": 8020.872, "suez_sing": 15013.9, "mr_ny": 11989.32}, 2030: {"vlcc_china": 24503.79, "afra_europe": 17409.62, "pana_houston": 3627.734, "suez_seasia": 8040.344, "suez_sing": 15615.21, "mr_ny": 10892.34}, 2040: {"vlcc_china": 22235.63, "afra_europe": 13935.9,  "pana_houston": 3131.833, "suez_seasia": 8379.054, "suez_sing": 19341.65, "mr_ny": 11176.59}, 2050: {"vlcc_china": 19765.16, "afra_europe": 12402.56, "pana_houston": 2965.643, "suez_seasia": 8697.518, "suez_sing": 20668.0,  "mr_ny": 10895.18}}
-BENCHMARK_2024_TOTAL_REVENUE = sum(ROUTE_REVENUES_BY_YEAR[2024].values())
-BENCHMARK_2024 = {"total_tco_fleet": 161.26, "total_ghg_fleet": 4.9052, "total_charter_cost_fleet": 1902.8, "total_fuel_cost_fleet": 743.81, "total_revenue": BENCHMARK_2024_TOTAL_REVENUE}
-CII_YEARS_DATA = [2019, 2023, 2024, 2025, 2026, 2027, 2028, 2029, 2030, 2031, 2032, 2033, 2034, 2035, 2036, 2037, 2038, 2039, 2040, 2041, 2042, 2043, 2044, 2045, 2046, 2047, 2048, 2049, 2050]
-CII_RATING_DATA_BY_TYPE = { "MR Tankers (to New York)": pd.DataFrame({'Year': CII_YEARS_DATA, 'Superior': [16.04,15.24,14.92,14.60,14.28,13.86,13.44,13.02,12.59,12.17,11.75,11.33,10.91,10.49,10.07,9.65,9.23,8.80,8.38,7.96,7.54,7.12,6.70,6.28,5.86,5.44,5.01,4.59,4.17], 'Lower':    [17.73,16.85,16.49,16.14,15.78,15.32,14.85,14.38,13.92,13.45,12.99,12.52,12.06,11.59,11.13,10.66,10.20,9.73,9.26,8.80,8.33,7.87,7.40,6.94,6.47,6.01,5.54,5.08,4.61], 'Upper':    [21.88,20.78,20.34,19.91,19.47,18.89,18.32,17.75,17.17,16.60,16.02,15.45,14.88,14.30,13.73,13.15,12.58,12.00,11.43,10.86,10.28,9.71,9.13,8.56,7.98,7.41,6.84,6.26,5.69], 'Inferior': [30.13,28.62,28.02,27.41,26.81,26.02,25.23,24.44,23.65,22.86,22.07,21.28,20.49,19.69,18.90,18.11,17.32,16.53,15.74,14.95,14.16,13.37,12.58,11.79,11.00,10.20,9.41,8.62,7.83]}), "Panamax (to Houston)": pd.DataFrame({'Year': CII_YEARS_DATA, 'Superior': [13.66,12.97,12.70,12.43,12.15,11.80,11.44,11.08,10.72,10.36,10.00,9.64,9.29,8.93,8.57,8.21,7.85,7.49,7.14,6.78,6.42,6.06,5.70,5.34,4.98,4.63,4.27,3.91,3.55], 'Lower':    [15.09,14.34,14.04,13.73,13.43,13.04,12.64,12.24,11.85,11.45,11.06,10.66,10.26,9.87,9.47,9.07,8.68,8.28,7.89,7.49,7.09,6.70,6.30,5.90,5.51,5.11,4.72,4.32,3.92], 'Upper':    [18.62,17.69,17.32,16.94,16.57,16.08,15.59,15.10,14.62,14.13,13.64,13.15,12.66,12.17,11.68,11.19,10.71,10.22,9.73,9.24,8.75,8.26,7.77,7.28,6.80,6.31,5.82,5.33,4.84], 'Inferior': [25.64,24.36,23.85,23.33,22.82,22.15,21.47,20.80,20.13,19.46,18.78,18.11,17.44,16.76,16.09,15.42,14.74,14.07,13.40,12.72,12.05,11.38,10.71,10.03,9.36,8.69,8.01,7.34,6.67]}), "Aframax (to Europe)": pd.DataFrame({'Year': CII_YEARS_DATA, 'Superior': [10.13,9.62,9.42,9.22,9.01,8.75,8.48,8.22,7.95,7.68,7.42,7.15,6.89,6.62,6.35,6.09,5.82,5.56,5.29,5.03,4.76,4.49,4.23,3.96,3.70,3.43,3.16,2.90,2.63], 'Lower':    [11.19,10.63,10.41,10.18,9.96,9.67,9.37,9.08,8.79,8.49,8.20,7.90,7.61,7.32,7.02,6.73,6.44,6.14,5.85,5.55,5.26,4.97,4.67,4.38,4.08,3.79,3.50,3.20,2.91], 'Upper':    [13.81,13.12,12.84,12.56,12.29,11.93,11.56,11.20,10.84,10.48,10.11,9.75,9.39,9.03,8.66,8.30,7.94,7.58,7.21,6.85,6.49,6.13,5.76,5.40,5.04,4.68,4.31,3.95,3.59], 'Inferior': [19.01,18.06,17.68,17.30,16.92,16.42,15.92,15.42,14.93,14.43,13.93,13.43,12.93,12.43,11.93,11.43,10.93,10.43,9.93,9.44,8.94,8.44,7.94,7.44,6.94,6.44,5.94,5.44,4.94]}), "Suezmax": pd.DataFrame({'Year': CII_YEARS_DATA, 'Superior': [8.02,7.62,7.46,7.30,7.14,6.93,6.72,6.51,6.30,6.09,5.88,5.67,5.46,5.25,5.03,4.82,4.61,4.40,4.19,3.98,3.77,3.56,3.35,3.14,2.93,2.72,2.51,2.30,2.09], 'Lower':    [8.87,8.42,8.25,8.07,7.89,7.66,7.43,7.19,6.96,6.73,6.50,6.26,6.03,5.80,5.56,5.33,5.10,4.87,4.63,4.40,4.17,3.94,3.70,3.47,3.24,3.00,2.77,2.54,2.31], 'Upper':    [10.94,10.39,10.17,9.96,9.74,9.45,9.16,8.87,8.59,8.30,8.01,7.73,7.44,7.15,6.86,6.58,6.29,6.00,5.72,5.43,5.14,4.85,4.57,4.28,3.99,3.71,3.42,3.13,2.84], 'Inferior': [15.07,14.31,14.01,13.71,13.41,13.01,12.62,12.22,11.83,11.43,11.04,10.64,10.24,9.85,9.45,9.06,8.66,8.27,7.87,7.48,7.08,6.69,6.29,5.89,5.50,5.10,4.71,4.31,3.92]}), "VLCC (to China)": pd.DataFrame({'Year': CII_YEARS_DATA, 'Superior': [5.28,5.01,4.91,4.80,4.70,4.56,4.42,4.28,4.14,4.00,3.86,3.73,3.59,3.45,3.31,3.17,3.03,2.89,2.76,2.62,2.48,2.34,2.20,2.06,1.93,1.79,1.65,1.51,1.37], 'Lower':    [5.83,5.54,5.42,5.31,5.19,5.04,4.88,4.73,4.58,4.42,4.27,4.12,3.96,3.81,3.66,3.51,3.35,3.20,3.05,2.89,2.74,2.59,2.43,2.28,2.13,1.97,1.82,1.67,1.52], 'Upper':    [7.19,6.83,6.69,6.55,6.40,6.21,6.02,5.83,5.65,5.46,5.27,5.08,4.89,4.70,4.51,4.32,4.14,3.95,3.76,3.57,3.38,3.19,3.00,2.81,2.63,2.44,2.25,2.06,1.87], 'Inferior': [9.90,9.41,9.21,9.01,8.82,8.56,8.30,8.04,7.78,7.52,7.26,7.00,6.74,6.48,6.22,5.96,5.70,5.44,5.18,4.92,4.66,4.40,4.14,3.88,3.62,3.36,3.10,2.84,2.58]})
-}
-PETROBRAS_CII_POINTS = {
-    2030: {"MR Tankers (to New York)": {"MR Tanker": 6.46}, "Panamax (to Houston)": {"Panamax": 6.81}, "Aframax (to Europe)": {"Aframax": 4.68}, "Suezmax": {"VLSFO": 3.58, "B30": 2.56, "Methanol": 0.68}, "VLCC (to China)": {"VLSFO": 4.05, "B30": 2.89}},
-    2040: {"Aframax (to Europe)": {"Aframax": 4.53}, "Suezmax": {"VLSFO": 3.47, "B50": 1.8, "Methanol": 0.28, "Methane": 0.23}, "VLCC (to China)": {"VLSFO": 3.93, "B50": 2.04, "Methane": 0.26}},
-    2050: {"Suezmax": {"B100": 0.13, "Ammonia": 0.04}, "VLCC (to China)": {"Ammonia": 0.04}}
-}
-CII_CHART_Y_MAX = {"MR Tankers (to New York)": 35, "Panamax (to Houston)": 30, "Aframax (to Europe)": 25, "Suezmax": 20, "VLCC (to China)": 15}
-
-# --- GFI Data ---
-GFI_YEARS_DATA = [2028, 2029, 2030, 2031, 2032, 2033, 2034, 2035, 2036, 2037, 2038, 2039, 2040, 2041, 2042, 2043, 2044, 2045, 2046, 2047, 2048, 2049, 2050]
-GFI_COMPLIANCE_ZONES_DF = pd.DataFrame({
-    'Year': GFI_YEARS_DATA,
-    'GFI Base': [89.568,87.702,85.836,81.7308,77.6256,73.5204,69.4152,65.31,58.779,52.248,45.717,39.186,32.655,31.0689,29.4828,27.8967,26.3106,24.7245,23.1384,21.5523,19.9662,18.3801,16.794],
-    'GFI DC':   [77.439,75.573,73.707,69.6018,65.4966,61.3914,57.2862,53.181,46.65,40.119,32.655,27.057,20.526,18.9399,17.3538,15.7677,14.1816,12.5955,11.0094,9.4233,7.8372,6.2511,4.665],
-    'GFI_Credit_Upper_Limit': [19,19,19,19,19,19,19,19,19,19,19,19,14,14,14,14,3,3,3,3,3,3,3]
-})
-PETROBRAS_FLEET_GFI_POINTS = {2030: 75.08, 2040: 31.51, 2050: 2.67}
+# Section timings for this rerun; see the sidebar's "Show rerun profiler" panel.
+profiler = RerunProfiler(); profiler.section("session_setup")
 
 
 # --- Helper Functions & Callbacks (Keep as before) ---
@@ -85,180 +55,199 @@ def initialize_session_state_once():
         st.session_state.reset_trigger_button_flag = False
         st.session_state.analysis_period_years = ANALYSIS_LIFESPAN_YEARS
         st.session_state.discount_rate_percent = 5.0
-        initial_year_to_load = st.session_state.selected_year
-        defaults_for_init_year_master = ALL_YEAR_DEFAULT_INPUTS.get(initial_year_to_load, {})
-        for route_key_init in ROUTE_KEYS:
-            route_data = defaults_for_init_year_master.get(route_key_init, EMPTY_ROUTE_DEFAULTS)
-            st.session_state[f"charter_{route_key_init}"] = route_data['charter']
-            st.session_state[f"tco_{route_key_init}"] = route_data['tco']
-            st.session_state[f"ghg_{route_key_init}"] = route_data['ghg']
-            st.session_state[f"fuel_cost_route_{route_key_init}"] = route_data.get('total_fuel_cost_route', 0.0)
-            current_owned_categories = OWNED_SHIP_CATEGORIES_BY_YEAR.get(initial_year_to_load, FALLBACK_OWNED_SHIP_CATEGORIES)
-            owned_ship_defaults_for_route = route_data.get("owned_ships", {})
-            for ship_cat_display_name in current_owned_categories:
-                ship_cat_internal_key = ship_cat_display_name.lower().replace(' ', '_').replace('(','').replace(')','')
-                session_key = f"owned_{route_key_init}_{ship_cat_internal_key}"
-                st.session_state[session_key] = owned_ship_defaults_for_route.get(ship_cat_internal_key, 0)
+        st.session_state.fleet_state = FleetState.defaults(st.session_state.selected_year)
+        st.session_state.fleet_state.to_widgets(st.session_state)
+        st.session_state.optimizer_result = None
+        st.session_state.live_results = None; st.session_state.results_from_cache = False
+        st.session_state.rerun_profiles = collections.deque(maxlen=PROFILE_HISTORY)
+        st.session_state.ingest_result = None; st.session_state.ingest_error = None
 initialize_session_state_once()
 if st.session_state.get('reset_trigger_button_flag', False):
     year_to_reset = st.session_state.selected_year
-    defaults_for_year = ALL_YEAR_DEFAULT_INPUTS.get(year_to_reset, {})
-    for route_key in ROUTE_KEYS:
-        route_defaults = defaults_for_year.get(route_key, EMPTY_ROUTE_DEFAULTS)
-        st.session_state[f"charter_{route_key}"] = route_defaults['charter']
-        st.session_state[f"tco_{route_key}"] = route_defaults['tco']
-        st.session_state[f"ghg_{route_key}"] = route_defaults['ghg']
-        st.session_state[f"fuel_cost_route_{route_key}"] = route_defaults.get('total_fuel_cost_route', 0.0)
-        owned_ship_defaults_for_route = route_defaults.get("owned_ships", {})
-        current_owned_categories_for_reset = OWNED_SHIP_CATEGORIES_BY_YEAR.get(year_to_reset, FALLBACK_OWNED_SHIP_CATEGORIES)
-        for ship_cat_display_name in current_owned_categories_for_reset:
-            ship_cat_internal_key = ship_cat_display_name.lower().replace(' ', '_').replace('(','').replace(')','')
-            session_key = f"owned_{route_key}_{ship_cat_internal_key}"
-            st.session_state[session_key] = owned_ship_defaults_for_route.get(ship_cat_internal_key, 0)
+    st.session_state.fleet_state.reset(year_to_reset)
+    st.session_state.fleet_state.to_widgets(st.session_state)
     st.session_state.analysis_period_years = ANALYSIS_LIFESPAN_YEARS
     st.session_state.discount_rate_percent = 5.0
     st.session_state.reset_trigger_button_flag = False
     st.session_state.results = None; st.session_state.show_results = False
     st.success(f"All inputs reset to {year_to_reset} default values.")
 def clear_results_on_input_change(): st.session_state.results = None; st.session_state.show_results = False
+def analysis_results(live):
+    """`st.session_state.results` for the live route table and fleet totals, with the financials at the current discount rate and horizon."""
+    total_tco_fleet = live.totals["total_tco_fleet"]
+
+    # *** UPDATED Financial Calculations for NPV/Payback ***
+    initial_investment_for_npv = total_tco_fleet * ANALYSIS_LIFESPAN_YEARS
+    constant_annual_net_cash_flow = PROJECTED_ANNUAL_NET_CASH_FLOW # Million USD
+
+    payback_period_proj = "N/A"
+    if constant_annual_net_cash_flow > 1e-9 and initial_investment_for_npv > 1e-9 :
+        payback_period_val = initial_investment_for_npv / constant_annual_net_cash_flow
+        payback_period_proj = f"{payback_period_val:.2f} Years"
+    elif initial_investment_for_npv <= 1e-9 and constant_annual_net_cash_flow > 1e-9:
+        payback_period_proj = "Immediate"
+    else:
+        payback_period_proj = "No Payback (Annual NCF ≤ 0)"
+
+    discount_r = st.session_state.discount_rate_percent / 100.0
+    analysis_horizon = st.session_state.analysis_period_years
+    if analysis_horizon > 0 and discount_r > -1 and math.isfinite(initial_investment_for_npv):
+        npv_val_proj = float(npv(initial_investment_for_npv, constant_annual_net_cash_flow, discount_r, analysis_horizon))
+        npv_str_proj = format_value(npv_val_proj, decimal_places=2, is_currency=True) if math.isfinite(npv_val_proj) else "NPV Result Invalid"
+    else:
+        npv_str_proj = "NPV Error: Invalid inputs to calc"
+    discounted_payback_val = float(discounted_payback(initial_investment_for_npv, constant_annual_net_cash_flow, discount_r))
+    if initial_investment_for_npv <= 1e-9 and constant_annual_net_cash_flow > 1e-9: discounted_payback_proj = "Immediate"
+    elif math.isfinite(discounted_payback_val): discounted_payback_proj = f"{discounted_payback_val:.2f} Years"
+    else: discounted_payback_proj = "No Discounted Payback"
+
+    return {
+        "route_data_df": live.route_table,
+        **live.totals,
+        "initial_investment_for_npv": initial_investment_for_npv,
+        "constant_annual_net_cash_flow_for_projection": constant_annual_net_cash_flow, # Store for cumulative chart
+        "payback_period_projected": payback_period_proj,
+        "npv_projected": npv_str_proj,
+        "discounted_payback_projected": discounted_payback_proj,
+        "discount_rate_percent": st.session_state.discount_rate_percent,
+        "analysis_period_years": analysis_horizon,
+        "calculated_for_year": live.year
+    }
+def refresh_live_results(widget_key=None):
+    # Patch the shown results (one route row, its totals, the figures reading it) instead of clearing them.
+    live = st.session_state.get('live_results')
+    if live is None or not st.session_state.show_results or live.year != st.session_state.fleet_state.year: clear_results_on_input_change(); return
+    live.update(st.session_state.fleet_state, widget_key); use_cached_results_if_seen(live)
+def refresh_financial_results():
+    live = st.session_state.get('live_results')
+    if live is None or not st.session_state.show_results: return
+    live.invalidate("finance"); use_cached_results_if_seen(live)
+def use_cached_results_if_seen(live):
+    # Another session, or an earlier edit in this one, may already have rendered this exact scenario.
+    cached = cached_live_results(live.key(st.session_state.discount_rate_percent, st.session_state.analysis_period_years), count=False)
+    if cached is not None: cached.last_edit, cached.edits = live.last_edit, live.edits; live = st.session_state.live_results = cached
+    st.session_state.results_from_cache = cached is not None; st.session_state.results = analysis_results(live)
+def sync_fleet_input_and_refresh_results(widget_key): st.session_state.fleet_state.sync_widget(st.session_state, widget_key); refresh_live_results(widget_key)
+def switch_year_and_clear_results(): st.session_state.fleet_state = FleetState.from_widgets(st.session_state, st.session_state.selected_year); clear_results_on_input_change()
 def trigger_reset_all_inputs_and_clear_results(): st.session_state.reset_trigger_button_flag = True
+def apply_optimized_fleet_and_refresh_results():
+    optimized = st.session_state.get('optimizer_result'); fleet_state = st.session_state.fleet_state
+    if optimized is None or not optimized.feasible or optimized.year != fleet_state.year: return
+    fleet_state.owned[:] = optimized.owned_for_year(); fleet_state.charter[:] = optimized.charter
+    fleet_state.tco[:] = optimized.tco; fleet_state.ghg[:] = optimized.ghg; fleet_state.fuel[:] = optimized.fuel
+    fleet_state.to_widgets(st.session_state); refresh_live_results()
+def import_fleet_records_and_refresh_results():
+    register_upload = st.session_state.get('ingest_register_file'); fleet_state = st.session_state.fleet_state
+    if register_upload is None: return
+    try: ingested = ingest_fleet(register_upload, fleet_state.year, st.session_state.get('ingest_voyage_file'))
+    except (ValueError, KeyError) as exc: st.session_state.ingest_result = None; st.session_state.ingest_error = str(exc); return
+    fleet_state.owned[:] = ingested.owned; fleet_state.charter[:] = ingested.charter
+    fleet_state.tco[:] = ingested.tco; fleet_state.ghg[:] = ingested.ghg; fleet_state.fuel[:] = ingested.fuel
+    fleet_state.to_widgets(st.session_state); refresh_live_results()
+    st.session_state.ingest_result = ingested; st.session_state.ingest_error = None
 
 # --- App Layout & Inputs ---
+profiler.section("inputs")
 # (Keep App Layout and Input Sections as before)
 st.title("Tanker Fleet Decision Support: Costs & Emissions")
 st.divider()
 st.sidebar.header("⚙️ Input Parameters")
 st.sidebar.info("Define fleet composition and scenario inputs.")
-selected_year = st.sidebar.selectbox("Select Target Year:", options=YEAR_OPTIONS, key='selected_year', on_change=clear_results_on_input_change)
+selected_year = st.sidebar.selectbox("Select Target Year:", options=YEAR_OPTIONS, key='selected_year', on_change=switch_year_and_clear_results)
 st.sidebar.button(f"Reset ALL Inputs to {st.session_state.selected_year} Defaults", on_click=trigger_reset_all_inputs_and_clear_results)
 st.sidebar.divider()
 st.sidebar.subheader("Owned Fleet Composition (Per Route)")
-current_owned_ship_categories_for_display = OWNED_SHIP_CATEGORIES_BY_YEAR.get(st.session_state.selected_year, [])
+fleet_state = st.session_state.fleet_state
+current_owned_ship_categories_for_display = fleet_state.categories
 if not current_owned_ship_categories_for_display: st.sidebar.warning(f"No owned ship categories defined for {st.session_state.selected_year}.")
-for route_key, route_display_name in TANKER_ROUTES.items():
+for route_idx, (route_key, route_display_name) in enumerate(TANKER_ROUTES.items()):
     with st.sidebar.expander(f"Owned Ships for: {route_display_name}"):
         if not current_owned_ship_categories_for_display: st.caption("Categories not set.")
         else:
-            for ship_category_display_name in current_owned_ship_categories_for_display:
-                ship_cat_internal_key = ship_category_display_name.lower().replace(' ', '_').replace('(','').replace(')','')
-                session_key = f"owned_{route_key}_{ship_cat_internal_key}"
-                if session_key not in st.session_state: st.session_state[session_key] = 0
-                st.number_input(f"{ship_category_display_name}", min_value=0, step=1, key=session_key, on_change=clear_results_on_input_change)
+            for cat_idx, (ship_category_display_name, session_key) in enumerate(zip(current_owned_ship_categories_for_display, OWNED_WIDGET_KEYS_BY_YEAR[fleet_state.year][route_idx])):
+                if session_key not in st.session_state: st.session_state[session_key] = int(fleet_state.owned[route_idx, cat_idx])
+                st.number_input(f"{ship_category_display_name}", min_value=0, step=1, key=session_key, on_change=sync_fleet_input_and_refresh_results, args=(session_key,))
+with st.sidebar.expander("Import Fleet Records (CSV/Parquet)"):
+    st.caption("Per-vessel register (vessel_id, route, category, ownership, tco_musd) and optional voyage log (vessel_id, ghg_t, fuel_cost_usd, year), aggregated into the route inputs for the selected year.")
+    st.file_uploader("Vessel Register", type=["csv", "parquet"], key='ingest_register_file')
+    st.file_uploader("Voyage Log (optional)", type=["csv", "parquet"], key='ingest_voyage_file')
+    st.button("Import into Inputs", on_click=import_fleet_records_and_refresh_results, disabled=st.session_state.get('ingest_register_file') is None)
+    if st.session_state.get('ingest_error'): st.error(f"Import failed: {st.session_state.ingest_error}")
+    elif st.session_state.get('ingest_result') is not None:
+        ingested = st.session_state.ingest_result
+        st.caption(f"Register: {ingested.register_stats}" + (f"  \nVoyages: {ingested.voyage_stats}" if ingested.voyage_stats else ""))
 with st.sidebar.expander("Financial Analysis Assumptions (for NPV/Payback)", expanded=True):
-    st.number_input("Analysis Period (Years):", min_value=1, max_value=50, step=1, key='analysis_period_years', on_change=clear_results_on_input_change)
-    st.number_input("Annual Discount Rate (%):", min_value=0.0, max_value=20.0, step=0.5, format="%.1f", key='discount_rate_percent', on_change=clear_results_on_input_change)
+    st.number_input("Analysis Period (Years):", min_value=1, max_value=50, step=1, key='analysis_period_years', on_change=refresh_financial_results)
+    st.number_input("Annual Discount Rate (%):", min_value=0.0, max_value=20.0, step=0.5, format="%.1f", key='discount_rate_percent', on_change=refresh_financial_results)
+st.sidebar.checkbox("Compact CII/GFI charts", value=True, key='compact_charts', help="One CII figure for all vessel types and lighter GFI chart data (smaller browser payload).")
 st.header("🚢 Route-Specific Data (TCO, GHG, Charter, Fuel Cost)")
 st.markdown("""<style>div[data-testid="stHorizontalBlock"] div[data-testid="stVerticalBlock"] div[data-baseweb="block"] > label[data-baseweb="form-control-label"] {height: 4.5em; display: flex; align-items: center; justify-content: start; white-space: normal; overflow: hidden; margin-bottom: -0.8em;}</style>""", unsafe_allow_html=True)
 for key, display_name in TANKER_ROUTES.items():
     with st.expander(f"Data for: {display_name}"):
         col_in1, col_in2, col_in3, col_in4 = st.columns(4)
         charter_key = f"charter_{key}"; tco_key = f"tco_{key}"; ghg_key = f"ghg_{key}"; fuel_cost_route_key = f"fuel_cost_route_{key}"
-        with col_in1: st.number_input(f"Charter Vessels", min_value=0, step=1, key=charter_key, on_change=clear_results_on_input_change)
-        with col_in2: st.number_input(f"TCO (M USD)", min_value=0.0, step=0.01, format="%.5f", key=tco_key, help="Annualized TCO.", on_change=clear_results_on_input_change)
-        with col_in3: st.number_input(f"GHG (M Tons CO2e)", min_value=0.0, step=0.001, format="%.5f", key=ghg_key, help=f"Total GHG for {st.session_state.selected_year}.", on_change=clear_results_on_input_change)
-        with col_in4: st.number_input(f"Fuel Cost (M USD)", min_value=0.0, step=0.01, format="%.5f", key=fuel_cost_route_key, help="Route-specific total annual fuel cost.", on_change=clear_results_on_input_change)
+        with col_in1: st.number_input(f"Charter Vessels", min_value=0, step=1, key=charter_key, on_change=sync_fleet_input_and_refresh_results, args=(charter_key,))
+        with col_in2: st.number_input(f"TCO (M USD)", min_value=0.0, step=0.01, format="%.5f", key=tco_key, help="Annualized TCO.", on_change=sync_fleet_input_and_refresh_results, args=(tco_key,))
+        with col_in3: st.number_input(f"GHG (M Tons CO2e)", min_value=0.0, step=0.001, format="%.5f", key=ghg_key, help=f"Total GHG for {st.session_state.selected_year}.", on_change=sync_fleet_input_and_refresh_results, args=(ghg_key,))
+        with col_in4: st.number_input(f"Fuel Cost (M USD)", min_value=0.0, step=0.01, format="%.5f", key=fuel_cost_route_key, help="Route-specific total annual fuel cost.", on_change=sync_fleet_input_and_refresh_results, args=(fuel_cost_route_key,))
 st.divider()
 
 # --- Calculation Trigger ---
+profiler.section("analysis")
 st.header("📊 Calculate & Analyze")
 if st.button("Run Analysis", type="primary"):
     current_year_calc = st.session_state.selected_year
-    # (Snapshot calculation logic: TCO, GHG, Charter, Fuel Costs - as before)
-    current_year_factors = ALL_CHARTER_FACTORS.get(current_year_calc, {})
-    route_level_data_list = []
-    calculated_total_owned_vessels_all_routes = 0
-    total_tco_fleet = 0.0; total_ghg_fleet = 0.0; total_charter_cost_fleet = 0.0
-    total_fleet_fuel_cost_from_routes = 0.0
-    total_fleet_revenue_scenario = 0.0
     with st.spinner(f"Analyzing for {current_year_calc}..."):
-        current_owned_ship_categories_for_sum = OWNED_SHIP_CATEGORIES_BY_YEAR.get(current_year_calc, [])
-        scenario_revenue_data = ROUTE_REVENUES_BY_YEAR.get(current_year_calc, {})
-        for route_key_iter in ROUTE_KEYS:
-            for ship_cat_display_name in current_owned_ship_categories_for_sum:
-                cat_key_internal = ship_cat_display_name.lower().replace(' ', '_').replace('(','').replace(')','')
-                session_key_owned = f"owned_{route_key_iter}_{cat_key_internal}"
-                calculated_total_owned_vessels_all_routes += st.session_state.get(session_key_owned, 0)
-            total_fleet_revenue_scenario += scenario_revenue_data.get(route_key_iter, 0.0)
-        for key, display_name in TANKER_ROUTES.items():
-            route_owned_ships_sum = 0
-            for ship_cat_display_name in current_owned_ship_categories_for_sum:
-                cat_key_internal = ship_cat_display_name.lower().replace(' ', '_').replace('(','').replace(')','')
-                session_key_owned = f"owned_{key}_{cat_key_internal}"
-                route_owned_ships_sum += st.session_state.get(session_key_owned, 0)
-            charter_count = st.session_state[f"charter_{key}"]
-            tco_val = st.session_state[f"tco_{key}"]
-            ghg_val = st.session_state[f"ghg_{key}"]
-            fuel_cost_route_val = st.session_state[f"fuel_cost_route_{key}"]
-            route_revenue_val = scenario_revenue_data.get(key, 0.0)
-            factors_tuple = current_year_factors.get(key)
-            route_charter_cost = 0.0
-            if factors_tuple and charter_count > 0: route_charter_cost = charter_count * factors_tuple[0] * factors_tuple[1]
-            elif charter_count > 0: st.warning(f"Charter factors missing for {display_name}.")
-            total_charter_cost_fleet += route_charter_cost; total_tco_fleet += tco_val; total_ghg_fleet += ghg_val
-            total_fleet_fuel_cost_from_routes += fuel_cost_route_val
-            route_level_data_list.append({"Route": display_name, "Total Owned Ships": route_owned_ships_sum, "Charter Vessels": charter_count, "Revenue (M USD)": route_revenue_val, "TCO (M USD)": tco_val, "GHG (M Tons CO2e)": ghg_val, "Charter Cost (M USD)": route_charter_cost, "Total Fuel Cost (M USD)": fuel_cost_route_val})
-
-    # *** UPDATED Financial Calculations for NPV/Payback ***
-    initial_investment_for_npv = total_tco_fleet * ANALYSIS_LIFESPAN_YEARS
-    constant_annual_net_cash_flow = 4000.0 # Million USD
-
-    payback_period_proj = "N/A"
-    if constant_annual_net_cash_flow > 1e-9 and initial_investment_for_npv > 1e-9 :
-        payback_period_val = initial_investment_for_npv / constant_annual_net_cash_flow
-        payback_period_proj = f"{payback_period_val:.2f} Years"
-    elif initial_investment_for_npv <= 1e-9 and constant_annual_net_cash_flow > 1e-9:
-        payback_period_proj = "Immediate"
-    else:
-        payback_period_proj = "No Payback (Annual NCF ≤ 0)"
-
-    npv_str_proj = "N/A"
-    discount_r = st.session_state.discount_rate_percent / 100.0
-    analysis_horizon = ANALYSIS_LIFESPAN_YEARS
-
-    try:
-        initial_investment_npv_val = float(initial_investment_for_npv)
-        ncf_proj_npv_val = float(constant_annual_net_cash_flow)
-        discount_r_npv_val = float(discount_r)
-
-        if not (math.isnan(initial_investment_npv_val) or \
-                math.isnan(ncf_proj_npv_val) or \
-                math.isnan(discount_r_npv_val)) and \
-                analysis_horizon > 0 and discount_r_npv_val > -1:
-            cash_flows_for_npv_proj = [-initial_investment_npv_val] + [ncf_proj_npv_val] * analysis_horizon
-            npv_val_proj = numpy.npv(discount_r_npv_val, cash_flows_for_npv_proj)
-            if math.isnan(npv_val_proj) or math.isinf(npv_val_proj):
-                 npv_str_proj = "NPV Result Invalid"
-            else:
-                npv_str_proj = f"{format_value(npv_val_proj, decimal_places=2, is_currency=True)}"
-        else:
-            npv_str_proj = "NPV Error: Invalid inputs to calc"
-    except Exception: # Catch any other error during conversion or npv calc
-        npv_str_proj = "NPV Calc Error"
-
-    st.session_state.results = {
-        "route_data_df": pd.DataFrame(route_level_data_list),
-        "total_tco_fleet": total_tco_fleet, "total_ghg_fleet": total_ghg_fleet,
-        "total_charter_cost_fleet": total_charter_cost_fleet,
-        "total_investment_fleet_snapshot": total_tco_fleet + total_charter_cost_fleet,
-        "calculated_total_owned_vessels_all_routes": calculated_total_owned_vessels_all_routes,
-        "total_annual_fuel_expenditure_fleet_million": total_fleet_fuel_cost_from_routes,
-        "total_fleet_revenue_scenario": total_fleet_revenue_scenario,
-        "initial_investment_for_npv": initial_investment_for_npv,
-        "constant_annual_net_cash_flow_for_projection": constant_annual_net_cash_flow, # Store for cumulative chart
-        "payback_period_projected": payback_period_proj,
-        "npv_projected": npv_str_proj,
-        "calculated_for_year": current_year_calc
-    }
+        live, st.session_state.results_from_cache = live_results_for(st.session_state.fleet_state, st.session_state.discount_rate_percent, st.session_state.analysis_period_years)
+        st.session_state.live_results = live
+        for route_key_missing in live.missing_factor_routes: st.warning(f"Charter factors missing for {TANKER_ROUTES[route_key_missing]}.")
+        st.session_state.results = analysis_results(live)
     st.session_state.show_results = True
     st.success(f"Analysis Complete for {current_year_calc}!")
 
+# --- Fleet Composition Optimizer ---
+profiler.section("optimizer")
+with st.expander(f"🧮 Fleet Composition Optimizer ({st.session_state.selected_year})"):
+    st.caption("Finds the integer owned/charter counts per route and ship category with the lowest annualized TCO + charter + fuel cost. "
+               "Each route keeps its default number of vessels; charter counts are capped at the default charter counts. Per-vessel figures come from the default inputs.")
+    opt_col1, opt_col2, opt_col3 = st.columns(3)
+    with opt_col1: optimizer_constraint = st.selectbox("Fleet Constraint:", ["None", "GHG Cap", "GFI Limit"], key='optimizer_constraint')
+    with opt_col2:
+        optimizer_ghg_cap = optimizer_gfi_boundary = None
+        if optimizer_constraint == "GHG Cap": optimizer_ghg_cap = st.number_input("Fleet GHG Cap (M Tons CO2e):", min_value=0.0, value=round(float(st.session_state.fleet_state.ghg.sum()), 3), step=0.1, format="%.3f", key='optimizer_ghg_cap')
+        elif optimizer_constraint == "GFI Limit":
+            gfi_boundary_labels = {f"{column} ({gfi_zone_limit(st.session_state.selected_year, boundary):.2f})": boundary for boundary, column in GFI_LIMIT_COLUMNS.items()}
+            optimizer_gfi_boundary = gfi_boundary_labels[st.selectbox("Fleet GFI At or Below:", list(gfi_boundary_labels), index=1)]
+    with opt_col3: optimizer_cii_rating = st.selectbox("Worst Allowed CII Rating (Owned Vessels):", ["Any", "A", "B", "C", "D"], key='optimizer_cii_rating')
+    if st.button("Optimize Fleet Composition"):
+        st.session_state.optimizer_result = optimize_composition(
+            CompositionProblem.for_year(st.session_state.selected_year), ghg_cap=optimizer_ghg_cap,
+            gfi_limit=gfi_zone_limit(st.session_state.selected_year, optimizer_gfi_boundary) if optimizer_gfi_boundary else None,
+            max_cii_rating=None if optimizer_cii_rating == "Any" else optimizer_cii_rating)
+    optimized = st.session_state.get('optimizer_result')
+    if optimized is not None and optimized.year == st.session_state.selected_year:
+        if not optimized.feasible: st.warning("No fleet composition meets these constraints.")
+        else:
+            opt_metric_cols = st.columns(4)
+            opt_metric_cols[0].metric("Annual Cost (M USD)", format_value(optimized.total_cost, is_currency=True))
+            opt_metric_cols[1].metric("GHG (M Tons CO2e)", format_value(optimized.total_ghg, decimal_places=3))
+            opt_metric_cols[2].metric("Fleet GFI", format_value(optimized.fleet_gfi))
+            opt_metric_cols[3].metric("Owned / Charter Vessels", f"{int(optimized.owned.sum())} / {int(optimized.charter.sum())}")
+            df_optimized = optimized.route_table()
+            st.dataframe(df_optimized.style.format({column: "{:,.2f}" for column in df_optimized.columns if "USD" in column} | {"GHG (M Tons CO2e)": "{:,.4f}"}), use_container_width=True, hide_index=True)
+            st.button("Apply Optimized Fleet to Inputs", on_click=apply_optimized_fleet_and_refresh_results)
+        st.caption(f"Solved in {optimized.solve_seconds * 1000:.1f} ms; {optimized.candidates_evaluated:,} candidate fleets evaluated.")
+
 st.divider()
 
 # --- Output Section ---
 st.header("📈 Analysis Outputs")
 if st.session_state.show_results and st.session_state.results:
     results = st.session_state.results; calc_year = results["calculated_for_year"]
+    # Figures come from the session's LiveResults and are rebuilt only when an edit invalidated them.
+    live = st.session_state.live_results; live_figures_built_before, live_figures_reused_before = live.figures_built, live.figures_reused
     # (Metrics, Route Summary Table, Visual Insights, Benchmark - as before, ensure correct keys and formatting)
+    profiler.section("metrics")
     st.subheader(f"Fleet Summary & Snapshot Financials (Scenario Year: {calc_year})")
     m_r1c1, m_r1c2, m_r1c3 = st.columns(3)
     with m_r1c1: st.metric(label="Total Owned Vessels", value=f"{results['calculated_total_owned_vessels_all_routes']}")
@@ -269,12 +258,21 @@ if st.session_state.show_results and st.session_state.results:
     with m_r2c2: st.metric(label="Total Annual Fuel Cost (M USD)", value=f"{format_value(results['total_annual_fuel_expenditure_fleet_million'], decimal_places=2, is_currency=True)}")
     with m_r2c3: st.metric(label="Total Annual Investment (TCO+Charter, M USD)", value=f"{format_value(results['total_investment_fleet_snapshot'], decimal_places=2, is_currency=True)}")
 
-    st.subheader(f"Projected Financial Performance ({ANALYSIS_LIFESPAN_YEARS}-Year Horizon, Starting {calc_year})")
+    profiler.section("financials")
+    st.subheader(f"Projected Financial Performance ({results['analysis_period_years']}-Year Horizon, Starting {calc_year})")
     fin_cols = st.columns(3)
     with fin_cols[0]: st.metric(label=f"Assumed Initial Investment (M USD)", value=f"{format_value(results.get('initial_investment_for_npv', 0.0), decimal_places=2, is_currency=True)}")
-    with fin_cols[1]: st.metric(label="Projected Payback Period", value=results.get('payback_period_projected', "N/A"))
+    with fin_cols[1]: st.metric(label="Projected Payback Period", value=results.get('payback_period_projected', "N/A"), help=f"Discounted payback at {results['discount_rate_percent']:.1f}%: {results.get('discounted_payback_projected', 'N/A')}")
+    with fin_cols[2]: st.metric(label=f"Projected NPV at {results['discount_rate_percent']:.1f}% (M USD)", value=results.get('npv_projected', "N/A"))
+    def npv_heatmap_figure():
+        npv_sensitivity = npv_grid(results['initial_investment_for_npv'], results['constant_annual_net_cash_flow_for_projection'], numpy.arange(0.0, 20.5, 0.5), numpy.arange(1, 51))
+        fig_npv_heatmap = px.imshow(npv_sensitivity.npv, x=npv_sensitivity.horizons, y=npv_sensitivity.rates_percent, origin='lower', aspect='auto', color_continuous_scale='RdYlGn', color_continuous_midpoint=0, labels=dict(x="Analysis Period (Years)", y="Annual Discount Rate (%)", color="NPV (M USD)"), title="NPV (M USD) by Discount Rate and Analysis Period")
+        fig_npv_heatmap.add_trace(go.Scatter(x=[results['analysis_period_years']], y=[results['discount_rate_percent']], mode='markers', marker=dict(symbol='x', size=12, color='black'), name='Current Inputs', showlegend=False))
+        fig_npv_heatmap.update_layout(height=450); return fig_npv_heatmap
+    with st.expander("NPV Sensitivity: Discount Rate × Analysis Period"): st.plotly_chart(live.figure("npv_sensitivity", npv_heatmap_figure), use_container_width=True)
 
     st.divider()
+    profiler.section("route_table")
     st.subheader("Route-Level Summary Table (Scenario Year Snapshot)")
     df_routes = results["route_data_df"]
     if not df_routes.empty:
@@ -285,175 +283,110 @@ if st.session_state.show_results and st.session_state.results:
     else: st.info("No route data.")
     st.divider()
 
+    profiler.section("visual_insights")
     st.subheader("Visual Insights (Scenario Year Snapshot)")
     # --- Figure for Percentage of Owned Ship Types ---
-    owned_ship_aggregation_for_plot = {}
-    current_owned_categories_for_plot = OWNED_SHIP_CATEGORIES_BY_YEAR.get(calc_year, [])
-    for route_k_plot in ROUTE_KEYS:
-        for ship_cat_dp_name_plot in current_owned_categories_for_plot:
-            ship_cat_internal_key_plot = ship_cat_dp_name_plot.lower().replace(' ', '_').replace('(','').replace(')','')
-            session_key_plot = f"owned_{route_k_plot}_{ship_cat_internal_key_plot}"
-            count_plot = st.session_state.get(session_key_plot, 0)
-            if ship_cat_dp_name_plot not in owned_ship_aggregation_for_plot:
-                owned_ship_aggregation_for_plot[ship_cat_dp_name_plot] = 0
-            owned_ship_aggregation_for_plot[ship_cat_dp_name_plot] += count_plot
-    owned_ship_aggregation_plot_filtered = {k: v for k,v in owned_ship_aggregation_for_plot.items() if v > 0}
-    if owned_ship_aggregation_plot_filtered:
+    owned_ship_aggregation_plot_filtered = st.session_state.fleet_state.composition_by_category()
+    def owned_distribution_figure():
         df_owned_ship_dist = pd.DataFrame(list(owned_ship_aggregation_plot_filtered.items()), columns=['Ship Category', 'Number of Vessels'])
         fig_owned_dist = px.pie(df_owned_ship_dist, values='Number of Vessels', names='Ship Category', title=f'Owned Fleet Composition by Ship Type ({calc_year})', hole=0.3)
-        fig_owned_dist.update_traces(textposition='inside', textinfo='percent+label')
-        st.plotly_chart(fig_owned_dist, use_container_width=True)
+        fig_owned_dist.update_traces(textposition='inside', textinfo='percent+label'); return fig_owned_dist
+    if owned_ship_aggregation_plot_filtered: st.plotly_chart(live.figure("owned_composition", owned_distribution_figure), use_container_width=True)
     else: st.caption("No owned vessels to display in distribution chart.")
     st.divider()
 
     # (Other Visual Insights charts as before)
+    def route_bar_figure(column, title, yaxis_title):
+        # Only the plotted columns, as float32: the chart payload carries nothing it does not draw.
+        fig_route = px.bar(df_routes[['Route', column]].astype({column: 'float32'}), x='Route', y=column, text_auto='.2f', title=title); fig_route.update_layout(xaxis_tickangle=-45, yaxis_title=yaxis_title, height=350, margin=dict(b=100)); return fig_route
+    def owned_vs_chartered_figure():
+        fig_own_charter = px.bar(df_own_charter_plot, x='Route', y='Number', color='Vessel Source', barmode='group', text_auto=True, title="Owned vs. Chartered"); fig_own_charter.update_layout(xaxis_tickangle=-45, yaxis_title="Number of Vessels", height=350, margin=dict(b=100)); fig_own_charter.update_traces(texttemplate='%{y:.0f}'); return fig_own_charter
+    def cost_comparison_figure():
+        df_melted_costs_all = df_cost_comp_all.melt(id_vars=['Route'], value_vars=['TCO (M USD)', 'Charter Cost (M USD)', 'Total Fuel Cost (M USD)'], var_name='Cost Type', value_name='Cost (M USD)'); fig_cost_comp_all = px.bar(df_melted_costs_all, x='Route', y='Cost (M USD)', color='Cost Type', barmode='group', text_auto='.2f', title="Key Costs by Route"); fig_cost_comp_all.update_layout(xaxis_tickangle=-45, yaxis_title="Cost (M USD)", height=350, margin=dict(b=100)); return fig_cost_comp_all
     viz_r1c1, viz_r1c2, viz_r1c3 = st.columns(3)
     with viz_r1c1:
         st.markdown("**Annualized TCO by Route (M USD)**");
-        if not df_routes[abs(df_routes['TCO (M USD)']) > 1e-9].empty: fig_tco = px.bar(df_routes, x='Route', y='TCO (M USD)', text_auto='.2f', title="TCO"); fig_tco.update_layout(xaxis_tickangle=-45, yaxis_title="M USD", height=350, margin=dict(b=100)); st.plotly_chart(fig_tco, use_container_width=True)
+        if not df_routes[abs(df_routes['TCO (M USD)']) > 1e-9].empty: st.plotly_chart(live.figure("tco", lambda: route_bar_figure('TCO (M USD)', "TCO", "M USD")), use_container_width=True)
         else: st.caption("No TCO data.")
         st.markdown("**Owned vs. Chartered Vessels by Route**")
         df_own_charter = df_routes[['Route', 'Total Owned Ships', 'Charter Vessels']]; df_own_charter_melted = df_own_charter.melt(id_vars=['Route'], value_vars=['Total Owned Ships', 'Charter Vessels'], var_name='Vessel Source', value_name='Number'); df_own_charter_plot = df_own_charter_melted[df_own_charter_melted['Number'] > 0]
-        if not df_own_charter_plot.empty: fig_own_charter = px.bar(df_own_charter_plot, x='Route', y='Number', color='Vessel Source', barmode='group', text_auto=True, title="Owned vs. Chartered"); fig_own_charter.update_layout(xaxis_tickangle=-45, yaxis_title="Number of Vessels", height=350, margin=dict(b=100)); fig_own_charter.update_traces(texttemplate='%{y:.0f}'); st.plotly_chart(fig_own_charter, use_container_width=True)
+        if not df_own_charter_plot.empty: st.plotly_chart(live.figure("owned_vs_chartered", owned_vs_chartered_figure), use_container_width=True)
         else: st.caption("No owned/chartered data.")
     with viz_r1c2:
         st.markdown("**GHG Emissions by Route (M Tons CO2e)**")
-        if not df_routes[abs(df_routes['GHG (M Tons CO2e)']) > 1e-9].empty: fig_ghg = px.bar(df_routes, x='Route', y='GHG (M Tons CO2e)', text_auto='.2f', title="GHG Emissions"); fig_ghg.update_layout(xaxis_tickangle=-45, yaxis_title="M Tons CO2e", height=350, margin=dict(b=100)); st.plotly_chart(fig_ghg, use_container_width=True)
+        if not df_routes[abs(df_routes['GHG (M Tons CO2e)']) > 1e-9].empty: st.plotly_chart(live.figure("ghg", lambda: route_bar_figure('GHG (M Tons CO2e)', "GHG Emissions", "M Tons CO2e")), use_container_width=True)
         else: st.caption("No GHG data.")
         st.markdown("**Calculated Charter Cost by Route (M USD)**")
-        if not df_routes[abs(df_routes['Charter Cost (M USD)']) > 1e-9].empty: fig_charter_cost = px.bar(df_routes, x='Route', y='Charter Cost (M USD)', text_auto='.2f', title="Charter Cost"); fig_charter_cost.update_layout(xaxis_tickangle=-45, yaxis_title="M USD", height=350, margin=dict(b=100)); st.plotly_chart(fig_charter_cost, use_container_width=True)
+        if not df_routes[abs(df_routes['Charter Cost (M USD)']) > 1e-9].empty: st.plotly_chart(live.figure("charter_cost", lambda: route_bar_figure('Charter Cost (M USD)', "Charter Cost", "M USD")), use_container_width=True)
         else: st.caption("No charter costs.")
     with viz_r1c3:
         st.markdown("**Total Fuel Cost by Route (M USD)**")
-        if not df_routes[abs(df_routes['Total Fuel Cost (M USD)']) > 1e-9].empty: fig_fuel_route = px.bar(df_routes, x='Route', y='Total Fuel Cost (M USD)', text_auto='.2f', title="Fuel Cost by Route"); fig_fuel_route.update_layout(xaxis_tickangle=-45, yaxis_title="Fuel Cost (M USD)", height=350, margin=dict(b=100)); st.plotly_chart(fig_fuel_route, use_container_width=True)
+        if not df_routes[abs(df_routes['Total Fuel Cost (M USD)']) > 1e-9].empty: st.plotly_chart(live.figure("fuel", lambda: route_bar_figure('Total Fuel Cost (M USD)', "Fuel Cost by Route", "Fuel Cost (M USD)")), use_container_width=True)
         else: st.caption("No route fuel cost data.")
         st.markdown("**Cost Comparison: TCO, Charter, Fuel by Route (M USD)**")
         df_cost_comp_all = df_routes[((abs(df_routes['Charter Cost (M USD)']) > 1e-9) | (abs(df_routes['TCO (M USD)']) > 1e-9) | (abs(df_routes['Total Fuel Cost (M USD)']) > 1e-9) )]
-        if not df_cost_comp_all.empty: df_melted_costs_all = df_cost_comp_all.melt(id_vars=['Route'], value_vars=['TCO (M USD)', 'Charter Cost (M USD)', 'Total Fuel Cost (M USD)'], var_name='Cost Type', value_name='Cost (M USD)'); fig_cost_comp_all = px.bar(df_melted_costs_all, x='Route', y='Cost (M USD)', color='Cost Type', barmode='group', text_auto='.2f', title="Key Costs by Route"); fig_cost_comp_all.update_layout(xaxis_tickangle=-45, yaxis_title="Cost (M USD)", height=350, margin=dict(b=100)); st.plotly_chart(fig_cost_comp_all, use_container_width=True)
+        if not df_cost_comp_all.empty: st.plotly_chart(live.figure("cost_comparison", cost_comparison_figure), use_container_width=True)
         else: st.caption("No cost data for comparison.")
 
+    profiler.section("cumulative_cash_flow")
     with st.expander("Projected Cumulative Net Cash Flow Over Analysis Period (Constant NCF)"):
         constant_ncf_for_chart = results.get('constant_annual_net_cash_flow_for_projection', 0.0)
         initial_investment_chart = results.get('initial_investment_for_npv', 0.0)
-        if st.session_state.analysis_period_years > 0:
-            cumulative_data = [-initial_investment_chart] # Year 0 is just the investment
-            for _ in range(st.session_state.analysis_period_years):
-                cumulative_data.append(cumulative_data[-1] + constant_ncf_for_chart)
+        def cumulative_cash_flow_figure():
             df_cumulative = pd.DataFrame({
-                'Year': list(range(st.session_state.analysis_period_years + 1)), # 0 to N years
-                'Cumulative Net Cash Flow (M USD)': cumulative_data
+                'Year': numpy.arange(st.session_state.analysis_period_years + 1), # 0 to N years
+                'Cumulative Net Cash Flow (M USD)': cumulative_cash_flow(initial_investment_chart, constant_ncf_for_chart, st.session_state.analysis_period_years),
+                f"Discounted at {results['discount_rate_percent']:.1f}% (M USD)": cumulative_cash_flow(initial_investment_chart, constant_ncf_for_chart, st.session_state.analysis_period_years, results['discount_rate_percent'] / 100.0),
             })
-            fig_cumulative = px.line(df_cumulative, x='Year', y='Cumulative Net Cash Flow (M USD)',
+            fig_cumulative = px.line(df_cumulative, x='Year', y=list(df_cumulative.columns[1:]), labels={'value': 'Cumulative Net Cash Flow (M USD)', 'variable': 'Series'},
                                      title=f"Cumulative Net Cash Flow (Constant Annual NCF of {format_value(constant_ncf_for_chart,2,True)} M)", markers=True)
             fig_cumulative.add_hline(y=0, line_dash="dash", line_color="red", annotation_text="Breakeven")
-            fig_cumulative.update_layout(height=400)
-            st.plotly_chart(fig_cumulative, use_container_width=True)
+            fig_cumulative.update_layout(height=400); return fig_cumulative
+        if st.session_state.analysis_period_years > 0: st.plotly_chart(live.figure("cumulative_cash_flow", cumulative_cash_flow_figure), use_container_width=True)
         else:
             st.caption("Cannot plot cumulative cash flow (Analysis period is 0).")
     st.divider()
 
     # --- CII Chart Section ---
+    profiler.section("cii")
     st.subheader("CII Rating Projection vs. Petrobras Tanker Targets")
-    # (CII chart logic as before)
-    cii_chart_cols = st.columns(min(3, len(CII_RATING_DATA_BY_TYPE)))
-    cii_col_idx = 0
-    for cii_vessel_type_key_display_name, cii_df_to_plot in CII_RATING_DATA_BY_TYPE.items():
-        with cii_chart_cols[cii_col_idx % len(cii_chart_cols)]:
-            st.markdown(f"**{cii_vessel_type_key_display_name}**")
-            if cii_df_to_plot is not None and not cii_df_to_plot.empty:
-                fig_cii = go.Figure()
-                max_y_cii = CII_CHART_Y_MAX.get(cii_vessel_type_key_display_name, 35)
-                fig_cii.add_trace(go.Scatter(x=cii_df_to_plot['Year'], y=[max_y_cii] * len(cii_df_to_plot['Year']), fill=None, mode='lines', line_color='rgba(255,0,0,0)', showlegend=False))
-                fig_cii.add_trace(go.Scatter(x=cii_df_to_plot['Year'], y=cii_df_to_plot['Inferior'], fill='tonexty', mode='lines', line_color='rgba(255,0,0,0.3)', fillcolor='rgba(255,100,100,0.3)', name='E (Inferior+)'))
-                fig_cii.add_trace(go.Scatter(x=cii_df_to_plot['Year'], y=cii_df_to_plot['Upper'], fill='tonexty', mode='lines', line_color='rgba(255,165,0,0.3)', fillcolor='rgba(255,200,100,0.3)', name='D (Upper-Inferior)'))
-                fig_cii.add_trace(go.Scatter(x=cii_df_to_plot['Year'], y=cii_df_to_plot['Lower'], fill='tonexty', mode='lines', line_color='rgba(255,255,0,0.3)', fillcolor='rgba(255,255,150,0.3)', name='C (Lower-Upper)'))
-                fig_cii.add_trace(go.Scatter(x=cii_df_to_plot['Year'], y=cii_df_to_plot['Superior'], fill='tonexty', mode='lines', line_color='rgba(0,0,255,0.3)', fillcolor='rgba(100,100,255,0.3)', name='B (Superior-Lower)'))
-                fig_cii.add_trace(go.Scatter(x=cii_df_to_plot['Year'], y=[0] * len(cii_df_to_plot['Year']), fill='tonexty', mode='lines', line_color='rgba(0,128,0,0.3)', fillcolor='rgba(100,200,100,0.3)', name='A (Below Superior)'))
-                petrobras_points_for_year_and_vessel = PETROBRAS_CII_POINTS.get(calc_year, {}).get(cii_vessel_type_key_display_name, {})
-                if petrobras_points_for_year_and_vessel:
-                    for label, cii_value in petrobras_points_for_year_and_vessel.items():
-                        fig_cii.add_trace(go.Scatter(x=[calc_year], y=[cii_value], mode='markers+text', name=f"Petrobras {calc_year}: {label} ({cii_value})", marker=dict(symbol='star', size=12, color="black"), text=[f"{label} ({cii_value})"], textposition="top center", textfont=dict(size=10)))
-                fig_cii.update_layout(title=f'CII Bands ({calc_year} Targets)', xaxis_title='Year', yaxis_title='CII Value', yaxis_range=[0, max_y_cii], height=400, legend_title_text='Rating', plot_bgcolor='white', margin=dict(t=50, b=50))
-                st.plotly_chart(fig_cii, use_container_width=True)
-            else: st.info(f"CII data for '{cii_vessel_type_key_display_name}' not available.")
-        cii_col_idx +=1
+    # CII/GFI figures come from the process-wide cache in fleet_figures; only the first request per (type, year) builds them.
+    figure_build_seconds = 0.0; figure_cache_misses_before = FIGURE_CACHE.misses
+    compact_charts = st.session_state.compact_charts; figures_requested = 2 if compact_charts else len(CII_RATING_DATA_BY_TYPE) + 1
+    if compact_charts:
+        figure_timer_start = time.perf_counter(); fig_cii = cii_overview_figure(calc_year); figure_build_seconds += time.perf_counter() - figure_timer_start
+        st.plotly_chart(fig_cii, use_container_width=True)
+    else:
+        cii_chart_cols = st.columns(min(3, len(CII_RATING_DATA_BY_TYPE)))
+        cii_col_idx = 0
+        for cii_vessel_type_key_display_name, cii_df_to_plot in CII_RATING_DATA_BY_TYPE.items():
+            with cii_chart_cols[cii_col_idx % len(cii_chart_cols)]:
+                st.markdown(f"**{cii_vessel_type_key_display_name}**")
+                if cii_df_to_plot is not None and not cii_df_to_plot.empty:
+                    figure_timer_start = time.perf_counter(); fig_cii = cii_band_figure(cii_vessel_type_key_display_name, calc_year); figure_build_seconds += time.perf_counter() - figure_timer_start
+                    st.plotly_chart(fig_cii, use_container_width=True)
+                else: st.info(f"CII data for '{cii_vessel_type_key_display_name}' not available.")
+            cii_col_idx +=1
+    st.markdown(f"**CII Rating Summary: Owned Vessels by Route ({calc_year})**")
+    cii_record_routes, cii_record_values = fleet_cii_records(st.session_state.fleet_state.owned, calc_year)
+    st.dataframe(cii_rating_counts(cii_record_routes, rate_cii(ROUTE_CII_TYPE_INDEX[cii_record_routes], calc_year, cii_record_values)), use_container_width=True)
+    st.caption("Each vessel is rated with its category's attained CII from the Petrobras CII points (vessel type baseline where a category has no point).")
     st.divider()
     st.divider()
+    profiler.section("gfi")
     st.subheader("GFI Trajectory & Compliance Zones vs. Petrobras Fleet Optimal WtW")
 
     # --- GFI Compliance Zone Chart ---
     if not GFI_COMPLIANCE_ZONES_DF.empty:
-        fig_gfi = go.Figure()
-        max_y_gfi = 95  # As specified
-
-        # Zone 1 (Red): Above GFI Base
-        fig_gfi.add_trace(go.Scatter(
-            x=GFI_COMPLIANCE_ZONES_DF['Year'],
-            y=[max_y_gfi] * len(GFI_COMPLIANCE_ZONES_DF['Year']),
-            fill=None, mode='lines', line_color='rgba(255,0,0,0)', showlegend=False
-        ))
-        fig_gfi.add_trace(go.Scatter(
-            x=GFI_COMPLIANCE_ZONES_DF['Year'], y=GFI_COMPLIANCE_ZONES_DF['GFI Base'],
-            fill='tonexty', mode='lines', line_color='rgba(220,20,60,0.5)',  # Crimson for boundary
-            fillcolor='rgba(255,100,100,0.3)', name='Zone 1 (> GFI Base)'  # Red fill
-        ))
-
-        # Zone 2 (Orange): GFI Base to GFI DC
-        fig_gfi.add_trace(go.Scatter(
-            x=GFI_COMPLIANCE_ZONES_DF['Year'], y=GFI_COMPLIANCE_ZONES_DF['GFI DC'],
-            fill='tonexty', mode='lines', line_color='rgba(255,140,0,0.5)',  # DarkOrange for boundary
-            fillcolor='rgba(255,200,100,0.3)', name='Zone 2 (GFI Base - DC)'  # Orange fill
-        ))
-
-        # Zone 3 (Light Green): GFI DC to GFI_Credit_Upper_Limit
-        fig_gfi.add_trace(go.Scatter(
-            x=GFI_COMPLIANCE_ZONES_DF['Year'], y=GFI_COMPLIANCE_ZONES_DF['GFI_Credit_Upper_Limit'],
-            fill='tonexty', mode='lines', line_color='rgba(144,238,144,0.5)',  # LightGreen for boundary
-            fillcolor='rgba(152,251,152,0.3)', name='Zone 3 (GFI DC - Credit Limit)'  # Light Green fill
-        ))
-
-        # Zone 4 (Dark Green): GFI_Credit_Upper_Limit to 0
-        fig_gfi.add_trace(go.Scatter(
-            x=GFI_COMPLIANCE_ZONES_DF['Year'], y=[0] * len(GFI_COMPLIANCE_ZONES_DF['Year']),
-            fill='tonexty', mode='lines', line_color='rgba(0,100,0,0.5)',  # DarkGreen for boundary
-            fillcolor='rgba(60,179,113,0.3)', name='Zone 4 (< GFI Credit Limit)'  # Dark Green / MediumSeaGreen fill
-        ))
-
-        # Plot Petrobras Fleet Optimal WtW points
-        gfi_points_x = []
-        gfi_points_y = []
-        gfi_points_text = []
-        for year_pt, gfi_val in PETROBRAS_FLEET_GFI_POINTS.items():
-            if year_pt in GFI_COMPLIANCE_ZONES_DF['Year'].values:  # Only plot if year is in our GFI data range
-                gfi_points_x.append(year_pt)
-                gfi_points_y.append(gfi_val)
-                gfi_points_text.append(f"WtW: {gfi_val}<br>Year: {year_pt}")
-
-        if gfi_points_x:
-            fig_gfi.add_trace(go.Scatter(
-                x=gfi_points_x, y=gfi_points_y,
-                mode='markers+text', name='Petrobras Fleet Optimal WtW',
-                marker=dict(symbol='diamond', size=12, color="black"),
-                text=gfi_points_text, textposition="top right",
-                textfont=dict(size=10, color="black")
-            ))
-
-        fig_gfi.update_layout(
-            title='GFI Compliance Zones vs. Petrobras Fleet Optimal WtW',
-            xaxis_title='Year',
-            yaxis_title='GFI Value (gCO2eq/MJ) - Lower is Better',
-            yaxis_range=[0, max_y_gfi],
-            height=500,
-            legend_title_text='Compliance Zones',
-            plot_bgcolor='white',
-            yaxis_gridcolor='lightgrey',
-            xaxis_gridcolor='lightgrey'
-        )
+        figure_timer_start = time.perf_counter(); fig_gfi = gfi_zone_figure(compact_charts); figure_build_seconds += time.perf_counter() - figure_timer_start
         st.plotly_chart(fig_gfi, use_container_width=True)
     else:
         st.info("GFI boundary data not available to plot.")
+    figures_built_this_run = FIGURE_CACHE.misses - figure_cache_misses_before
+    st.caption(f"CII/GFI figures ready in {figure_build_seconds * 1000:.1f} ms ({figures_built_this_run} built, {figures_requested - figures_built_this_run} from shared cache).")
     # --- Benchmark Comparison Section ---
     # (Benchmark plotting as before)
+    profiler.section("benchmark")
     st.subheader(f"Overall Benchmark Comparison ({calc_year} vs. {BENCHMARK_YEAR})")
     bench_col1, bench_col2, bench_col3, bench_col4 = st.columns(4)
     plot_height_bench = 300
@@ -466,22 +399,137 @@ if st.session_state.show_results and st.session_state.results:
         df_bench = pd.DataFrame(data_bench)
         fig_b = px.bar(df_bench, x='Category', y='Value', text_auto='.2f', title=f"Total {metric_name} ({unit_label})", height=plot_height_bench, hover_data={'Category': True, 'Value': ':.2f', '% Change': True})
         fig_b.update_layout(xaxis_title=None, yaxis_title=unit_label); return fig_b
-    with bench_col1: fig = create_benchmark_chart("TCO", results['total_tco_fleet'], 'total_tco_fleet', "M USD"); st.plotly_chart(fig, use_container_width=True)
-    with bench_col2: fig = create_benchmark_chart("GHG Emissions", results['total_ghg_fleet'], 'total_ghg_fleet', "M Tons CO2e"); st.plotly_chart(fig, use_container_width=True)
-    with bench_col3: fig = create_benchmark_chart("Charter Cost", results['total_charter_cost_fleet'], 'total_charter_cost_fleet', "M USD"); st.plotly_chart(fig, use_container_width=True)
-    with bench_col4: fig = create_benchmark_chart("Fuel Cost", results['total_annual_fuel_expenditure_fleet_million'], 'total_fuel_cost_fleet', "M USD"); st.plotly_chart(fig, use_container_width=True)
+    # Opt-in Monte Carlo: P5-P95 bands on the benchmark charts. The summary is kept per scenario and settings, so plain reruns do not resample.
+    monte_carlo = None
+    if st.checkbox("Monte Carlo mode: sample fuel, charter factor, revenue and GHG uncertainty and show percentile bands", key='montecarlo_mode'):
+        montecarlo_cols = st.columns(len(UNCERTAIN_INPUTS) + 1); montecarlo_distributions = {}
+        for montecarlo_col, (input_name, input_label) in zip(montecarlo_cols, UNCERTAIN_INPUTS.items()):
+            with montecarlo_col:
+                distribution_kind = st.selectbox(f"{input_label} Distribution:", DISTRIBUTION_KINDS, index=DISTRIBUTION_KINDS.index(DEFAULT_DISTRIBUTIONS[input_name].kind), key=f'montecarlo_{input_name}_distribution')
+                distribution_spread = st.number_input(f"{input_label} Spread (% SD):", min_value=0.0, max_value=100.0, value=DEFAULT_DISTRIBUTIONS[input_name].spread_percent, step=1.0, format="%.1f", key=f'montecarlo_{input_name}_spread')
+                montecarlo_distributions[input_name] = InputDistribution(distribution_kind, distribution_spread)
+        with montecarlo_cols[-1]: montecarlo_samples = st.number_input("Samples:", min_value=10_000, max_value=2_000_000, value=100_000, step=10_000, key='montecarlo_samples')
+        correlation_cols = st.columns(len(DEFAULT_INPUT_CORRELATIONS) + 1)
+        with correlation_cols[0]: route_correlation = st.number_input("Correlation Between Routes:", min_value=0.0, max_value=1.0, value=DEFAULT_ROUTE_CORRELATION, step=0.1, format="%.2f", key='montecarlo_route_correlation')
+        input_correlations = {}
+        for correlation_col, (input_pair, default_correlation) in zip(correlation_cols[1:], DEFAULT_INPUT_CORRELATIONS.items()):
+            with correlation_col: input_correlations[input_pair] = st.number_input(f"Correlation {UNCERTAIN_INPUTS[input_pair[0]]} / {UNCERTAIN_INPUTS[input_pair[1]]}:", min_value=-1.0, max_value=1.0, value=default_correlation, step=0.1, format="%.2f", key=f'montecarlo_{input_pair[0]}_{input_pair[1]}_correlation')
+        montecarlo_key = (live.key(results['discount_rate_percent'], results['analysis_period_years']), tuple(montecarlo_distributions.items()), route_correlation, tuple(input_correlations.items()), montecarlo_samples)
+        if st.session_state.get('montecarlo') and st.session_state.montecarlo[0] == montecarlo_key: monte_carlo = st.session_state.montecarlo[1]
+        else:
+            try:
+                monte_carlo = simulate(st.session_state.fleet_state.to_scenario(), montecarlo_distributions, route_correlation, input_correlations, montecarlo_samples, results['discount_rate_percent'], results['analysis_period_years'])
+                st.session_state.montecarlo = (montecarlo_key, monte_carlo)
+            except ValueError as error: st.error(f"Monte Carlo settings invalid: {error}")
+    percentile_band = (lambda fig, metric: with_percentile_band(fig, monte_carlo, metric, f'{calc_year} Scenario')) if monte_carlo else (lambda fig, metric: fig)
+    with bench_col1: fig = live.figure("benchmark_tco", lambda: create_benchmark_chart("TCO", results['total_tco_fleet'], 'total_tco_fleet', "M USD")); st.plotly_chart(percentile_band(fig, "total_tco"), use_container_width=True)
+    with bench_col2: fig = live.figure("benchmark_ghg", lambda: create_benchmark_chart("GHG Emissions", results['total_ghg_fleet'], 'total_ghg_fleet', "M Tons CO2e")); st.plotly_chart(percentile_band(fig, "total_ghg"), use_container_width=True)
+    with bench_col3: fig = live.figure("benchmark_charter_cost", lambda: create_benchmark_chart("Charter Cost", results['total_charter_cost_fleet'], 'total_charter_cost_fleet', "M USD")); st.plotly_chart(percentile_band(fig, "total_charter_cost"), use_container_width=True)
+    with bench_col4: fig = live.figure("benchmark_fuel", lambda: create_benchmark_chart("Fuel Cost", results['total_annual_fuel_expenditure_fleet_million'], 'total_fuel_cost_fleet', "M USD")); st.plotly_chart(percentile_band(fig, "total_fuel"), use_container_width=True)
+    if monte_carlo:
+        st.caption(f"Monte Carlo: {monte_carlo}. Bars show P5-P95 with the median; P(beating every {BENCHMARK_YEAR} benchmark above) = {monte_carlo.beat_all_benchmarks:.1%}.")
+        df_montecarlo = monte_carlo.to_frame()
+        st.dataframe(df_montecarlo.style.format({column: "{:,.2f}" for column in df_montecarlo.columns if column not in ("Metric", f"P(Beats {BENCHMARK_YEAR})")} | {f"P(Beats {BENCHMARK_YEAR})": "{:.1%}"}, na_rep="-"), use_container_width=True, hide_index=True)
+    profiler.section("scatter")
     with st.expander("Exploratory: GHG vs. Charter Vessels (Bubble Size by TCO)"):
         df_scatter = df_routes[(df_routes['Charter Vessels'] > 0) & (abs(df_routes['GHG (M Tons CO2e)']) > 1e-9)]
-        if not df_scatter.empty:
+        def scatter_figure():
             df_scatter_copy = df_routes[(df_routes['Charter Vessels'] > 0) & (abs(df_routes['GHG (M Tons CO2e)']) > 1e-9)].copy() # Ensure it's a copy for modification
             df_scatter_copy.loc[:, 'TCO for Sizing (M USD)'] = df_scatter_copy['TCO (M USD)'].apply(lambda x: max(x, 0.1))
             fig_scatter = px.scatter(df_scatter_copy, x="Charter Vessels", y="GHG (M Tons CO2e)", color="Route", size="TCO for Sizing (M USD)", hover_name="Route", size_max=60, title="GHG Emissions vs. Charter Vessels (Bubble Size = TCO)")
-            fig_scatter.update_layout(height=500); st.plotly_chart(fig_scatter, use_container_width=True)
+            fig_scatter.update_layout(height=500); return fig_scatter
+        if not df_scatter.empty: st.plotly_chart(live.figure("scatter", scatter_figure), use_container_width=True)
         else: st.caption("Not enough data for scatter plot.")
+    profiler.section("pathway")
+    with st.expander(f"Transition Pathway {PATHWAY_START_YEAR}-{PATHWAY_END_YEAR} (Default Fleets, Scenario Fleet in {calc_year})"):
+        # The scenario's owned/charter fleet replaces the default fleet of its year; the fleet moves linearly between anchor fleets.
+        # The evaluation time stays out of the (shared, reusable) bundle; it is only known when this run builds it.
+        pathway_timing = {}
+        def pathway_outputs():
+            pathway_fleets = dict(zip(DEFAULT_ANCHOR_YEARS, DEFAULT_OWNED_BY_ANCHOR)); pathway_charter = dict(zip(DEFAULT_ANCHOR_YEARS, DEFAULT_CHARTER_BY_ANCHOR))
+            pathway_fleets[calc_year] = fleet_on_pathway_categories(st.session_state.fleet_state.owned, calc_year); pathway_charter[calc_year] = st.session_state.fleet_state.charter.copy()
+            pathway_timer_start = time.perf_counter(); pathway = evaluate_pathway(FleetTrajectory.from_fleets(pathway_fleets, pathway_charter)); pathway_timing['ms'] = (time.perf_counter() - pathway_timer_start) * 1000
+            df_pathway = pathway.to_frame()
+            pathway_figures = (px.line(df_pathway, x="Year", y=["Annual Cost (M USD)", "TCO (M USD)", "Charter Cost (M USD)", "Fuel Cost (M USD)"], title="Annual Fleet Cost (M USD)", height=350),
+                               px.line(df_pathway, x="Year", y="GHG (M Tons CO2e)", title="Annual Fleet GHG (M Tons CO2e)", height=350),
+                               px.line(df_pathway, x="Year", y="Fleet GFI", hover_data=["GFI Zone"], title="Fleet GFI", height=350))
+            return pathway, df_pathway, pathway_figures
+        pathway, df_pathway, pathway_figures = live.figure("pathway", pathway_outputs)
+        for pathway_col, fig_pathway in zip(st.columns(3), pathway_figures):
+            with pathway_col: st.plotly_chart(fig_pathway, use_container_width=True)
+        st.dataframe(df_pathway.style.format({column: "{:,.2f}" for column in df_pathway.columns if column not in ("Year", "Owned Vessels", "GFI Zone")}), use_container_width=True, hide_index=True)
+        st.markdown("**CII Rating by Route**"); st.dataframe(pathway.cii_rating_frame().T, use_container_width=True)
+        st.caption((f"{len(df_pathway)} years evaluated in {pathway_timing['ms']:.1f} ms." if 'ms' in pathway_timing else f"{len(df_pathway)} years, reused from an earlier render of this scenario.")
+                   + " Per-vessel TCO, GHG and fuel cost follow the default inputs interpolated between anchor years.")
+    profiler.section("sensitivity")
+    st.subheader(f"One-at-a-Time Sensitivity ({calc_year})")
+    if st.checkbox("Sensitivity mode: move every input down and up and rank its effect", key='sensitivity_mode'):
+        sens_col1, sens_col2 = st.columns(2)
+        with sens_col1: sensitivity_change_percent = st.number_input("Change Each Input by (±%):", min_value=1.0, max_value=50.0, value=10.0, step=1.0, format="%.1f", key='sensitivity_change_percent')
+        with sens_col2: sensitivity_top = st.number_input("Inputs Shown per Metric:", min_value=3, max_value=40, value=10, step=1, key='sensitivity_top')
+        # Charter counts, TCO, GHG and fuel per route, every charter factor of the year and the discount rate, evaluated as one batch.
+        sensitivity = one_at_a_time(st.session_state.fleet_state.to_scenario(), sensitivity_change_percent, results['discount_rate_percent'], results['analysis_period_years'])
+        st.plotly_chart(tornado_figure(sensitivity, sensitivity_top), use_container_width=True)
+        st.caption(f"{len(sensitivity.inputs)} inputs ({sensitivity.scenarios} scenarios including the base) evaluated in {sensitivity.seconds * 1000:.2f} ms. Zero-valued inputs cannot move by a percentage and are not shown.")
+        st.download_button("Download Sensitivity Table (CSV)", data=sensitivity.to_frame().to_csv(index=False), file_name=f"sensitivity_{calc_year}.csv", mime="text/csv")
+    profiler.section("scenario_store")
+    st.subheader("Saved Scenarios")
+    # Inputs, route table and totals go to the local SQLite store; comparisons bulk-load saved runs instead of recomputing them.
+    current_record = lambda: ScenarioRecord.from_results(calc_year, live.inputs, results['route_data_df'], results, results['discount_rate_percent'], results['analysis_period_years'], st.session_state.get('store_scenario_name') or f"{calc_year} scenario")
+    store_col1, store_col2 = st.columns([3, 1], vertical_alignment="bottom")
+    with store_col1: st.text_input("Scenario Name:", key='store_scenario_name', placeholder=f"{calc_year} scenario")
+    with store_col2: save_scenario_clicked = st.button("Save Scenario", use_container_width=True)
+    if save_scenario_clicked:
+        try: saved_scenario_id = SCENARIO_STORE.save(current_record()); st.success(f"Saved as scenario #{saved_scenario_id} in {SCENARIO_STORE.path}.")
+        except (sqlite3.Error, OSError) as error: st.error(f"Could not save to the scenario store: {error}")
+    if st.checkbox("Compare saved scenarios", key='store_compare'):
+        compare_col1, compare_col2, compare_col3 = st.columns(3)
+        with compare_col1: store_years = st.multiselect("Years:", YEAR_OPTIONS, default=[calc_year], key='store_years')
+        with compare_col2: store_order_by = st.selectbox("Order By (Best First):", ORDER_COLUMNS, format_func=lambda column: METRIC_LABELS.get(column, column.replace('_', ' ').title()), key='store_order_by')
+        with compare_col3: store_limit = st.number_input("Scenarios Loaded:", min_value=10, max_value=10_000, value=500, step=50, key='store_limit')
+        try:
+            stored = SCENARIO_STORE.load(store_years, order_by=store_order_by, descending=store_order_by in ("saved_at", "total_revenue", "npv"), limit=store_limit); stored_total = SCENARIO_STORE.count(store_years)
+        except (sqlite3.Error, OSError) as error: stored = None; st.error(f"Could not read the scenario store: {error}")
+        if stored is not None and len(stored):
+            reference = current_record()
+            df_stored = stored.diff(reference.totals).drop(columns=["id", "scenario_key"]).rename(columns=METRIC_LABELS | {"name": "Name", "saved_at": "Saved At", "year": "Year", "discount_rate_percent": "Discount Rate (%)", "analysis_period_years": "Horizon (Years)"})
+            df_stored["Inputs Changed"] = stored.changed_inputs(reference); df_stored["Routes Changed"] = stored.changed_routes(reference.routes)
+            fig_stored = px.scatter(df_stored.astype({"Year": str}), x="Investment (M USD)", y="GHG (M Tons CO2e)", color="Year", hover_name="Name", hover_data={"NPV (M USD)": ":,.0f"}, title="Saved Scenarios: Investment vs. GHG", height=400)
+            fig_stored.add_trace(go.Scatter(x=[reference.totals["total_investment"]], y=[reference.totals["total_ghg"]], mode="markers", marker=dict(symbol="star", size=16, color="black"), name="Current Scenario"))
+            st.plotly_chart(fig_stored, use_container_width=True)
+            st.dataframe(df_stored.style.format({column: "{:,.2f}" for column in df_stored.columns if column.endswith(")") and column not in ("Discount Rate (%)", "Horizon (Years)")}), use_container_width=True, hide_index=True)
+            st.caption(f"{len(stored)} of {stored_total:,} saved scenarios loaded in {stored.seconds * 1000:.1f} ms (one indexed query, no recomputation). Δ columns are against the current scenario; "
+                       f"inputs changed is -1 for other years.")
+        elif stored is not None: st.info("No saved scenarios for these years yet. Use 'Save Scenario' to add the current analysis.")
+    profiler.section("cache_status")
+    live_figures_built = live.figures_built - live_figures_built_before
+    st.caption(f"Live results: last update {live.last_edit}; {live_figures_built} figure(s) rebuilt and {live.figures_reused - live_figures_reused_before} reused on this run ({live.edits} edit(s) since Run Analysis).")
+    remember_live_results(live, results['discount_rate_percent'], results['analysis_period_years']); result_cache_stats = RESULT_CACHE.stats()
+    # The cached copy now holds this scenario's figures; the session keeps only what the cache lacks and borrows the rest on later reruns.
+    live.release_figures(live.key(results['discount_rate_percent'], results['analysis_period_years']))
+    st.caption(f"Scenario cache: {'results from cache' if st.session_state.get('results_from_cache') else 'results computed'}; {result_cache_stats['entries']} scenarios "
+               f"({result_cache_stats['bytes'] / 2**20:.1f} MiB) shared across sessions, {result_cache_stats['hits']} hits / {result_cache_stats['misses']} misses on Run Analysis ({result_cache_stats['hit_rate']:.0%}).")
 
 else:
     if not st.session_state.show_results: st.info("Click 'Run Analysis' after entering parameters.")
 
+# --- Rerun Profiler ---
+rerun_profile = profiler.stop() | {"year": st.session_state.selected_year, "results_shown": bool(st.session_state.show_results and st.session_state.results), "results_from_cache": bool(st.session_state.get('results_from_cache')),
+                                   "session_bytes": session_bytes(st.session_state.to_dict())}
+st.session_state.rerun_profiles.append(rerun_profile)
+st.sidebar.divider()
+if st.sidebar.checkbox("Show rerun profiler", key='show_profiler'):
+    with st.expander("🛠️ Rerun Profiler", expanded=True):
+        df_rerun_profile = pd.DataFrame({"This Rerun (ms)": pd.Series(rerun_profile["sections_ms"])})
+        df_rerun_summary = pd.DataFrame(summarize(st.session_state.rerun_profiles)).T
+        df_rerun_profile = df_rerun_profile.join(df_rerun_summary[["p50_ms", "p95_ms", "runs"]].rename(columns={"p50_ms": "p50 (ms)", "p95_ms": "p95 (ms)", "runs": "Runs"}), how="left")
+        st.dataframe(df_rerun_profile.style.format("{:,.1f}"), use_container_width=True)
+        st.caption(f"Script total {rerun_profile['total_ms']:,.1f} ms this rerun; p50 {df_rerun_summary.loc['total', 'p50_ms']:,.1f} ms over the last {len(st.session_state.rerun_profiles)} reruns.")
+        session_budget_text = f"Session state {rerun_profile['session_bytes'] / 2**10:,.0f} KiB of the {SESSION_MEMORY_BUDGET_BYTES / 2**10:,.0f} KiB per-user budget (figures shared across sessions not counted)."
+        if rerun_profile['session_bytes'] > SESSION_MEMORY_BUDGET_BYTES: st.warning(session_budget_text)
+        else: st.caption(session_budget_text)
+        st.download_button("Export Timings (JSON)", data=profiles_json(st.session_state.rerun_profiles), file_name="rerun_profile.json", mime="application/json")
+
 # --- Footer ---
 st.divider()
 current_year = datetime.datetime.now().year
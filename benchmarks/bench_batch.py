@@ -0,0 +1,85 @@
+"""Startup time and throughput of the headless batch runner on a synthetic scenario folder.
+
+    python benchmarks/bench_batch.py --files 5000 --per-file 4 --workers 4
+
+Startup is the best of several fresh `python -c "import scenario_batch"` processes, set
+against importing the dashboard's Streamlit/Plotly stack. The run itself is the CLI
+in a fresh process, so the reported time includes imports, file parsing and output writing.
+"""
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from fleet_data import OWNED_SHIP_CATEGORIES_BY_YEAR, ROUTE_KEYS, YEAR_OPTIONS, category_key
+from scenario_sweep import random_batch
+
+UI_MODULES = ("streamlit", "plotly")
+
+
+def write_scenarios(workdir, n_files, per_file, seed=0):
+    """`n_files` JSON files of `per_file` random scenarios each, cycling through the years."""
+    per_year = -(-n_files * per_file // len(YEAR_OPTIONS))
+    batches = {year: random_batch(year, per_year, seed=seed + idx) for idx, year in enumerate(YEAR_OPTIONS)}
+    cursor = dict.fromkeys(YEAR_OPTIONS, 0)
+    for file_idx in range(n_files):
+        entries = []
+        for entry_idx in range(per_file):
+            year = YEAR_OPTIONS[(file_idx * per_file + entry_idx) % len(YEAR_OPTIONS)]
+            batch, row = batches[year], cursor[year]; cursor[year] += 1
+            cat_keys = [category_key(cat) for cat in OWNED_SHIP_CATEGORIES_BY_YEAR[year]]
+            entries.append({"year": year, "discount_rate_percent": 2.0 + row % 10, "analysis_period_years": 10 + row % 20, "routes": {
+                route_key: {"owned_ships": dict(zip(cat_keys, batch.owned[row, route_idx].tolist())), "charter": int(batch.charter[row, route_idx]),
+                            "tco": float(batch.tco[row, route_idx]), "ghg": float(batch.ghg[row, route_idx]), "total_fuel_cost_route": float(batch.fuel[row, route_idx])}
+                for route_idx, route_key in enumerate(ROUTE_KEYS)}})
+        (workdir / f"scenario_{file_idx:06d}.json").write_text(json.dumps(entries if per_file > 1 else entries[0]), encoding="utf-8")
+
+
+def import_seconds(statement, repeat=5):
+    """Best wall time of a fresh interpreter running `statement` from the repo root."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], cwd=REPO_ROOT, check=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--per-file", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--format", choices=("parquet", "json"), default="parquet")
+    parser.add_argument("--workdir", type=Path, default=None)
+    parser.add_argument("--keep", action="store_true")
+    args = parser.parse_args()
+
+    leaked = subprocess.run([sys.executable, "-c", f"import sys, scenario_batch; print(' '.join(m for m in sys.modules if m.split('.')[0] in {UI_MODULES!r}))"],
+                            cwd=REPO_ROOT, check=True, capture_output=True, text=True).stdout.split()
+    if leaked: raise SystemExit(f"scenario_batch imports UI modules: {', '.join(leaked)}")
+    print(f"startup: interpreter {import_seconds('pass'):.3f}s, scenario_batch {import_seconds('import scenario_batch'):.3f}s, "
+          f"streamlit + plotly {import_seconds('import streamlit, plotly.express, plotly.graph_objects'):.3f}s (no UI modules loaded by the batch runner)")
+
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix="bench_batch_"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    try:
+        start = time.perf_counter(); write_scenarios(workdir, args.files, args.per_file)
+        print(f"wrote {args.files:,} files x {args.per_file} scenarios in {time.perf_counter() - start:.1f}s")
+        command = [sys.executable, str(REPO_ROOT / "scenario_batch.py"), str(workdir), "--format", args.format] + (["--workers", str(args.workers)] if args.workers else [])
+        start = time.perf_counter(); subprocess.run(command, check=True); elapsed = time.perf_counter() - start
+        n_scenarios = args.files * args.per_file
+        print(f"end to end: {n_scenarios:,} scenarios in {elapsed:.2f}s ({n_scenarios / elapsed:,.0f} scenarios/s including startup and writing)")
+    finally:
+        if not args.keep and args.workdir is None: shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
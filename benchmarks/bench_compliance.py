@@ -0,0 +1,64 @@
+"""CII rating / GFI zone classification throughput: per-record DataFrame lookups vs. the vectorized binary search.
+
+    python benchmarks/bench_compliance.py --records 1000000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fleet_compliance import CII_VESSEL_TYPES, ROUTE_CII_TYPE_INDEX, cii_rating_counts, gfi_zone, gfi_zone_counts, rate_cii
+from fleet_data import CII_RATING_DATA_BY_TYPE, CII_YEARS_DATA, GFI_COMPLIANCE_ZONES_DF, ROUTE_KEYS
+
+
+def random_records(n, seed=0):
+    """Random vessel records; each vessel type follows its route, as in the fleet tables."""
+    rng = np.random.default_rng(seed)
+    route_idx = rng.integers(0, len(ROUTE_KEYS), n)
+    return {"type_idx": np.asarray(ROUTE_CII_TYPE_INDEX)[route_idx], "route_idx": route_idx, "year": rng.choice(np.array(CII_YEARS_DATA), n),
+            "cii": rng.uniform(0.0, 30.0, n), "gfi": rng.uniform(0.0, 100.0, n)}
+
+
+def classify_loop(records, n):
+    """Row-by-row lookups against the DataFrames, as a per-vessel loop over the dashboard tables would do it."""
+    ratings, zones = [], []
+    for type_idx, year, cii, gfi in zip(records["type_idx"][:n].tolist(), records["year"][:n].tolist(), records["cii"][:n].tolist(), records["gfi"][:n].tolist()):
+        cii_df = CII_RATING_DATA_BY_TYPE[CII_VESSEL_TYPES[type_idx]]
+        bands = cii_df[cii_df["Year"] == year].iloc[0]
+        ratings.append(sum(cii >= bands[column] for column in ("Superior", "Lower", "Upper", "Inferior")))
+        gfi_rows = GFI_COMPLIANCE_ZONES_DF[GFI_COMPLIANCE_ZONES_DF["Year"] == year]
+        zones.append(0 if gfi_rows.empty else 1 + sum(gfi <= gfi_rows.iloc[0][column] for column in ("GFI Base", "GFI DC", "GFI_Credit_Upper_Limit")))
+    return np.array(ratings), np.array(zones)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--loop-sample", type=int, default=2_000, help="records timed with the per-record loop (extrapolated)")
+    args = parser.parse_args(argv)
+    records = random_records(args.records)
+
+    start = time.perf_counter()
+    loop_ratings, loop_zones = classify_loop(records, args.loop_sample)
+    loop_rate = args.loop_sample / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    ratings = rate_cii(records["type_idx"], records["year"], records["cii"])
+    zones = gfi_zone(records["year"], records["gfi"])
+    classify_seconds = time.perf_counter() - start
+    counts = cii_rating_counts(records["route_idx"], ratings)
+    total_seconds = time.perf_counter() - start
+
+    assert (ratings[:args.loop_sample] == loop_ratings).all() and (zones[:args.loop_sample] == loop_zones).all(), "vectorized result differs from the loop"
+    print(f"per-record loop: {loop_rate:,.0f} records/s -> {args.records / loop_rate:,.1f} s for {args.records:,} records (extrapolated)")
+    print(f"vectorized:      {args.records / classify_seconds:,.0f} records/s -> {classify_seconds * 1000:.1f} ms to classify, "
+          f"{total_seconds * 1000:.1f} ms with per-route counts ({args.records / loop_rate / total_seconds:,.0f}x)")
+    print(counts.to_string()); print(gfi_zone_counts(zones).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Micro-benchmark: array snapshot engine vs. the dashboard's original per-route loop.
+
+Run with `python benchmarks/bench_engine.py`.
+"""
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fleet_data import ALL_CHARTER_FACTORS, OWNED_SHIP_CATEGORIES_BY_YEAR, ROUTE_KEYS, ROUTE_REVENUES_BY_YEAR, TANKER_ROUTES, YEAR_OPTIONS, category_key
+from fleet_engine import Scenario, evaluate_snapshot
+
+
+def legacy_loop(state, current_year_calc):
+    """The "Run Analysis" loop as it stood before the engine, minus the Streamlit calls."""
+    current_year_factors = ALL_CHARTER_FACTORS.get(current_year_calc, {})
+    route_level_data_list = []
+    calculated_total_owned_vessels_all_routes = 0
+    total_tco_fleet = 0.0; total_ghg_fleet = 0.0; total_charter_cost_fleet = 0.0
+    total_fleet_fuel_cost_from_routes = 0.0
+    total_fleet_revenue_scenario = 0.0
+    current_owned_ship_categories_for_sum = OWNED_SHIP_CATEGORIES_BY_YEAR.get(current_year_calc, [])
+    scenario_revenue_data = ROUTE_REVENUES_BY_YEAR.get(current_year_calc, {})
+    for route_key_iter in ROUTE_KEYS:
+        for ship_cat_display_name in current_owned_ship_categories_for_sum:
+            cat_key_internal = ship_cat_display_name.lower().replace(' ', '_').replace('(','').replace(')','')
+            calculated_total_owned_vessels_all_routes += state.get(f"owned_{route_key_iter}_{cat_key_internal}", 0)
+        total_fleet_revenue_scenario += scenario_revenue_data.get(route_key_iter, 0.0)
+    for key, display_name in TANKER_ROUTES.items():
+        route_owned_ships_sum = 0
+        for ship_cat_display_name in current_owned_ship_categories_for_sum:
+            cat_key_internal = ship_cat_display_name.lower().replace(' ', '_').replace('(','').replace(')','')
+            route_owned_ships_sum += state.get(f"owned_{key}_{cat_key_internal}", 0)
+        charter_count = state[f"charter_{key}"]
+        tco_val = state[f"tco_{key}"]; ghg_val = state[f"ghg_{key}"]; fuel_cost_route_val = state[f"fuel_cost_route_{key}"]
+        route_revenue_val = scenario_revenue_data.get(key, 0.0)
+        factors_tuple = current_year_factors.get(key)
+        route_charter_cost = 0.0
+        if factors_tuple and charter_count > 0: route_charter_cost = charter_count * factors_tuple[0] * factors_tuple[1]
+        total_charter_cost_fleet += route_charter_cost; total_tco_fleet += tco_val; total_ghg_fleet += ghg_val
+        total_fleet_fuel_cost_from_routes += fuel_cost_route_val
+        route_level_data_list.append({"Route": display_name, "Total Owned Ships": route_owned_ships_sum, "Charter Vessels": charter_count, "Revenue (M USD)": route_revenue_val, "TCO (M USD)": tco_val, "GHG (M Tons CO2e)": ghg_val, "Charter Cost (M USD)": route_charter_cost, "Total Fuel Cost (M USD)": fuel_cost_route_val})
+    return route_level_data_list, (calculated_total_owned_vessels_all_routes, total_tco_fleet, total_ghg_fleet, total_charter_cost_fleet, total_fleet_fuel_cost_from_routes, total_fleet_revenue_scenario)
+
+
+def state_for_year(year):
+    """A flat widget-key mapping equivalent to the session state after "Reset to defaults"."""
+    scenario = Scenario.from_defaults(year)
+    state = {}
+    for route_idx, route_key in enumerate(ROUTE_KEYS):
+        state[f"charter_{route_key}"] = int(scenario.charter[route_idx]); state[f"tco_{route_key}"] = float(scenario.tco[route_idx])
+        state[f"ghg_{route_key}"] = float(scenario.ghg[route_idx]); state[f"fuel_cost_route_{route_key}"] = float(scenario.fuel[route_idx])
+        for cat_idx, cat in enumerate(scenario.categories):
+            state[f"owned_{route_key}_{category_key(cat)}"] = int(scenario.owned[route_idx, cat_idx])
+    return state
+
+
+def best_of(stmt, number):
+    return min(timeit.repeat(stmt, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    print(f"{'year':>6} {'legacy loop':>14} {'state->engine':>14} {'engine only':>14}   (us per call, best of 5)")
+    for year in YEAR_OPTIONS:
+        state = state_for_year(year)
+        _, legacy_totals = legacy_loop(state, year)
+        result = evaluate_snapshot(Scenario.from_state(state, year))
+        engine_totals = (result.total_owned, result.total_tco, result.total_ghg, result.total_charter_cost, result.total_fuel, result.total_revenue)
+        assert all(abs(a - b) < 1e-6 for a, b in zip(legacy_totals, engine_totals)), (legacy_totals, engine_totals)
+        scenario = Scenario.from_state(state, year)
+        t_legacy = best_of(lambda: legacy_loop(state, year), 2000)
+        t_state = best_of(lambda: evaluate_snapshot(Scenario.from_state(state, year)), 2000)
+        t_engine = best_of(lambda: evaluate_snapshot(scenario), 2000)
+        print(f"{year:>6} {t_legacy:>14.1f} {t_state:>14.1f} {t_engine:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""Figure-build time for the CII/GFI section per rerun: rebuilt every time (old behaviour) vs. the shared cache.
+
+Run with `python benchmarks/bench_figures.py`.
+"""
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fleet_data import CII_RATING_DATA_BY_TYPE, YEAR_OPTIONS
+from fleet_figures import FIGURE_CACHE, build_cii_band_figure, build_gfi_zone_figure, cii_band_figure, gfi_zone_figure
+
+
+def rebuild_all(year):
+    for vessel_type in CII_RATING_DATA_BY_TYPE: build_cii_band_figure(vessel_type, year)
+    build_gfi_zone_figure()
+
+
+def from_cache(year):
+    for vessel_type in CII_RATING_DATA_BY_TYPE: cii_band_figure(vessel_type, year)
+    gfi_zone_figure()
+
+
+def main():
+    print(f"{'year':>6} {'rebuild (ms)':>14} {'cached (ms)':>14} {'speed-up':>10}")
+    for year in YEAR_OPTIONS:
+        t_rebuild = min(timeit.repeat(lambda: rebuild_all(year), number=5, repeat=3)) / 5 * 1000
+        from_cache(year)
+        t_cached = min(timeit.repeat(lambda: from_cache(year), number=1000, repeat=3)) / 1000 * 1000
+        print(f"{year:>6} {t_rebuild:>14.2f} {t_cached:>14.4f} {t_rebuild / t_cached:>9.0f}x")
+    print("cache:", FIGURE_CACHE.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Streaming ingestion throughput and peak memory on a synthetic register and voyage log.
+
+    python benchmarks/bench_ingest.py --voyages 20000000 --format parquet   # ~1 GB of CSV-equivalent rows
+
+The files are written chunk by chunk to --workdir (default: a temporary directory)
+and removed afterwards unless --keep is given. Ingestion runs in a fresh process.
+Its peak RSS is reported before and after reading, so the growth caused by the
+file is separate from the imports and from generating the data.
+"""
+import argparse
+import multiprocessing
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fleet_data import OWNED_SHIP_CATEGORIES_BY_YEAR, ROUTE_KEYS, TANKER_ROUTES
+from fleet_ingest import DEFAULT_CHUNK_ROWS, _peak_rss_bytes, ingest_fleet
+
+
+def write_frames(path, frames):
+    if path.suffix == ".parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        writer = None
+        for frame in frames:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            writer = writer or pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+        writer.close()
+    else:
+        for idx, frame in enumerate(frames): frame.to_csv(path, mode="w" if idx == 0 else "a", header=idx == 0, index=False)
+
+
+def synthetic_files(workdir, year, vessels, voyages, fmt, seed=0):
+    rng = np.random.default_rng(seed)
+    categories = OWNED_SHIP_CATEGORIES_BY_YEAR[year]
+    route_names = np.array([TANKER_ROUTES[key] for key in ROUTE_KEYS] + list(ROUTE_KEYS))
+    register = pd.DataFrame({
+        "vessel_id": [f"V{idx:07d}" for idx in range(vessels)], "route": rng.choice(route_names, vessels), "category": rng.choice(np.array(categories), vessels),
+        "ownership": rng.choice(np.array(["owned", "chartered"]), vessels, p=[0.6, 0.4]), "tco_musd": rng.uniform(5, 40, vessels).round(4),
+    })
+    register_path = workdir / f"register.{fmt}"; write_frames(register_path, [register])
+    voyage_path = workdir / f"voyages.{fmt}"
+    chunk = 1_000_000
+    def voyage_frames():
+        for start in range(0, voyages, chunk):
+            n = min(chunk, voyages - start)
+            # ~2% of voyages belong to vessels missing from the register
+            vessel_ids = np.where(rng.random(n) < 0.02, "UNREGISTERED", register["vessel_id"].to_numpy()[rng.integers(0, vessels, n)])
+            yield pd.DataFrame({"vessel_id": vessel_ids, "year": rng.choice(np.array([year, year - 1]), n, p=[0.9, 0.1]),
+                                "ghg_t": rng.uniform(100, 20_000, n).round(2), "fuel_cost_usd": rng.uniform(5e4, 5e6, n).round(2)})
+    write_frames(voyage_path, voyage_frames())
+    return register_path, voyage_path
+
+
+def ingest_in_child(register_path, year, voyage_path, chunk_rows):
+    rss_before = _peak_rss_bytes()
+    return rss_before, ingest_fleet(register_path, year, voyage_path, chunk_rows=chunk_rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--year", type=int, default=2030)
+    parser.add_argument("--vessels", type=int, default=5_000)
+    parser.add_argument("--voyages", type=int, default=5_000_000)
+    parser.add_argument("--format", choices=("csv", "parquet"), default="csv")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--workdir", type=Path)
+    parser.add_argument("--keep", action="store_true")
+    args = parser.parse_args(argv)
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix="fleet_ingest_"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    try:
+        start = time.perf_counter()
+        register_path, voyage_path = synthetic_files(workdir, args.year, args.vessels, args.voyages, args.format)
+        print(f"wrote {args.voyages:,} voyages ({voyage_path.stat().st_size / 2**20:,.0f} MiB {args.format}) in {time.perf_counter() - start:.1f} s")
+        with multiprocessing.get_context("spawn").Pool(1) as pool:
+            rss_before, result = pool.apply(ingest_in_child, (register_path, args.year, voyage_path, args.chunk_rows))
+        print(result.route_table().round(3).to_string(index=False))
+        print("register:", result.register_stats)
+        print("voyages: ", result.voyage_stats)
+        if rss_before: print(f"peak RSS before ingest {rss_before / 2**20:,.0f} MiB, after {result.voyage_stats.peak_rss_bytes / 2**20:,.0f} MiB (chunk {args.chunk_rows:,} rows)")
+    finally:
+        if not args.keep and args.workdir is None: shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Headless rerun latency suite: per-section timings for the 2030/2040/2050 defaults, checked against a baseline.
+
+    python benchmarks/bench_latency.py                      # exit status 1 on a regression
+    python benchmarks/bench_latency.py --write-baseline     # record this machine's timings
+    python benchmarks/bench_latency.py --json timings.json  # export every profile
+
+For each year `--runs` fresh `AppTest` sessions select the year and click "Run
+Analysis" with the scenario and figure caches cleared (the "run" case). The last
+session then reruns `--reruns` times with the results on screen (the "rerun"
+case). The dashboard's `RerunProfiler` records each run's sections, and every
+case is reported as its p50 per section. A p50 regresses when it exceeds
+baseline * tolerance + slack; the slack keeps sub-millisecond sections from
+flapping. A measured section that the baseline does not list also fails the
+run, so new sections are gated once `--write-baseline` records them.
+"""
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from fleet_figures import FIGURE_CACHE
+from fleet_live import RESULT_CACHE
+from fleet_profiler import summarize
+
+BASELINE_PATH = Path(__file__).resolve().parent / "latency_baseline.json"
+SUITE_YEARS = (2030, 2040, 2050)
+
+
+def profile_year(year, runs, reruns):
+    from streamlit.testing.v1 import AppTest
+    run_profiles, rerun_profiles = [], []
+    for _ in range(runs):
+        RESULT_CACHE.clear(); FIGURE_CACHE.clear()
+        session = AppTest.from_file(str(REPO_ROOT / "Petrobras_Outputs.py"), default_timeout=120).run()
+        if year != session.session_state["selected_year"]: session.selectbox(key="selected_year").set_value(year).run()
+        next(button for button in session.button if button.label == "Run Analysis").click().run()
+        run_profiles.append(session.session_state["rerun_profiles"][-1])
+    for _ in range(reruns):
+        session.run(); rerun_profiles.append(session.session_state["rerun_profiles"][-1])
+    if session.exception: raise RuntimeError(session.exception[0].value)
+    return run_profiles, rerun_profiles
+
+
+def suite_timings(runs, reruns):
+    """({year: {"run" | "rerun": {section: p50 ms}}}, every profile)."""
+    timings, profiles = {}, []
+    for year in SUITE_YEARS:
+        run_profiles, rerun_profiles = profile_year(year, runs, reruns)
+        profiles += run_profiles + rerun_profiles
+        timings[str(year)] = {case: {name: stats["p50_ms"] for name, stats in summarize(case_profiles).items()}
+                              for case, case_profiles in (("run", run_profiles), ("rerun", rerun_profiles))}
+    return timings, profiles
+
+
+def regressions(timings, baseline, tolerance, slack_ms):
+    found = []
+    for year, cases in baseline.items():
+        for case, sections in cases.items():
+            for name, baseline_ms in sections.items():
+                measured = timings.get(year, {}).get(case, {}).get(name)
+                if measured is not None and measured > baseline_ms * tolerance + slack_ms: found.append(f"{year} {case} {name}: {measured:.1f} ms vs baseline {baseline_ms:.1f} ms")
+    return found
+
+
+def missing_sections(timings, baseline):
+    """Measured "year case section" entries that the baseline does not list."""
+    return [f"{year} {case} {name}" for year, cases in timings.items() for case, sections in cases.items()
+            for name in sections if name not in baseline.get(year, {}).get(case, {})]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="cold Run Analysis sessions per year")
+    parser.add_argument("--reruns", type=int, default=10)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=1.5, help="allowed p50 ratio over the baseline")
+    parser.add_argument("--slack-ms", type=float, default=10.0)
+    parser.add_argument("--write-baseline", action="store_true")
+    parser.add_argument("--json", type=Path, help="write every profile and the suite timings as JSON")
+    args = parser.parse_args(argv)
+    logging.disable(logging.CRITICAL)
+    timings, profiles = suite_timings(args.runs, args.reruns)
+    for year, cases in timings.items():
+        print(f"{year}: run {cases['run']['total']:.0f} ms, rerun p50 {cases['rerun']['total']:.0f} ms -- "
+              + ", ".join(f"{name} {ms:.1f}" for name, ms in sorted(cases["rerun"].items(), key=lambda item: -item[1]) if name != "total"))
+    if args.json: args.json.write_text(json.dumps({"timings": timings, "profiles": profiles}, indent=2), encoding="utf-8")
+    if args.write_baseline:
+        args.baseline.write_text(json.dumps(timings, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"baseline written to {args.baseline}")
+        return
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    found = regressions(timings, baseline, args.tolerance, args.slack_ms)
+    missing = missing_sections(timings, baseline)
+    if missing: found.append(f"not in {args.baseline.name} (record it with --write-baseline): " + ", ".join(missing))
+    if found: sys.exit("latency regressions:\n  " + "\n  ".join(found))
+    print(f"no regressions against {args.baseline.name} (tolerance x{args.tolerance}, slack {args.slack_ms} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Work and latency per input edit: live incremental results vs. re-running the full analysis.
+
+    python benchmarks/bench_live.py --edits 30
+
+Engine: `LiveResults.update` for one changed widget vs. a fresh `LiveResults` (the
+full route evaluation that "Run Analysis" performs). App: a headless `AppTest` session
+with results shown. Each edit reruns the script once and patches the results. Before
+this change an edit cleared the results, so a second rerun ("Run Analysis") recomputed
+and rebuilt every output; that path is timed as edit + click.
+
+Before timing, `--updates` random edits (single widgets and bulk diffs, counts
+and values) are applied through `LiveResults.update`. The route table, fleet
+totals, inputs and missing-factor routes must then equal a fresh `LiveResults`
+of the same inputs.
+"""
+import argparse
+import logging
+import statistics
+import sys
+import time
+import timeit
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from fleet_data import ROUTE_KEYS, YEAR_OPTIONS
+from fleet_live import FIGURE_NAMES, LiveResults
+from fleet_state import OWNED_WIDGET_KEYS_BY_YEAR, ROUTE_WIDGET_KEYS, WIDGET_INDEX_BY_YEAR, FleetState
+
+
+def edit_keys(year, n_edits):
+    """Cycle through TCO, charter, GHG, fuel and owned-count widgets across routes."""
+    keys = [key for route_idx in range(len(ROUTE_KEYS)) for key in (ROUTE_WIDGET_KEYS["tco"][route_idx], ROUTE_WIDGET_KEYS["charter"][route_idx], ROUTE_WIDGET_KEYS["ghg"][route_idx],
+                                                                   ROUTE_WIDGET_KEYS["fuel"][route_idx], OWNED_WIDGET_KEYS_BY_YEAR[year][route_idx][0])]
+    return [keys[idx % len(keys)] for idx in range(n_edits)]
+
+
+def consistency_failures(year, n_updates, seed=0):
+    """Differences between `LiveResults` after `n_updates` random updates and a fresh `LiveResults` (empty when they match)."""
+    rng = np.random.default_rng(seed)
+    fleet_state = FleetState.defaults(year); live = LiveResults(fleet_state)
+    keys = list(WIDGET_INDEX_BY_YEAR[year])
+    for _ in range(n_updates):
+        # Mostly one widget at a time; otherwise a few inputs at once, found by diffing every input.
+        bulk = rng.random() < 0.2
+        for key in rng.choice(keys, 3 if bulk else 1, replace=False).tolist():
+            field = WIDGET_INDEX_BY_YEAR[year][key][0]
+            fleet_state.sync_widget({key: int(rng.integers(0, 30)) if field in ("owned", "charter") else round(float(rng.uniform(0.0, 500.0)), 3)}, key)
+        live.update(fleet_state, None if bulk else key)
+    fresh = LiveResults(fleet_state); failures = []
+    try: pd.testing.assert_frame_equal(live.route_table, fresh.route_table, check_dtype=False, rtol=1e-9, atol=1e-9)
+    except AssertionError as exc: failures.append(f"route table: {exc}")
+    failures += [f"total {name}" for name, value in fresh.totals.items() if not np.isclose(live.totals[name], value, rtol=1e-9, atol=1e-9)]
+    failures += [f"input {field}" for field in FleetState.FIELDS if not np.array_equal(live.inputs[field], getattr(fleet_state, field))]
+    if sorted(live.missing_factor_routes) != sorted(fresh.missing_factor_routes): failures.append("missing charter factor routes")
+    return failures
+
+
+def engine_costs(year):
+    fleet_state = FleetState.defaults(year); live = LiveResults(fleet_state)
+    def one_edit():
+        fleet_state.tco[2] += 0.5; live.update(fleet_state, ROUTE_WIDGET_KEYS["tco"][2])
+    edit_us = min(timeit.repeat(one_edit, number=2000, repeat=3)) / 2000 * 1e6
+    full_us = min(timeit.repeat(lambda: LiveResults(fleet_state), number=200, repeat=3)) / 200 * 1e6
+    return edit_us, full_us, live.last_edit
+
+
+def app_costs(year, n_edits):
+    from streamlit.testing.v1 import AppTest
+    session = AppTest.from_file(str(REPO_ROOT / "Petrobras_Outputs.py"), default_timeout=120).run()
+    if year != YEAR_OPTIONS[0]: session.selectbox(key="selected_year").set_value(year).run()
+    run_button = lambda: next(button for button in session.button if button.label == "Run Analysis")
+    run_button().click().run()
+    live_ms, rebuilt, full_ms = [], [], []
+    for key in edit_keys(year, n_edits):
+        widget = session.number_input(key=key)
+        built_before = session.session_state["live_results"].figures_built
+        start = time.perf_counter(); widget.set_value(widget.value + 1).run(); live_ms.append((time.perf_counter() - start) * 1000)
+        rebuilt.append(session.session_state["live_results"].figures_built - built_before)
+        start = time.perf_counter(); widget.set_value(widget.value - 1).run(); run_button().click().run(); full_ms.append((time.perf_counter() - start) * 1000)
+        if session.exception: raise RuntimeError(session.exception[0].value)
+    return live_ms, rebuilt, full_ms
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--year", type=int, choices=YEAR_OPTIONS, default=YEAR_OPTIONS[0])
+    parser.add_argument("--edits", type=int, default=30)
+    parser.add_argument("--updates", type=int, default=500, help="random LiveResults updates checked against a fresh evaluation, per year")
+    args = parser.parse_args(argv)
+    logging.disable(logging.CRITICAL)
+    failures = [f"{year}: {failure}" for year in YEAR_OPTIONS for failure in consistency_failures(year, args.updates)]
+    if failures: sys.exit("LiveResults after updates differs from a fresh evaluation:\n  " + "\n  ".join(failures))
+    print(f"engine: {args.updates} random updates per year match a fresh LiveResults")
+    edit_us, full_us, work = engine_costs(args.year)
+    print(f"engine: one edit {edit_us:.1f} us ({work}) vs full evaluation {full_us:.1f} us")
+    live_ms, rebuilt, full_ms = app_costs(args.year, args.edits)
+    print(f"app: {args.edits} edits -- live update p50 {statistics.median(live_ms):.0f} ms, {statistics.mean(rebuilt):.1f} of {len(FIGURE_NAMES)} figures rebuilt per edit on average; "
+          f"edit + Run Analysis p50 {statistics.median(full_ms):.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Cross-session scenario cache: "Run Analysis" latency on a cache miss vs. a hit, and the hit rate.
+
+    python benchmarks/bench_memo.py --users 12 --variants 2
+
+Each user is a fresh `AppTest` session served by this process. It picks a year
+and either the defaults or one of `--variants` small TCO edits, then clicks
+"Run Analysis". The first session to run a scenario renders it and caches it;
+later sessions with the same inputs render from the cache.
+
+The cache is bounded by `_estimated_bytes`, so the run also rebuilds each cached
+figure under `tracemalloc`. It fails if the estimate covers less than half of the
+measured memory, because a byte limit that undercounts does not bound anything.
+"""
+import argparse
+import logging
+import statistics
+import sys
+import time
+import timeit
+import tracemalloc
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from fleet_data import ANALYSIS_LIFESPAN_YEARS, ROUTE_KEYS, YEAR_OPTIONS
+from fleet_live import RESULT_CACHE, LiveResults, _estimated_bytes, _is_figure, scenario_key
+from fleet_state import FleetState
+
+
+def key_and_copy_costs():
+    fleet_state = FleetState.defaults(YEAR_OPTIONS[0]); live = LiveResults(fleet_state)
+    inputs = {field: getattr(fleet_state, field) for field in FleetState.FIELDS}
+    key_us = min(timeit.repeat(lambda: scenario_key(fleet_state.year, inputs, 5.0, ANALYSIS_LIFESPAN_YEARS), number=5000, repeat=3)) / 5000 * 1e6
+    copy_us = min(timeit.repeat(live.copy, number=2000, repeat=3)) / 2000 * 1e6
+    return key_us, copy_us
+
+
+def figure_bytes(cached):
+    """(measured, estimated) bytes of the figures in the cached `LiveResults`; each figure is rebuilt under tracemalloc."""
+    import plotly.graph_objects as go
+    figures = [item for value in cached.figures.values() for item in (value if isinstance(value, tuple) else (value,)) if _is_figure(item)]
+    measured = 0
+    for figure in figures:
+        tracemalloc.start()
+        try: copy = go.Figure(figure); measured += tracemalloc.get_traced_memory()[0]
+        finally: tracemalloc.stop()
+        del copy
+    return measured, sum(_estimated_bytes(figure) for figure in figures)
+
+
+def run_sessions(users, variants):
+    from streamlit.testing.v1 import AppTest
+    timings = {False: [], True: []}
+    for user_idx in range(users):
+        session = AppTest.from_file(str(REPO_ROOT / "Petrobras_Outputs.py"), default_timeout=120).run()
+        year = YEAR_OPTIONS[user_idx % len(YEAR_OPTIONS)]
+        if year != YEAR_OPTIONS[0]: session.selectbox(key="selected_year").set_value(year).run()
+        variant = (user_idx // len(YEAR_OPTIONS)) % (variants + 1)
+        if variant:
+            widget = session.number_input(key=f"tco_{ROUTE_KEYS[variant % len(ROUTE_KEYS)]}"); widget.set_value(round(widget.value + variant, 5)).run()
+        start = time.perf_counter()
+        next(button for button in session.button if button.label == "Run Analysis").click().run()
+        elapsed = time.perf_counter() - start
+        if session.exception: raise RuntimeError(session.exception[0].value)
+        timings[bool(session.session_state["results_from_cache"])].append(elapsed * 1000)
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=12)
+    parser.add_argument("--variants", type=int, default=1, help="Distinct TCO edits per year besides the defaults.")
+    args = parser.parse_args(argv)
+    logging.disable(logging.CRITICAL)
+    key_us, copy_us = key_and_copy_costs()
+    print(f"scenario_key {key_us:.1f} us, LiveResults.copy {copy_us:.1f} us")
+    timings = run_sessions(args.users, args.variants)
+    for hit, label in ((False, "miss (computed)"), (True, "hit (from cache)")):
+        if timings[hit]: print(f"{label}: {len(timings[hit])} runs, p50 {statistics.median(timings[hit]):.0f} ms")
+    stats = RESULT_CACHE.stats()
+    print(f"cache: {stats['entries']} scenarios, {stats['bytes'] / 2**20:.2f} MiB, {stats['hits']} hits / {stats['misses']} misses, {stats['evictions']} evictions")
+    measured, estimated = figure_bytes(RESULT_CACHE.peek(next(iter(RESULT_CACHE._entries))))
+    print(f"figures of one cached scenario: {measured / 2**10:,.0f} KiB measured, {estimated / 2**10:,.0f} KiB estimated by the cache's sizer")
+    if estimated < 0.5 * measured: sys.exit("the cache's sizer counts less than half of the figures' memory; its byte limit does not bound the cache")
+
+
+if __name__ == "__main__":
+    main()
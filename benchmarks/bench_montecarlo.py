@@ -0,0 +1,59 @@
+"""Monte Carlo sampling throughput and peak memory per year and sample count, with chunked evaluation.
+
+    python benchmarks/bench_montecarlo.py --samples 100000 1000000
+
+Each run draws correlated multipliers for fuel cost, charter factors, revenue and
+GHG around the year's default scenario and summarises fleet cost, GHG, NPV and
+P(beating the benchmark). Peak memory is the `tracemalloc` peak during the run;
+NumPy reports its buffers there. Because each run folds samples into fixed-size
+histograms chunk by chunk, peak memory must not grow with the sample count. The
+run fails if the largest count peaks above `--memory-growth` times the smallest.
+As a sampling check, the mean fuel cost, which is linear in mean-1 multipliers,
+must match the scenario value within four standard errors.
+"""
+import argparse
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+
+from fleet_data import YEAR_OPTIONS
+from fleet_engine import Scenario
+from fleet_montecarlo import DEFAULT_INPUT_CORRELATIONS, DEFAULT_ROUTE_CORRELATION, MONTE_CARLO_CHUNK_SIZE, simulate
+
+
+def measured_run(scenario, samples, chunk_size):
+    """(MonteCarloResult, tracemalloc peak bytes)."""
+    tracemalloc.start()
+    try: result = simulate(scenario, route_correlation=DEFAULT_ROUTE_CORRELATION, input_correlations=DEFAULT_INPUT_CORRELATIONS, samples=samples, chunk_size=chunk_size)
+    finally: _, peak = tracemalloc.get_traced_memory(); tracemalloc.stop()
+    return result, peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--chunk-size", type=int, default=MONTE_CARLO_CHUNK_SIZE)
+    parser.add_argument("--memory-growth", type=float, default=1.25, help="allowed peak-memory ratio, largest vs. smallest sample count")
+    args = parser.parse_args(argv)
+    samples = sorted(args.samples)
+    print(f"{'year':>6} {'samples':>10} {'inputs':>7} {'seconds':>8} {'samples/s':>11} {'peak MiB':>9} {'cost P5-P95 (M USD)':>22} {'P(GHG beats)':>13}")
+    failures = []
+    for year in YEAR_OPTIONS:
+        scenario = Scenario.from_defaults(year)
+        simulate(scenario, samples=args.chunk_size, chunk_size=args.chunk_size)  # warm-up
+        peaks = []
+        for n_samples in samples:
+            result, peak = measured_run(scenario, n_samples, args.chunk_size); peaks.append(peak)
+            cost_p5, cost_p95 = result.percentile("total_cost", [5, 95])
+            print(f"{year:>6} {n_samples:>10,} {len(result.variables):>7} {result.seconds:>8.3f} {result.samples_per_second:>11,.0f} {peak / 2**20:>9.1f} {f'{cost_p5:,.0f} - {cost_p95:,.0f}':>22} {result.beat_benchmark['total_ghg']:>13.1%}")
+            if abs(result.mean["total_fuel"] - result.base["total_fuel"]) > 4 * result.std["total_fuel"] / np.sqrt(n_samples): failures.append(f"{year} {n_samples:,}: mean fuel cost off the scenario value")
+        if peaks[-1] > args.memory_growth * peaks[0]: failures.append(f"{year}: peak memory grew from {peaks[0] / 2**20:.1f} to {peaks[-1] / 2**20:.1f} MiB with the sample count")
+    if failures: sys.exit("\n".join(failures))
+
+
+if __name__ == "__main__":
+    main()
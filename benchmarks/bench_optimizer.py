@@ -0,0 +1,75 @@
+"""Fleet composition optimizer: solve time and candidate fleets evaluated per year and constraint.
+
+    python benchmarks/bench_optimizer.py --budget 2.0
+
+`--premium` puts a cost premium on lower-carbon categories so several categories
+stay on each route's frontier (the harder case for the search).
+
+Before timing, the GFI model is checked for every year. Among random fleets with
+the default owned count per route, fleet GFI must rise with fleet GHG. A fleet
+that owns only Diesel Ships must exceed the GFI credit limit, and the
+optimizer's fleet under that limit must meet it.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+
+from fleet_data import YEAR_OPTIONS
+from fleet_optimizer import CompositionProblem, gfi_zone_limit, optimize_composition
+from fleet_pathway import PATHWAY_CATEGORIES
+
+# Illustrative premiums for the harder case; the reference data has no cost split by category.
+LOW_CARBON_PREMIUM = {cat: 0.05 * (idx + 1) for idx, cat in enumerate(cat for cat in PATHWAY_CATEGORIES if cat != "Diesel Ships")}
+
+
+def cases(year, unconstrained):
+    return [("none", {}), ("GHG cap 70%", {"ghg_cap": 0.7 * unconstrained.total_ghg}), ("GFI <= DC", {"gfi_limit": gfi_zone_limit(year, "dc")}),
+            ("GFI <= 70%", {"gfi_limit": 0.7 * unconstrained.fleet_gfi}), ("CII <= B", {"max_cii_rating": "B"}),
+            ("GHG cap 50% + CII <= C", {"ghg_cap": 0.5 * unconstrained.total_ghg, "max_cii_rating": "C"})]
+
+
+def gfi_model_failures(year, n_fleets=200, seed=0):
+    """Failed GFI model checks for `year` (empty when it behaves)."""
+    problem = CompositionProblem.for_year(year)
+    route_owned = problem.demand - problem.charter_max
+    rng = np.random.default_rng(seed)
+    fleets = [np.stack([rng.multinomial(count, rng.dirichlet(np.ones(len(PATHWAY_CATEGORIES)))) for count in route_owned]) for _ in range(n_fleets)]
+    ghg = np.array([(fleet * problem.ghg_per_vessel).sum() for fleet in fleets])
+    gfi = np.array([problem.fleet_gfi(fleet) for fleet in fleets])
+    failures = []
+    if np.any(np.diff(gfi[np.argsort(ghg)]) < -1e-9): failures.append(f"{year}: fleet GFI does not rise with fleet GHG at a fixed fleet size")
+    diesel = np.zeros_like(problem.ghg_per_vessel, dtype=np.int64); diesel[:, PATHWAY_CATEGORIES.index("Diesel Ships")] = problem.demand
+    credit_limit = gfi_zone_limit(year, "credit")
+    if problem.fleet_gfi(diesel) <= credit_limit: failures.append(f"{year}: a diesel-only fleet (GFI {problem.fleet_gfi(diesel):.2f}) meets the credit limit {credit_limit:.2f}")
+    result = optimize_composition(problem, gfi_limit=credit_limit)
+    if result.feasible and result.fleet_gfi > credit_limit + 1e-9: failures.append(f"{year}: optimizer returned GFI {result.fleet_gfi:.2f} above the credit limit {credit_limit:.2f}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget", type=float, default=2.0, help="fail if any solve takes longer (seconds)")
+    parser.add_argument("--premium", action="store_true")
+    args = parser.parse_args(argv)
+    failures = [failure for year in YEAR_OPTIONS for failure in gfi_model_failures(year)]
+    if failures: sys.exit("GFI model checks failed:\n  " + "\n  ".join(failures))
+    slowest = 0.0
+    print(f"{'year':>6} {'constraint':<24} {'feasible':>8} {'cost (M USD)':>13} {'GHG':>8} {'GFI':>7} {'candidates':>11} {'ms':>8}")
+    for year in YEAR_OPTIONS:
+        problem = CompositionProblem.for_year(year, category_cost_premium=LOW_CARBON_PREMIUM if args.premium else None)
+        unconstrained = optimize_composition(problem)
+        for name, constraints in cases(year, unconstrained):
+            result = optimize_composition(problem, **constraints)
+            slowest = max(slowest, result.solve_seconds)
+            print(f"{year:>6} {name:<24} {str(result.feasible):>8} {result.total_cost:>13,.2f} {result.total_ghg:>8.3f} {result.fleet_gfi:>7.2f} "
+                  f"{result.candidates_evaluated:>11,} {result.solve_seconds * 1000:>8.1f}")
+    print(f"slowest solve {slowest * 1000:.1f} ms (budget {args.budget * 1000:.0f} ms)")
+    if slowest > args.budget: sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
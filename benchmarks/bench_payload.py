@@ -0,0 +1,88 @@
+"""Chart payloads: serialized size, trace/point counts and per-rerun marshalling time, classic vs. compact CII/GFI charts.
+
+    python benchmarks/bench_payload.py --reruns 10
+
+Figures: the CII section as five per-type figures vs. one subplot figure, the GFI
+chart with and without its constant traces, and a route bar chart built from the
+whole route table vs. only its plotted columns. "Serialized" is what
+`st.plotly_chart` sends: `plotly.io.to_json` after Streamlit's figure validation.
+That work reruns for every chart on every rerun, so its time is reported too.
+
+App: a headless `AppTest` session with results shown, once per mode. It reports
+the total bytes of every Plotly spec on the page and the profiler's p50 for the
+CII and GFI sections. There is no browser here, so browser render time is not
+measured; the trace and point counts are what the browser has to lay out and draw.
+"""
+import argparse
+import logging
+import sys
+import timeit
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+import numpy as np
+import plotly.express as px
+import plotly.io as pio
+import plotly.tools
+
+from fleet_data import CII_RATING_DATA_BY_TYPE, YEAR_OPTIONS
+from fleet_engine import evaluate_snapshot
+from fleet_figures import build_cii_band_figure, build_cii_overview_figure, build_gfi_zone_figure, build_gfi_zone_figure_compact
+from fleet_profiler import summarize
+from fleet_state import FleetState
+
+
+def marshal(fig):
+    """The spec `st.plotly_chart` sends for `fig`."""
+    return pio.to_json(plotly.tools.return_figure_from_figure_or_data(fig, validate_figure=True), validate=False)
+
+
+def payload(figures):
+    """(bytes, traces, points, marshalling ms) for a list of figures."""
+    marshal_ms = min(timeit.repeat(lambda: [marshal(fig) for fig in figures], number=10, repeat=3)) / 10 * 1000
+    points = sum(np.size(values) for fig in figures for trace in fig.data for values in (trace.x, trace.y) if values is not None)
+    return sum(len(marshal(fig)) for fig in figures), sum(len(fig.data) for fig in figures), points, marshal_ms
+
+
+def figure_cases(year):
+    df_routes = evaluate_snapshot(FleetState.defaults(year).to_scenario()).route_table()
+    return {
+        "CII section": ([build_cii_band_figure(vessel_type, year) for vessel_type in CII_RATING_DATA_BY_TYPE], [build_cii_overview_figure(year)]),
+        "GFI chart": ([build_gfi_zone_figure()], [build_gfi_zone_figure_compact()]),
+        "route bar chart": ([px.bar(df_routes, x='Route', y='TCO (M USD)', text_auto='.2f')], [px.bar(df_routes[['Route', 'TCO (M USD)']].astype({'TCO (M USD)': 'float32'}), x='Route', y='TCO (M USD)', text_auto='.2f')]),
+    }
+
+
+def app_payload(compact, reruns):
+    """(bytes of every Plotly spec on the page, {section: p50 ms}) for a session showing results."""
+    from streamlit.testing.v1 import AppTest
+    session = AppTest.from_file(str(REPO_ROOT / "Petrobras_Outputs.py"), default_timeout=120).run()
+    session.checkbox(key="compact_charts").set_value(compact).run()
+    next(button for button in session.button if button.label == "Run Analysis").click().run()
+    for _ in range(reruns): session.run()
+    if session.exception: raise RuntimeError(session.exception[0].value)
+    spec_bytes = sum(len(chart.proto.spec) for chart in session.get("plotly_chart"))
+    sections = summarize(list(session.session_state["rerun_profiles"])[-reruns:])
+    return spec_bytes, {name: sections[name]["p50_ms"] for name in ("cii", "gfi", "total")}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--year", type=int, choices=YEAR_OPTIONS, default=YEAR_OPTIONS[0])
+    parser.add_argument("--reruns", type=int, default=10)
+    args = parser.parse_args(argv)
+    logging.disable(logging.CRITICAL)
+    print(f"{'figures':<16} {'mode':<8} {'bytes':>8} {'traces':>7} {'points':>7} {'marshal ms':>11}")
+    for name, modes in figure_cases(args.year).items():
+        for mode, figures in zip(("classic", "compact"), modes):
+            size, traces, points, marshal_ms = payload(figures)
+            print(f"{name:<16} {mode:<8} {size:>8,} {traces:>7} {points:>7} {marshal_ms:>11.2f}")
+    for compact in (False, True):
+        spec_bytes, sections = app_payload(compact, args.reruns)
+        print(f"app ({'compact' if compact else 'classic'}): {spec_bytes:,} bytes of Plotly specs per rerun; p50 cii {sections['cii']:.1f} ms, gfi {sections['gfi']:.1f} ms, script {sections['total']:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Per-rerun script time with many users, plus the reference-table cost a rerun used to pay.
+
+    python benchmarks/bench_rerun.py --users 20 --reruns 10
+    python benchmarks/bench_rerun.py --script /tmp/old_Petrobras_Outputs.py   # compare another app version
+
+Users are independent `AppTest` sessions served by one process, like sessions on
+one Streamlit server. AppTest cannot run sessions in parallel threads, so their
+reruns are interleaved round-robin. Each rerun edits one sidebar number, which
+is the common keystroke path.
+"""
+import argparse
+import json
+import logging
+import statistics
+import sys
+import time
+import timeit
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from fleet_data import REFERENCE_TABLES_PATH, ROUTE_KEYS, build_reference_tables, load_reference_tables
+
+
+def reference_table_cost():
+    """(rebuild-every-rerun ms, cached-store ms) for the reference tables."""
+    raw = json.loads(REFERENCE_TABLES_PATH.read_text(encoding="utf-8"))
+    rebuild = min(timeit.repeat(lambda: build_reference_tables(raw), number=20, repeat=3)) / 20 * 1000
+    cached = min(timeit.repeat(load_reference_tables, number=10000, repeat=3)) / 10000 * 1000
+    return rebuild, cached
+
+
+def rerun_times(script, users, reruns):
+    from streamlit.testing.v1 import AppTest
+    sessions = [AppTest.from_file(str(script), default_timeout=120).run() for _ in range(users)]
+    times = []
+    for rerun_idx in range(reruns):
+        for user_idx, session in enumerate(sessions):
+            route_key = ROUTE_KEYS[(user_idx + rerun_idx) % len(ROUTE_KEYS)]
+            widget = session.number_input(key=f"tco_{route_key}")
+            start = time.perf_counter()
+            widget.set_value(round(widget.value + 0.01, 5)).run()
+            times.append(time.perf_counter() - start)
+            if session.exception: raise RuntimeError(session.exception[0].value)
+    return times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--script", type=Path, default=REPO_ROOT / "Petrobras_Outputs.py")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--reruns", type=int, default=10)
+    args = parser.parse_args(argv)
+    logging.disable(logging.CRITICAL)
+    rebuild_ms, cached_ms = reference_table_cost()
+    print(f"reference tables: rebuilt {rebuild_ms:.3f} ms/rerun vs cached store {cached_ms:.5f} ms/rerun")
+    times = sorted(rerun_times(args.script, args.users, args.reruns))
+    p95 = times[int(0.95 * (len(times) - 1))]
+    print(f"{args.script.name}: {len(times)} reruns over {args.users} users -- mean {statistics.mean(times) * 1000:.1f} ms, "
+          f"p50 {statistics.median(times) * 1000:.1f} ms, p95 {p95 * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""One-at-a-time sensitivity sweep per year: one batched evaluation vs. one snapshot evaluation per perturbed scenario.
+
+    python benchmarks/bench_sensitivity.py --change 10
+
+The loop baseline edits one input at a time and calls `evaluate_snapshot` once per
+scenario, as a user editing the sidebar and rerunning would. Its NPV comes from the
+same closed form. The tornado figure build is timed separately. Both sweeps must
+agree on every metric, and the whole sweep plus figure must finish within `--budget-ms`.
+"""
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+
+import fleet_engine
+from fleet_data import ANALYSIS_LIFESPAN_YEARS, YEAR_OPTIONS
+from fleet_engine import Scenario, evaluate_snapshot
+from fleet_finance import PROJECTED_ANNUAL_NET_CASH_FLOW, npv
+from fleet_sensitivity import one_at_a_time, tornado_figure
+
+
+def snapshot_metrics(scenario, rate_percent, factors=None):
+    """(TCO, GHG, charter cost, NPV) of one scenario through `evaluate_snapshot`, optionally with a patched charter factor matrix."""
+    original = fleet_engine.charter_factors_for_year
+    if factors is not None: fleet_engine.charter_factors_for_year = lambda year: factors
+    try: snapshot = evaluate_snapshot(scenario)
+    finally: fleet_engine.charter_factors_for_year = original
+    return (snapshot.total_tco, snapshot.total_ghg, snapshot.total_charter_cost,
+            float(npv(snapshot.total_tco * ANALYSIS_LIFESPAN_YEARS, PROJECTED_ANNUAL_NET_CASH_FLOW, rate_percent / 100.0, ANALYSIS_LIFESPAN_YEARS)))
+
+
+def loop_sweep(scenario, change_percent, rate_percent):
+    """The same perturbations as `one_at_a_time`, one scenario at a time; returns (low, high) arrays."""
+    base_factors = fleet_engine.charter_factors_for_year(scenario.year)
+    low, high = [], []
+    for field in ("charter", "tco", "ghg", "fuel"):
+        for route_idx in np.flatnonzero(getattr(scenario, field) != 0):
+            for bucket, sign in ((low, -1), (high, 1)):
+                edited = Scenario(scenario.year, scenario.owned, *(getattr(scenario, name).astype(float) for name in ("charter", "tco", "ghg", "fuel")))
+                getattr(edited, field)[route_idx] *= 1 + sign * change_percent / 100.0
+                bucket.append(snapshot_metrics(edited, rate_percent))
+    for route_idx, factor_idx in zip(*np.nonzero(~np.isnan(base_factors) & (base_factors != 0) & (scenario.charter[:, None] > 0))):
+        for bucket, sign in ((low, -1), (high, 1)):
+            factors = base_factors.copy(); factors[route_idx, factor_idx] *= 1 + sign * change_percent / 100.0
+            bucket.append(snapshot_metrics(scenario, rate_percent, factors))
+    for bucket, sign in ((low, -1), (high, 1)): bucket.append(snapshot_metrics(scenario, rate_percent * (1 + sign * change_percent / 100.0)))
+    return np.array(low), np.array(high)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--change", type=float, default=10.0)
+    parser.add_argument("--discount-rate", type=float, default=5.0)
+    parser.add_argument("--budget-ms", type=float, default=1000.0, help="limit for sweep + tornado figure")
+    args = parser.parse_args(argv)
+    print(f"{'year':>6} {'inputs':>7} {'scenarios':>10} {'batched ms':>11} {'loop ms':>9} {'speed-up':>9} {'figure ms':>10}")
+    over_budget = []
+    for year in YEAR_OPTIONS:
+        scenario = Scenario.from_defaults(year)
+        result = one_at_a_time(scenario, args.change, args.discount_rate)
+        low, high = loop_sweep(scenario, args.change, args.discount_rate)
+        if not (np.allclose(result.low, low) and np.allclose(result.high, high)): raise AssertionError(f"{year}: batched and loop sweeps disagree")
+        batched_ms = min(timeit.repeat(lambda: one_at_a_time(scenario, args.change, args.discount_rate), number=100, repeat=3)) / 100 * 1000
+        loop_ms = min(timeit.repeat(lambda: loop_sweep(scenario, args.change, args.discount_rate), number=5, repeat=3)) / 5 * 1000
+        figure_ms = min(timeit.repeat(lambda: tornado_figure(result), number=3, repeat=3)) / 3 * 1000
+        print(f"{year:>6} {len(result.inputs):>7} {result.scenarios:>10} {batched_ms:>11.3f} {loop_ms:>9.2f} {loop_ms / batched_ms:>8.0f}x {figure_ms:>10.1f}")
+        if batched_ms + figure_ms > args.budget_ms: over_budget.append(year)
+    if over_budget: sys.exit(f"sweep + figure over {args.budget_ms:.0f} ms for {over_budget}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Load test: N concurrent dashboard sessions running mixed scenarios; per-session memory, rerun latency and throughput.
+
+    python benchmarks/bench_sessions.py --sessions 40 --actions 8
+
+Each session is a headless `AppTest` served by this process, sharing its
+module-level data and caches as sessions on one Streamlit server do. All
+sessions stay open until the end. Their reruns are interleaved round-robin:
+`AppTest` swaps a process-global runtime on every run, so it cannot run sessions
+from several threads, and CPU-bound reruns would take turns on the GIL anyway.
+A session picks a year, clicks "Run Analysis" and then performs `--actions`
+random actions. Most actions edit a TCO, charter, GHG, fuel or owned-count
+widget. Some change the discount rate, some are plain reruns, and some reset to
+the year's defaults (which other sessions share). Reported:
+
+- action latency p50/p95 (an action is one or two reruns) and actions per second;
+- process RSS growth per session (this includes the `AppTest` element tree each
+  session keeps, which stands in for the browser-side copy);
+- each session's own state bytes as the app measures them (`session_bytes`),
+  checked against `SESSION_MEMORY_BUDGET_BYTES`; the run fails if any session
+  is over budget;
+- the size of the shared scenario cache.
+"""
+import argparse
+import gc
+import logging
+import os
+import random
+import resource
+import statistics
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from fleet_data import YEAR_OPTIONS
+from fleet_live import RESULT_CACHE, SESSION_MEMORY_BUDGET_BYTES
+from fleet_state import OWNED_WIDGET_KEYS_BY_YEAR, ROUTE_WIDGET_KEYS
+
+
+def rss_bytes():
+    """Current resident set size (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as statm: return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+def click(session, label):
+    next(button for button in session.button if button.label == label).click().run()
+
+
+def session_actions(session_idx, actions, seed, timings):
+    """Drive one session, yielding after each action (its latency goes to `timings`); finally yields (AppTest, session bytes after the last rerun)."""
+    from streamlit.testing.v1 import AppTest
+    rng = random.Random(seed * 7919 + session_idx)
+    year = YEAR_OPTIONS[session_idx % len(YEAR_OPTIONS)]
+    session = AppTest.from_file(str(REPO_ROOT / "Petrobras_Outputs.py"), default_timeout=300).run()
+    if year != YEAR_OPTIONS[0]: session.selectbox(key="selected_year").set_value(year).run()
+    start = time.perf_counter(); click(session, "Run Analysis"); timings.append((time.perf_counter() - start) * 1000)
+    yield
+    route_keys = [key for keys in ROUTE_WIDGET_KEYS.values() for key in keys] + [keys[0] for keys in OWNED_WIDGET_KEYS_BY_YEAR[year]]
+    for _ in range(actions):
+        roll = rng.random(); start = time.perf_counter()
+        if roll < 0.65:
+            widget = session.number_input(key=rng.choice(route_keys)); step = 1 if isinstance(widget.value, int) else 0.5
+            widget.set_value(widget.value + step * rng.randint(1, 3)).run()
+        elif roll < 0.8: widget = session.number_input(key="discount_rate_percent"); widget.set_value(rng.choice([3.0, 5.0, 7.5, 10.0])).run()
+        elif roll < 0.9: session.run()
+        else: click(session, f"Reset ALL Inputs to {year} Defaults"); click(session, "Run Analysis")
+        timings.append((time.perf_counter() - start) * 1000)
+        if session.exception: raise RuntimeError(session.exception[0].value)
+        yield
+    yield session, session.session_state["rerun_profiles"][-1]["session_bytes"]
+
+
+def run_sessions(sessions, actions, seed):
+    """Open `sessions` sessions and interleave their actions; returns ([(AppTest, session bytes)], [action ms])."""
+    timings = []
+    drivers = [session_actions(session_idx, actions, seed, timings) for session_idx in range(sessions)]
+    for _ in range(actions + 1):
+        for driver in drivers: next(driver)
+    return [next(driver) for driver in drivers], timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=40)
+    parser.add_argument("--actions", type=int, default=8, help="actions per session after Run Analysis")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    logging.disable(logging.CRITICAL)
+    run_sessions(1, 1, args.seed); RESULT_CACHE.clear(); gc.collect()  # imports, widget registry and first-build caches
+    rss_before = rss_bytes()
+    start = time.perf_counter()
+    outcomes, timings = run_sessions(args.sessions, args.actions, args.seed)
+    elapsed = time.perf_counter() - start
+    gc.collect(); rss_growth = rss_bytes() - rss_before
+    timings.sort(); state_bytes = [state for _, state in outcomes]; cache = RESULT_CACHE.stats()
+    print(f"{args.sessions} concurrent sessions x {args.actions + 1} actions in {elapsed:.1f} s: {len(timings) / elapsed:.1f} actions/s")
+    print(f"action latency p50 {statistics.median(timings):.0f} ms, p95 {timings[int(0.95 * (len(timings) - 1))]:.0f} ms")
+    print(f"RSS +{rss_growth / 2**20:.1f} MiB: {rss_growth / args.sessions / 2**20:.2f} MiB per session with AppTest trees included, "
+          f"{max(rss_growth - cache['bytes'], 0) / args.sessions / 2**20:.2f} MiB per session net of the shared cache")
+    print(f"session state p50 {statistics.median(state_bytes) / 2**10:.0f} KiB, max {max(state_bytes) / 2**10:.0f} KiB (budget {SESSION_MEMORY_BUDGET_BYTES / 2**10:.0f} KiB)")
+    print(f"shared scenario cache: {cache['entries']} scenarios, {cache['bytes'] / 2**20:.1f} of {cache['max_bytes'] / 2**20:.0f} MiB, {cache['evictions']} evictions, hit rate {cache['hit_rate']:.0%}")
+    if max(state_bytes) > SESSION_MEMORY_BUDGET_BYTES: sys.exit(f"{sum(state > SESSION_MEMORY_BUDGET_BYTES for state in state_bytes)} session(s) over the per-user memory budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Scenario store: batched vs. one-by-one writes, bulk load time for 10k stored scenarios, and indexed queries.
+
+    python benchmarks/bench_store.py --scenarios 10000
+
+Random fleet mixes for every dashboard year (`random_batch`) are evaluated with
+`evaluate_snapshot` and written to a fresh store in a temporary folder:
+- once as one `save_many` batch;
+- a sample of `--single` scenarios with one transaction each, as separate Save
+  clicks would write them.
+
+Reported loads:
+- every stored scenario: totals, inputs and route tables, decoded into arrays;
+- the `--limit` lowest-GHG scenarios of one year;
+- a route filter.
+The load is compared with recomputing the same scenarios. Each indexed query must
+use an index (`EXPLAIN QUERY PLAN`), the loaded route tables must equal the saved
+ones, and the full load must finish within `--budget-ms`.
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+
+from fleet_data import YEAR_OPTIONS
+from fleet_engine import Scenario, evaluate_snapshot
+from fleet_store import ScenarioRecord, ScenarioStore
+from scenario_sweep import random_batch
+
+
+def random_records(n_scenarios, seed):
+    """(records, seconds to evaluate them) spread evenly over the dashboard years."""
+    records, seconds = [], 0.0
+    for year_idx, year in enumerate(YEAR_OPTIONS):
+        batch = random_batch(year, n_scenarios // len(YEAR_OPTIONS) + (year_idx < n_scenarios % len(YEAR_OPTIONS)), seed=seed + year_idx)
+        start = time.perf_counter()
+        for idx in range(len(batch)):
+            scenario = Scenario(year, batch.owned[idx], batch.charter[idx], batch.tco[idx], batch.ghg[idx], batch.fuel[idx])
+            records.append(ScenarioRecord.from_snapshot(scenario, evaluate_snapshot(scenario), name=f"random {year} #{idx}"))
+        seconds += time.perf_counter() - start
+    return records, seconds
+
+
+def query_plan(store, sql, params=()):
+    with store._connect() as conn: return " | ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+
+
+def timed(function, repeat=3):
+    """(result, best seconds)."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter(); result = function(); best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", type=int, default=10_000)
+    parser.add_argument("--single", type=int, default=200, help="scenarios written one transaction each")
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--budget-ms", type=float, default=2000.0, help="limit for loading every stored scenario")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    records, evaluate_seconds = random_records(args.scenarios, args.seed)
+    with tempfile.TemporaryDirectory() as folder:
+        store = ScenarioStore(Path(folder) / "batched.sqlite")
+        start = time.perf_counter(); store.save_many(records); batched_seconds = time.perf_counter() - start
+        single_store = ScenarioStore(Path(folder) / "single.sqlite")
+        start = time.perf_counter()
+        for record in records[:args.single]: single_store.save(record)
+        single_seconds = (time.perf_counter() - start) / args.single * len(records)
+        file_mib = sum(path.stat().st_size for path in Path(folder).glob("batched.sqlite*")) / 2**20
+        print(f"write {len(records):,} scenarios: batched {batched_seconds:.2f} s ({len(records) / batched_seconds:,.0f}/s), "
+              f"one transaction each ~{single_seconds:.1f} s (from {args.single}); store {file_mib:.1f} MiB")
+
+        stored, load_seconds = timed(lambda: store.load())
+        print(f"load all {len(stored):,} scenarios (totals, inputs, route tables): {load_seconds * 1000:.0f} ms vs. {evaluate_seconds * 1000:.0f} ms to re-evaluate them with evaluate_snapshot")
+        saved = {record.key: record.routes for record in records}
+        if not all(np.allclose(routes, saved[key]) for key, routes in zip(stored.frame["scenario_key"], stored.routes)): raise AssertionError("loaded route tables differ from the saved ones")
+        year = YEAR_OPTIONS[0]
+        best, best_seconds = timed(lambda: store.load([year], order_by="total_ghg", descending=False, limit=args.limit))
+        print(f"{len(best)} lowest-GHG scenarios of {year}: {best_seconds * 1000:.1f} ms")
+        threshold = float(np.median(stored.routes[:, 0, 4]))
+        filtered, filter_seconds = timed(lambda: store.load(route_ranges={("vlcc_china", "ghg"): (None, threshold)}, limit=args.limit))
+        print(f"{len(filtered)} scenarios with VLCC China GHG <= {threshold:.3f}: {filter_seconds * 1000:.1f} ms")
+        plans = {
+            "year + metric order": query_plan(store, "SELECT id FROM scenarios WHERE year IN (?) ORDER BY total_ghg ASC, id LIMIT ?", (year, args.limit)),
+            "route filter": query_plan(store, "SELECT scenario_id FROM scenario_routes r WHERE r.route_idx = ? AND r.ghg <= ?", (0, threshold)),
+        }
+        for name, plan in plans.items(): print(f"  plan ({name}): {plan}")
+        if not all("USING" in plan and "INDEX" in plan for plan in plans.values()): sys.exit("an indexed query does not use its index")
+    if load_seconds * 1000 > args.budget_ms: sys.exit(f"loading {len(stored):,} scenarios took {load_seconds * 1000:.0f} ms (budget {args.budget_ms:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
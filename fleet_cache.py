@@ -0,0 +1,81 @@
+"""Process-wide LRU cache shared by every Streamlit session served from this process.
+
+Streamlit re-executes the app script on each rerun, but imported modules stay in
+`sys.modules`, so a module-level `LRUCache` outlives reruns and sessions.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache with hit/miss/build-time statistics.
+
+    Bounded by `max_entries` and, when a `sizer(value) -> bytes` is given, by `max_bytes` in total.
+    """
+
+    def __init__(self, max_entries=128, max_bytes=None, sizer=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizer = sizer
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.build_seconds = 0.0
+        self.bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get_or_build(self, key, builder):
+        """Return the cached value for `key`, calling `builder()` and storing its result on a miss."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key); self.hits += 1
+                return self._entries[key]
+        start = time.perf_counter()
+        value = builder()
+        elapsed = time.perf_counter() - start
+        size = self.sizer(value) if self.sizer else 0
+        with self._lock:
+            self.misses += 1; self.build_seconds += elapsed
+            self._store(key, value, size)
+        return value
+
+    def get(self, key, default=None):
+        """The cached value for `key` (counted as a hit), or `default` (counted as a miss)."""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key); self.hits += 1
+            return self._entries[key]
+
+    def peek(self, key, default=None):
+        """The cached value for `key` without touching recency or statistics."""
+        with self._lock: return self._entries.get(key, default)
+
+    def put(self, key, value):
+        """Store `value` under `key` as the most recently used entry."""
+        size = self.sizer(value) if self.sizer else 0
+        with self._lock: self._store(key, value, size)
+
+    def _store(self, key, value, size):
+        self.bytes += size - self._sizes.get(key, 0)
+        self._entries[key] = value; self._sizes[key] = size; self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries or (self.max_bytes is not None and self.bytes > self.max_bytes and len(self._entries) > 1):
+            evicted, _ = self._entries.popitem(last=False); self.bytes -= self._sizes.pop(evicted); self.evictions += 1
+
+    def clear(self):
+        with self._lock: self._entries.clear(); self._sizes.clear(); self.bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"entries": len(self._entries), "max_entries": self.max_entries, "bytes": self.bytes, "max_bytes": self.max_bytes, "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "hit_rate": self.hits / lookups if lookups else 0.0, "build_seconds": self.build_seconds}
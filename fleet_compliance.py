@@ -0,0 +1,90 @@
+"""CII A-E ratings and GFI compliance zones for large sets of vessel-year records.
+
+`CII_RATING_DATA_BY_TYPE` and `GFI_COMPLIANCE_ZONES_DF` are held as sorted
+threshold arrays: (vessel types, years, 4) and (years, 3). Each record's
+threshold row is shifted by its own offset, so every row sits in one sorted
+array. A single `np.searchsorted` call then classifies all records by binary
+search, with no Python loop over records.
+"""
+import numpy as np
+import pandas as pd
+
+from fleet_data import CII_RATING_DATA_BY_TYPE, CII_YEARS_DATA, GFI_COMPLIANCE_ZONES_DF, ROUTE_CII_VESSEL_TYPES, ROUTE_KEYS
+from fleet_engine import ROUTE_DISPLAY_NAMES
+
+CII_RATING_LABELS = ("A", "B", "C", "D", "E")
+CII_UNRATED = -1
+GFI_ZONE_LABELS = {0: "n/a", 1: "Zone 1 (> GFI Base)", 2: "Zone 2 (GFI Base - DC)", 3: "Zone 3 (GFI DC - Credit Limit)", 4: "Zone 4 (< GFI Credit Limit)"}
+GFI_UNZONED = 0
+
+# --- Threshold arrays ---
+CII_VESSEL_TYPES = tuple(CII_RATING_DATA_BY_TYPE)
+CII_VESSEL_TYPE_INDEX = {vessel_type: idx for idx, vessel_type in enumerate(CII_VESSEL_TYPES)}
+# CII_RATING_DATA_BY_TYPE index of each route's vessel type, in ROUTE_KEYS order.
+ROUTE_CII_TYPE_INDEX = np.array([CII_VESSEL_TYPE_INDEX[ROUTE_CII_VESSEL_TYPES[route_key]] for route_key in ROUTE_KEYS])
+CII_THRESHOLD_YEARS = np.array(CII_YEARS_DATA)
+# (types, years, 4) Superior < Lower < Upper < Inferior
+CII_THRESHOLDS = np.stack([CII_RATING_DATA_BY_TYPE[vessel_type][["Superior", "Lower", "Upper", "Inferior"]].to_numpy(dtype=float) for vessel_type in CII_VESSEL_TYPES])
+GFI_THRESHOLD_YEARS = GFI_COMPLIANCE_ZONES_DF["Year"].to_numpy()
+# (years, 3) ascending: Credit limit < DC < Base
+GFI_THRESHOLDS = GFI_COMPLIANCE_ZONES_DF[["GFI_Credit_Upper_Limit", "GFI DC", "GFI Base"]].to_numpy(dtype=float)
+
+
+class _RowSearch:
+    """Binary search of each value within its own sorted row of a (rows, k) threshold table."""
+
+    def __init__(self, rows):
+        self.width = rows.shape[1]
+        self.low, self.high = float(rows.min()) - 1.0, float(rows.max()) + 1.0
+        self.span = self.high - self.low + 1.0
+        self.flat = (rows + (np.arange(len(rows)) * self.span)[:, None]).ravel()
+
+    def count_below(self, row, values, side):
+        """Thresholds of `row` below `values` (`side` as in `np.searchsorted`)."""
+        shift = row * self.span
+        return np.searchsorted(self.flat, np.clip(values, self.low, self.high) + shift, side=side) - row * self.width
+
+
+_CII_SEARCH = _RowSearch(CII_THRESHOLDS.reshape(-1, 4))
+_GFI_SEARCH = _RowSearch(GFI_THRESHOLDS)
+
+
+def _year_rows(table_years, years):
+    """Row of each year in `table_years` (sorted) and whether the year is present."""
+    pos = np.clip(np.searchsorted(table_years, years), 0, len(table_years) - 1)
+    return pos, table_years[pos] == years
+
+
+def vessel_type_indices(vessel_types):
+    """Map vessel type names to `CII_VESSEL_TYPES` indices (unknown names raise KeyError)."""
+    names, inverse = np.unique(np.asarray(vessel_types), return_inverse=True)
+    return np.array([CII_VESSEL_TYPE_INDEX[name] for name in names.tolist()])[inverse].reshape(np.shape(vessel_types))
+
+
+def rate_cii(type_idx, years, attained):
+    """CII rating index (0-4 for A-E) per record; `CII_UNRATED` for NaN values or years without bands. Inputs broadcast."""
+    type_idx, years, attained = np.broadcast_arrays(np.asarray(type_idx), np.asarray(years), np.asarray(attained, dtype=float))
+    year_row, has_year = _year_rows(CII_THRESHOLD_YEARS, years)
+    rating = _CII_SEARCH.count_below(type_idx * len(CII_THRESHOLD_YEARS) + year_row, attained, side="right")
+    return np.where(has_year & ~np.isnan(attained), rating, CII_UNRATED).astype(np.int8)
+
+
+def gfi_zone(years, gfi):
+    """GFI zone (1-4) per record; `GFI_UNZONED` for NaN values or years without zones. Inputs broadcast."""
+    years, gfi = np.broadcast_arrays(np.asarray(years), np.asarray(gfi, dtype=float))
+    year_row, has_year = _year_rows(GFI_THRESHOLD_YEARS, years)
+    zone = 4 - _GFI_SEARCH.count_below(year_row, gfi, side="left")
+    return np.where(has_year & ~np.isnan(gfi), zone, GFI_UNZONED).astype(np.int8)
+
+
+def cii_rating_counts(route_idx, ratings):
+    """Vessel count per route (rows) and rating A-E plus 'n/a' (columns)."""
+    n_columns = len(CII_RATING_LABELS) + 1
+    counts = np.bincount(np.asarray(route_idx) * n_columns + (np.asarray(ratings) - CII_UNRATED) % n_columns, minlength=len(ROUTE_KEYS) * n_columns)
+    counts = counts.reshape(len(ROUTE_KEYS), n_columns)
+    return pd.DataFrame(np.column_stack([counts[:, 1:], counts[:, :1]]), index=pd.Index(ROUTE_DISPLAY_NAMES, name="Route"), columns=list(CII_RATING_LABELS) + ["n/a"])
+
+
+def gfi_zone_counts(zones):
+    """Record count per GFI zone label."""
+    return pd.Series(np.bincount(np.asarray(zones), minlength=len(GFI_ZONE_LABELS)), index=list(GFI_ZONE_LABELS.values()), name="Records")
@@ -0,0 +1,110 @@
+"""Reference data for the tanker fleet dashboard (routes, fleet defaults, charter factors, CII/GFI bands).
+
+The tables live in the versioned data file `data/reference_tables.json`. They are
+loaded once per process by the cached `load_reference_tables()` into a read-only
+store: mappings are `MappingProxyType`, lists are tuples and the CII/GFI
+DataFrames sit on read-only arrays. Streamlit re-executes the app script on
+every rerun, but this module is imported only once, so every session shares the
+same objects. Kept free of Streamlit so the analysis engine can be imported
+headless.
+"""
+import json
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+
+REFERENCE_TABLES_PATH = Path(__file__).resolve().parent / "data" / "reference_tables.json"
+
+
+def category_key(ship_cat_display_name):
+    return ship_cat_display_name.lower().replace(' ', '_').replace('(','').replace(')','')
+
+
+def _freeze(value):
+    if isinstance(value, dict): return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list): return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _by_year(table):
+    return {int(year): value for year, value in table.items()}
+
+
+def _read_only_frame(columns):
+    arrays = {}
+    for name, values in columns.items():
+        arrays[name] = np.array(values); arrays[name].flags.writeable = False
+    return pd.DataFrame(arrays, copy=False)
+
+
+def build_reference_tables(raw):
+    """Materialise the parsed data file into the frozen store (uncached; use `load_reference_tables`)."""
+    if "version" not in raw: raise ValueError("reference tables have no 'version'")
+    cii = raw["cii_rating_bands_by_type"]; gfi = dict(raw["gfi_compliance_zones"])
+    route_revenues = _by_year(raw["route_revenues_by_year"])
+    benchmark_year = raw["benchmark_year"]
+    return _freeze({
+        "version": raw["version"],
+        "year_options": raw["year_options"], "benchmark_year": benchmark_year, "analysis_lifespan_years": raw["analysis_lifespan_years"],
+        "tanker_routes": raw["tanker_routes"],
+        "owned_ship_categories_by_year": _by_year(raw["owned_ship_categories_by_year"]),
+        "charter_factors_by_year": _by_year(raw["charter_factors_by_year"]),
+        "default_inputs_by_year": _by_year(raw["default_inputs_by_year"]),
+        "route_revenues_by_year": route_revenues,
+        "benchmark_2024": {**raw["benchmark_2024"], "total_revenue": sum(route_revenues[benchmark_year].values())},
+        "cii_years": cii["years"],
+        "cii_rating_data_by_type": {vessel_type: _read_only_frame({"Year": cii["years"], **bands}) for vessel_type, bands in cii["types"].items()},
+        "petrobras_cii_points": _by_year(raw["petrobras_cii_points"]),
+        "route_cii_vessel_types": raw["route_cii_vessel_types"],
+        "cii_point_label_categories": raw["cii_point_label_categories"],
+        "cii_chart_y_max": raw["cii_chart_y_max"],
+        "gfi_years": gfi["years"],
+        "gfi_compliance_zones_df": _read_only_frame({"Year": gfi.pop("years"), **gfi}),
+        "petrobras_fleet_gfi_points": _by_year(raw["petrobras_fleet_gfi_points"]),
+    })
+
+
+@lru_cache(maxsize=None)
+def load_reference_tables(path=REFERENCE_TABLES_PATH):
+    """Read and freeze the reference tables at `path`; later calls in the process return the same store."""
+    with open(path, encoding="utf-8") as handle: return build_reference_tables(json.load(handle))
+
+
+REFERENCE_TABLES = load_reference_tables()
+
+# --- Configuration ---
+DATA_VERSION = REFERENCE_TABLES["version"]
+YEAR_OPTIONS = REFERENCE_TABLES["year_options"]
+BENCHMARK_YEAR = REFERENCE_TABLES["benchmark_year"]
+ANALYSIS_LIFESPAN_YEARS = REFERENCE_TABLES["analysis_lifespan_years"]
+MILLION = 1_000_000
+
+TANKER_ROUTES = REFERENCE_TABLES["tanker_routes"]
+ROUTE_KEYS = tuple(TANKER_ROUTES.keys())
+OWNED_SHIP_CATEGORIES_BY_YEAR = REFERENCE_TABLES["owned_ship_categories_by_year"]
+def get_empty_owned_ships_dict_for_year(year):
+    categories = OWNED_SHIP_CATEGORIES_BY_YEAR.get(year, [])
+    return {category_key(cat): 0 for cat in categories}
+ALL_CHARTER_FACTORS = REFERENCE_TABLES["charter_factors_by_year"]
+ALL_YEAR_DEFAULT_INPUTS = REFERENCE_TABLES["default_inputs_by_year"]
+DEFAULT_INPUTS_2030, DEFAULT_INPUTS_2040, DEFAULT_INPUTS_2050 = (ALL_YEAR_DEFAULT_INPUTS[year] for year in (2030, 2040, 2050))
+FALLBACK_OWNED_SHIP_CATEGORIES = OWNED_SHIP_CATEGORIES_BY_YEAR[2030]
+EMPTY_ROUTE_DEFAULTS = _freeze({"owned_ships": {category_key(cat): 0 for cat in FALLBACK_OWNED_SHIP_CATEGORIES}, "charter": 0, "tco": 0.0, "ghg": 0.0, "total_fuel_cost_route": 0.0})
+ROUTE_REVENUES_BY_YEAR = REFERENCE_TABLES["route_revenues_by_year"]
+BENCHMARK_2024 = REFERENCE_TABLES["benchmark_2024"]
+BENCHMARK_2024_TOTAL_REVENUE = BENCHMARK_2024["total_revenue"]
+CII_YEARS_DATA = REFERENCE_TABLES["cii_years"]
+CII_RATING_DATA_BY_TYPE = REFERENCE_TABLES["cii_rating_data_by_type"]
+PETROBRAS_CII_POINTS = REFERENCE_TABLES["petrobras_cii_points"]
+# Route -> CII_RATING_DATA_BY_TYPE key, and PETROBRAS_CII_POINTS label -> owned ship categories it describes.
+ROUTE_CII_VESSEL_TYPES = REFERENCE_TABLES["route_cii_vessel_types"]
+CII_POINT_LABEL_CATEGORIES = REFERENCE_TABLES["cii_point_label_categories"]
+CII_CHART_Y_MAX = REFERENCE_TABLES["cii_chart_y_max"]
+
+# --- GFI Data ---
+GFI_YEARS_DATA = REFERENCE_TABLES["gfi_years"]
+GFI_COMPLIANCE_ZONES_DF = REFERENCE_TABLES["gfi_compliance_zones_df"]
+PETROBRAS_FLEET_GFI_POINTS = REFERENCE_TABLES["petrobras_fleet_gfi_points"]
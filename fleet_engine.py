@@ -0,0 +1,233 @@
+"""Headless snapshot engine for the tanker fleet dashboard.
+
+A scenario is held as NumPy arrays: owned counts as routes x categories plus
+per-route charter/TCO/GHG/fuel vectors. Route and fleet totals are computed with
+array operations, so the dashboard, batch jobs and tests share one code path and
+none of them need Streamlit.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from fleet_data import (
+    ALL_CHARTER_FACTORS, ALL_YEAR_DEFAULT_INPUTS, BENCHMARK_2024, BENCHMARK_YEAR, EMPTY_ROUTE_DEFAULTS,
+    OWNED_SHIP_CATEGORIES_BY_YEAR, ROUTE_KEYS, ROUTE_REVENUES_BY_YEAR, TANKER_ROUTES, category_key,
+)
+
+# --- Array views of the reference tables ---
+ROUTE_INDEX = {route_key: idx for idx, route_key in enumerate(ROUTE_KEYS)}
+ROUTE_DISPLAY_NAMES = [TANKER_ROUTES[route_key] for route_key in ROUTE_KEYS]
+CHARTER_FACTOR_YEARS = sorted(ALL_CHARTER_FACTORS)
+# (years, routes, 2) -- the two ALL_CHARTER_FACTORS entries per route; NaN where a route has none.
+CHARTER_FACTOR_MATRIX = np.array([[ALL_CHARTER_FACTORS[year].get(route_key, (np.nan, np.nan)) for route_key in ROUTE_KEYS] for year in CHARTER_FACTOR_YEARS], dtype=float)
+REVENUE_YEARS = sorted(ROUTE_REVENUES_BY_YEAR)
+# (years, routes) route revenues in M USD; 0 where a route has no revenue entry.
+REVENUE_MATRIX = np.array([[ROUTE_REVENUES_BY_YEAR[year].get(route_key, 0.0) for route_key in ROUTE_KEYS] for year in REVENUE_YEARS], dtype=float)
+# Fleet total -> matching BENCHMARK_2024 key, in the order the dashboard's benchmark charts use.
+BENCHMARK_TOTAL_KEYS = {"total_tco": "total_tco_fleet", "total_ghg": "total_ghg_fleet", "total_charter_cost": "total_charter_cost_fleet", "total_fuel": "total_fuel_cost_fleet", "total_revenue": "total_revenue"}
+ROUTE_TABLE_COLUMNS = ["Route", "Total Owned Ships", "Charter Vessels", "Revenue (M USD)", "TCO (M USD)", "GHG (M Tons CO2e)", "Charter Cost (M USD)", "Total Fuel Cost (M USD)"]
+
+
+def charter_factors_for_year(year):
+    """(routes, 2) charter factor matrix for `year`; all NaN if the year has no factors."""
+    if year in ALL_CHARTER_FACTORS: return CHARTER_FACTOR_MATRIX[CHARTER_FACTOR_YEARS.index(year)]
+    return np.full((len(ROUTE_KEYS), 2), np.nan)
+
+
+def route_revenues_for_year(year):
+    """(routes,) revenue vector for `year`; zeros if the year has no revenue table."""
+    if year in ROUTE_REVENUES_BY_YEAR: return REVENUE_MATRIX[REVENUE_YEARS.index(year)]
+    return np.zeros(len(ROUTE_KEYS))
+
+
+@dataclass
+class Scenario:
+    """One snapshot scenario: owned is (routes, categories), the rest are (routes,) vectors."""
+    year: int
+    owned: np.ndarray
+    charter: np.ndarray
+    tco: np.ndarray
+    ghg: np.ndarray
+    fuel: np.ndarray
+
+    @property
+    def categories(self):
+        return OWNED_SHIP_CATEGORIES_BY_YEAR.get(self.year, [])
+
+    @classmethod
+    def from_state(cls, state, year):
+        """Build from a mapping using the dashboard's widget keys (e.g. `st.session_state`)."""
+        cat_keys = [category_key(cat) for cat in OWNED_SHIP_CATEGORIES_BY_YEAR.get(year, [])]
+        owned = np.array([[state.get(f"owned_{route_key}_{cat_key}", 0) for cat_key in cat_keys] for route_key in ROUTE_KEYS], dtype=np.int64).reshape(len(ROUTE_KEYS), len(cat_keys))
+        charter = np.array([state[f"charter_{route_key}"] for route_key in ROUTE_KEYS], dtype=float)
+        tco = np.array([state[f"tco_{route_key}"] for route_key in ROUTE_KEYS], dtype=float)
+        ghg = np.array([state[f"ghg_{route_key}"] for route_key in ROUTE_KEYS], dtype=float)
+        fuel = np.array([state[f"fuel_cost_route_{route_key}"] for route_key in ROUTE_KEYS], dtype=float)
+        return cls(year, owned, charter, tco, ghg, fuel)
+
+    @classmethod
+    def from_defaults(cls, year):
+        """Build from `ALL_YEAR_DEFAULT_INPUTS` for `year` (empty routes fall back to zeros)."""
+        defaults_for_year = ALL_YEAR_DEFAULT_INPUTS.get(year, {})
+        cat_keys = [category_key(cat) for cat in OWNED_SHIP_CATEGORIES_BY_YEAR.get(year, [])]
+        route_inputs = [defaults_for_year.get(route_key, EMPTY_ROUTE_DEFAULTS) for route_key in ROUTE_KEYS]
+        owned = np.array([[route_data.get("owned_ships", {}).get(cat_key, 0) for cat_key in cat_keys] for route_data in route_inputs], dtype=np.int64).reshape(len(ROUTE_KEYS), len(cat_keys))
+        return cls(year, owned,
+                   np.array([route_data["charter"] for route_data in route_inputs], dtype=float),
+                   np.array([route_data["tco"] for route_data in route_inputs], dtype=float),
+                   np.array([route_data["ghg"] for route_data in route_inputs], dtype=float),
+                   np.array([route_data.get("total_fuel_cost_route", 0.0) for route_data in route_inputs], dtype=float))
+
+
+@dataclass
+class SnapshotResult:
+    """Route vectors and fleet totals for one evaluated scenario."""
+    year: int
+    route_owned: np.ndarray
+    owned_by_category: np.ndarray
+    charter: np.ndarray
+    revenue: np.ndarray
+    tco: np.ndarray
+    ghg: np.ndarray
+    charter_cost: np.ndarray
+    fuel: np.ndarray
+    missing_factor_routes: list
+
+    @property
+    def total_owned(self): return int(self.route_owned.sum())
+    @property
+    def total_tco(self): return float(self.tco.sum())
+    @property
+    def total_ghg(self): return float(self.ghg.sum())
+    @property
+    def total_charter_cost(self): return float(self.charter_cost.sum())
+    @property
+    def total_fuel(self): return float(self.fuel.sum())
+    @property
+    def total_revenue(self): return float(self.revenue.sum())
+
+    def route_table(self):
+        """Route-level summary with the dashboard's column names."""
+        return pd.DataFrame({
+            "Route": ROUTE_DISPLAY_NAMES, "Total Owned Ships": self.route_owned, "Charter Vessels": self.charter,
+            "Revenue (M USD)": self.revenue, "TCO (M USD)": self.tco, "GHG (M Tons CO2e)": self.ghg,
+            "Charter Cost (M USD)": self.charter_cost, "Total Fuel Cost (M USD)": self.fuel,
+        }, columns=ROUTE_TABLE_COLUMNS)
+
+    def fleet_totals(self):
+        """Fleet totals under the keys stored in `st.session_state.results`."""
+        return {
+            "total_tco_fleet": self.total_tco, "total_ghg_fleet": self.total_ghg,
+            "total_charter_cost_fleet": self.total_charter_cost,
+            "total_investment_fleet_snapshot": self.total_tco + self.total_charter_cost,
+            "calculated_total_owned_vessels_all_routes": self.total_owned,
+            "total_annual_fuel_expenditure_fleet_million": self.total_fuel,
+            "total_fleet_revenue_scenario": self.total_revenue,
+        }
+
+
+def route_charter_costs(charter, factors):
+    """Charter cost per route; `charter` is (..., routes), `factors` broadcasts against (..., routes, 2)."""
+    has_factors = ~np.isnan(factors).any(axis=-1)
+    return np.where(has_factors & (charter > 0), charter * factors[..., 0] * factors[..., 1], 0.0)
+
+
+def evaluate_snapshot(scenario):
+    """Compute route and fleet figures for `scenario` in whole-array operations."""
+    factors = charter_factors_for_year(scenario.year)
+    has_factors = ~np.isnan(factors).any(axis=1)
+    chartered = scenario.charter > 0
+    charter_cost = route_charter_costs(scenario.charter, factors)
+    missing = [ROUTE_KEYS[idx] for idx in np.flatnonzero(chartered & ~has_factors)]
+    return SnapshotResult(
+        year=scenario.year, route_owned=scenario.owned.sum(axis=1), owned_by_category=scenario.owned.sum(axis=0),
+        charter=scenario.charter, revenue=route_revenues_for_year(scenario.year), tco=scenario.tco, ghg=scenario.ghg,
+        charter_cost=charter_cost, fuel=scenario.fuel, missing_factor_routes=missing,
+    )
+
+
+# --- Batch evaluation (scenarios x routes x categories) ---
+@dataclass
+class ScenarioBatch:
+    """A stack of scenarios for one year: owned is (scenarios, routes, categories), the rest (scenarios, routes)."""
+    year: int
+    owned: np.ndarray
+    charter: np.ndarray
+    tco: np.ndarray
+    ghg: np.ndarray
+    fuel: np.ndarray
+
+    def __post_init__(self):
+        n_routes, n_cats = len(ROUTE_KEYS), len(OWNED_SHIP_CATEGORIES_BY_YEAR.get(self.year, []))
+        n_scenarios = len(self.owned)
+        if self.owned.shape != (n_scenarios, n_routes, n_cats):
+            raise ValueError(f"owned must be (scenarios, {n_routes}, {n_cats}) for {self.year}, got {self.owned.shape}")
+        for name in ("charter", "tco", "ghg", "fuel"):
+            if getattr(self, name).shape != (n_scenarios, n_routes):
+                raise ValueError(f"{name} must be ({n_scenarios}, {n_routes}), got {getattr(self, name).shape}")
+
+    def __len__(self):
+        return len(self.owned)
+
+    def __getitem__(self, index):
+        """Sub-batch for a slice or index array (used to split work across processes)."""
+        return ScenarioBatch(self.year, self.owned[index], self.charter[index], self.tco[index], self.ghg[index], self.fuel[index])
+
+    @classmethod
+    def stack(cls, scenarios):
+        """Stack single `Scenario` objects that share a year."""
+        years = {scenario.year for scenario in scenarios}
+        if len(years) != 1: raise ValueError(f"scenarios must share one year, got {sorted(years)}")
+        return cls(years.pop(), *(np.stack([getattr(scenario, name) for scenario in scenarios]) for name in ("owned", "charter", "tco", "ghg", "fuel")))
+
+
+@dataclass
+class BatchResult:
+    """Fleet totals per scenario, plus % change against `BENCHMARK_2024` as the benchmark charts show it."""
+    year: int
+    total_owned: np.ndarray
+    total_tco: np.ndarray
+    total_ghg: np.ndarray
+    total_charter_cost: np.ndarray
+    total_fuel: np.ndarray
+    total_revenue: np.ndarray
+
+    def __len__(self):
+        return len(self.total_tco)
+
+    @property
+    def total_investment(self):
+        return self.total_tco + self.total_charter_cost
+
+    def benchmark_delta_pct(self):
+        """{fleet total name: % change vs BENCHMARK_2024}; NaN where the benchmark is ~0."""
+        deltas = {}
+        for total_name, benchmark_key in BENCHMARK_TOTAL_KEYS.items():
+            benchmark_val = BENCHMARK_2024[benchmark_key]
+            values = getattr(self, total_name)
+            deltas[total_name] = (values - benchmark_val) / abs(benchmark_val) * 100 if abs(benchmark_val) >= 1e-9 else np.full(len(values), np.nan)
+        return deltas
+
+    def to_frame(self):
+        frame = pd.DataFrame({name: getattr(self, name) for name in ("total_owned", "total_tco", "total_ghg", "total_charter_cost", "total_fuel", "total_revenue")})
+        frame["total_investment"] = self.total_investment
+        for total_name, delta in self.benchmark_delta_pct().items(): frame[f"{total_name}_vs_{BENCHMARK_YEAR}_pct"] = delta
+        return frame
+
+    @classmethod
+    def concat(cls, results):
+        return cls(results[0].year, *(np.concatenate([getattr(result, name) for result in results]) for name in ("total_owned", "total_tco", "total_ghg", "total_charter_cost", "total_fuel", "total_revenue")))
+
+
+def evaluate_batch(batch, factors=None):
+    """Fleet totals for every scenario in `batch` at once.
+
+    `factors` overrides the year's charter factor matrix; it may be (routes, 2) or per scenario (scenarios, routes, 2).
+    """
+    factors = charter_factors_for_year(batch.year) if factors is None else np.asarray(factors, dtype=float)
+    return BatchResult(
+        year=batch.year, total_owned=batch.owned.sum(axis=(1, 2)), total_tco=batch.tco.sum(axis=1), total_ghg=batch.ghg.sum(axis=1),
+        total_charter_cost=route_charter_costs(batch.charter, factors).sum(axis=1), total_fuel=batch.fuel.sum(axis=1),
+        total_revenue=np.full(len(batch), route_revenues_for_year(batch.year).sum()),
+    )
@@ -0,0 +1,204 @@
+"""Plotly builders for the year-dependent CII band and GFI compliance-zone charts.
+
+These figures depend only on the reference tables (and the scenario year for
+the CII targets), never on a session's inputs. Built figures go into a
+process-wide LRU cache keyed by (vessel type, year, data version), so every
+session and rerun after the first reuses them. Cached figures are shared and
+must not be mutated by callers.
+
+The compact builders (`cii_overview_figure`, `gfi_zone_figure(compact=True)`)
+send less to the browser:
+- all CII vessel types go in one subplot figure with a shared year axis, so
+  the layout and template are sent once instead of five times;
+- the constant top and zero traces are dropped: the lowest band fills to zero,
+  and the region above the top boundary is the plot background;
+- fills are drawn opaque, in the colour the translucent fills showed over white;
+- data go out as float32.
+"""
+import numpy as np
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from fleet_cache import LRUCache
+from fleet_data import CII_CHART_Y_MAX, CII_RATING_DATA_BY_TYPE, DATA_VERSION, GFI_COMPLIANCE_ZONES_DF, PETROBRAS_CII_POINTS, PETROBRAS_FLEET_GFI_POINTS
+
+# Five CII vessel types x three scenario years, the three CII overviews and both GFI charts fit comfortably.
+FIGURE_CACHE = LRUCache(max_entries=32)
+GFI_FIGURE_KEY = "GFI"
+CII_OVERVIEW_KEY = "CII overview"
+CII_OVERVIEW_COLUMNS = 3
+# Traces with at least this many points are drawn with WebGL; the reference tables (about 30 years) draw faster as SVG.
+WEBGL_MIN_POINTS = 1_000
+
+# Compact band charts, bottom band first: (boundary column, boundary line colour, fill colour and name of the band below the boundary).
+CII_BANDS = (
+    ("Superior", "rgba(0,0,255,0.3)", "rgba(100,200,100,0.3)", "A (Below Superior)"),
+    ("Lower", "rgba(255,255,0,0.3)", "rgba(100,100,255,0.3)", "B (Superior-Lower)"),
+    ("Upper", "rgba(255,165,0,0.3)", "rgba(255,255,150,0.3)", "C (Lower-Upper)"),
+    ("Inferior", "rgba(255,0,0,0.3)", "rgba(255,200,100,0.3)", "D (Upper-Inferior)"),
+)
+CII_TOP_BAND = ("rgba(255,100,100,0.3)", "E (Inferior+)")
+GFI_BANDS = (
+    ("GFI_Credit_Upper_Limit", "rgba(144,238,144,0.5)", "rgba(60,179,113,0.3)", "Zone 4 (< GFI Credit Limit)"),
+    ("GFI DC", "rgba(255,140,0,0.5)", "rgba(152,251,152,0.3)", "Zone 3 (GFI DC - Credit Limit)"),
+    ("GFI Base", "rgba(220,20,60,0.5)", "rgba(255,200,100,0.3)", "Zone 2 (GFI Base - DC)"),
+)
+GFI_TOP_BAND = ("rgba(255,100,100,0.3)", "Zone 1 (> GFI Base)")
+
+
+def build_cii_band_figure(vessel_type, year):
+    """CII A-E band chart for `vessel_type` with the Petrobras targets for `year`."""
+    cii_df = CII_RATING_DATA_BY_TYPE[vessel_type]
+    fig_cii = go.Figure()
+    max_y_cii = CII_CHART_Y_MAX.get(vessel_type, 35)
+    fig_cii.add_trace(go.Scatter(x=cii_df['Year'], y=[max_y_cii] * len(cii_df['Year']), fill=None, mode='lines', line_color='rgba(255,0,0,0)', showlegend=False))
+    fig_cii.add_trace(go.Scatter(x=cii_df['Year'], y=cii_df['Inferior'], fill='tonexty', mode='lines', line_color='rgba(255,0,0,0.3)', fillcolor='rgba(255,100,100,0.3)', name='E (Inferior+)'))
+    fig_cii.add_trace(go.Scatter(x=cii_df['Year'], y=cii_df['Upper'], fill='tonexty', mode='lines', line_color='rgba(255,165,0,0.3)', fillcolor='rgba(255,200,100,0.3)', name='D (Upper-Inferior)'))
+    fig_cii.add_trace(go.Scatter(x=cii_df['Year'], y=cii_df['Lower'], fill='tonexty', mode='lines', line_color='rgba(255,255,0,0.3)', fillcolor='rgba(255,255,150,0.3)', name='C (Lower-Upper)'))
+    fig_cii.add_trace(go.Scatter(x=cii_df['Year'], y=cii_df['Superior'], fill='tonexty', mode='lines', line_color='rgba(0,0,255,0.3)', fillcolor='rgba(100,100,255,0.3)', name='B (Superior-Lower)'))
+    fig_cii.add_trace(go.Scatter(x=cii_df['Year'], y=[0] * len(cii_df['Year']), fill='tonexty', mode='lines', line_color='rgba(0,128,0,0.3)', fillcolor='rgba(100,200,100,0.3)', name='A (Below Superior)'))
+    petrobras_points_for_year_and_vessel = PETROBRAS_CII_POINTS.get(year, {}).get(vessel_type, {})
+    if petrobras_points_for_year_and_vessel:
+        for label, cii_value in petrobras_points_for_year_and_vessel.items():
+            fig_cii.add_trace(go.Scatter(x=[year], y=[cii_value], mode='markers+text', name=f"Petrobras {year}: {label} ({cii_value})", marker=dict(symbol='star', size=12, color="black"), text=[f"{label} ({cii_value})"], textposition="top center", textfont=dict(size=10)))
+    fig_cii.update_layout(title=f'CII Bands ({year} Targets)', xaxis_title='Year', yaxis_title='CII Value', yaxis_range=[0, max_y_cii], height=400, legend_title_text='Rating', plot_bgcolor='white', margin=dict(t=50, b=50))
+    return fig_cii
+
+
+def build_gfi_zone_figure():
+    """GFI compliance zones with the Petrobras fleet optimal WtW points."""
+    fig_gfi = go.Figure()
+    max_y_gfi = 95  # As specified
+
+    # Zone 1 (Red): Above GFI Base
+    fig_gfi.add_trace(go.Scatter(
+        x=GFI_COMPLIANCE_ZONES_DF['Year'],
+        y=[max_y_gfi] * len(GFI_COMPLIANCE_ZONES_DF['Year']),
+        fill=None, mode='lines', line_color='rgba(255,0,0,0)', showlegend=False
+    ))
+    fig_gfi.add_trace(go.Scatter(
+        x=GFI_COMPLIANCE_ZONES_DF['Year'], y=GFI_COMPLIANCE_ZONES_DF['GFI Base'],
+        fill='tonexty', mode='lines', line_color='rgba(220,20,60,0.5)',  # Crimson for boundary
+        fillcolor='rgba(255,100,100,0.3)', name='Zone 1 (> GFI Base)'  # Red fill
+    ))
+
+    # Zone 2 (Orange): GFI Base to GFI DC
+    fig_gfi.add_trace(go.Scatter(
+        x=GFI_COMPLIANCE_ZONES_DF['Year'], y=GFI_COMPLIANCE_ZONES_DF['GFI DC'],
+        fill='tonexty', mode='lines', line_color='rgba(255,140,0,0.5)',  # DarkOrange for boundary
+        fillcolor='rgba(255,200,100,0.3)', name='Zone 2 (GFI Base - DC)'  # Orange fill
+    ))
+
+    # Zone 3 (Light Green): GFI DC to GFI_Credit_Upper_Limit
+    fig_gfi.add_trace(go.Scatter(
+        x=GFI_COMPLIANCE_ZONES_DF['Year'], y=GFI_COMPLIANCE_ZONES_DF['GFI_Credit_Upper_Limit'],
+        fill='tonexty', mode='lines', line_color='rgba(144,238,144,0.5)',  # LightGreen for boundary
+        fillcolor='rgba(152,251,152,0.3)', name='Zone 3 (GFI DC - Credit Limit)'  # Light Green fill
+    ))
+
+    # Zone 4 (Dark Green): GFI_Credit_Upper_Limit to 0
+    fig_gfi.add_trace(go.Scatter(
+        x=GFI_COMPLIANCE_ZONES_DF['Year'], y=[0] * len(GFI_COMPLIANCE_ZONES_DF['Year']),
+        fill='tonexty', mode='lines', line_color='rgba(0,100,0,0.5)',  # DarkGreen for boundary
+        fillcolor='rgba(60,179,113,0.3)', name='Zone 4 (< GFI Credit Limit)'  # Dark Green / MediumSeaGreen fill
+    ))
+
+    # Plot Petrobras Fleet Optimal WtW points
+    gfi_points_x = []
+    gfi_points_y = []
+    gfi_points_text = []
+    for year_pt, gfi_val in PETROBRAS_FLEET_GFI_POINTS.items():
+        if year_pt in GFI_COMPLIANCE_ZONES_DF['Year'].values:  # Only plot if year is in our GFI data range
+            gfi_points_x.append(year_pt)
+            gfi_points_y.append(gfi_val)
+            gfi_points_text.append(f"WtW: {gfi_val}<br>Year: {year_pt}")
+
+    if gfi_points_x:
+        fig_gfi.add_trace(go.Scatter(
+            x=gfi_points_x, y=gfi_points_y,
+            mode='markers+text', name='Petrobras Fleet Optimal WtW',
+            marker=dict(symbol='diamond', size=12, color="black"),
+            text=gfi_points_text, textposition="top right",
+            textfont=dict(size=10, color="black")
+        ))
+
+    fig_gfi.update_layout(
+        title='GFI Compliance Zones vs. Petrobras Fleet Optimal WtW',
+        xaxis_title='Year',
+        yaxis_title='GFI Value (gCO2eq/MJ) - Lower is Better',
+        yaxis_range=[0, max_y_gfi],
+        height=500,
+        legend_title_text='Compliance Zones',
+        plot_bgcolor='white',
+        yaxis_gridcolor='lightgrey',
+        xaxis_gridcolor='lightgrey'
+    )
+    return fig_gfi
+
+
+# --- Compact builders ---
+def _over_white(rgba):
+    """The opaque colour a translucent `rgba(r,g,b,a)` shows over white."""
+    *channels, alpha = (float(part) for part in rgba[rgba.index("(") + 1:-1].split(","))
+    return "rgb({:.0f},{:.0f},{:.0f})".format(*(alpha * channel + (1 - alpha) * 255 for channel in channels))
+
+
+def _scatter_type(n_points):
+    return go.Scattergl if n_points >= WEBGL_MIN_POINTS else go.Scatter
+
+
+def _band_traces(df, bands, top_band, legend_rank_start=1, show_legend=True, legendgroup_prefix=""):
+    """Opaque filled bands, bottom first, with one boundary trace per band; the top band is a legend-only entry (it is the plot background)."""
+    x = df['Year'].to_numpy()
+    scatter = _scatter_type(len(x))
+    traces = [scatter(x=x, y=df[column].to_numpy(dtype=np.float32), fill='tozeroy' if band_idx == 0 else 'tonexty', mode='lines', line_color=line_color, fillcolor=_over_white(fill_color),
+                      name=name, legendgroup=legendgroup_prefix + name, legendrank=legend_rank_start + len(bands) - band_idx, showlegend=show_legend, yhoverformat='.2f')
+              for band_idx, (column, line_color, fill_color, name) in enumerate(bands)]
+    traces.append(go.Scatter(x=[None], y=[None], mode='markers', marker=dict(symbol='square', size=12, color=_over_white(top_band[0])), name=top_band[1],
+                             legendgroup=legendgroup_prefix + top_band[1], legendrank=legend_rank_start, showlegend=show_legend))
+    return traces
+
+
+def build_cii_overview_figure(year):
+    """CII A-E bands of every vessel type in one subplot figure (shared year axis) with the Petrobras targets for `year`."""
+    vessel_types = list(CII_RATING_DATA_BY_TYPE)
+    rows = -(-len(vessel_types) // CII_OVERVIEW_COLUMNS)
+    specs = [[{} if row * CII_OVERVIEW_COLUMNS + col < len(vessel_types) else None for col in range(CII_OVERVIEW_COLUMNS)] for row in range(rows)]
+    fig_cii = make_subplots(rows=rows, cols=CII_OVERVIEW_COLUMNS, specs=specs, shared_xaxes='all', subplot_titles=vessel_types, vertical_spacing=0.12, horizontal_spacing=0.06)
+    for type_idx, vessel_type in enumerate(vessel_types):
+        row, col = type_idx // CII_OVERVIEW_COLUMNS + 1, type_idx % CII_OVERVIEW_COLUMNS + 1
+        for trace in _band_traces(CII_RATING_DATA_BY_TYPE[vessel_type], CII_BANDS, CII_TOP_BAND, show_legend=type_idx == 0): fig_cii.add_trace(trace, row=row, col=col)
+        targets = PETROBRAS_CII_POINTS.get(year, {}).get(vessel_type, {})
+        if targets:
+            fig_cii.add_trace(go.Scatter(x=[year] * len(targets), y=np.fromiter(targets.values(), dtype=np.float32, count=len(targets)), mode='markers+text', name=f"Petrobras {year} Targets", legendgroup="targets",
+                                         showlegend=type_idx == 0, marker=dict(symbol='star', size=12, color="black"), text=[f"{label} ({cii_value})" for label, cii_value in targets.items()],
+                                         textposition="top center", textfont=dict(size=10), yhoverformat='.2f'), row=row, col=col)
+        fig_cii.update_yaxes(range=[0, CII_CHART_Y_MAX.get(vessel_type, 35)], row=row, col=col)
+    fig_cii.update_yaxes(title_text='CII Value', col=1)
+    fig_cii.update_layout(title=f'CII Bands by Vessel Type ({year} Targets)', height=380 * rows, legend_title_text='Rating', plot_bgcolor=_over_white(CII_TOP_BAND[0]), margin=dict(t=80, b=50))
+    return fig_cii
+
+
+def build_gfi_zone_figure_compact():
+    """`build_gfi_zone_figure` without the constant traces, with opaque zones and float32 data."""
+    fig_gfi = go.Figure(_band_traces(GFI_COMPLIANCE_ZONES_DF, GFI_BANDS, GFI_TOP_BAND))
+    gfi_points = {year_pt: gfi_val for year_pt, gfi_val in PETROBRAS_FLEET_GFI_POINTS.items() if year_pt in GFI_COMPLIANCE_ZONES_DF['Year'].values}
+    if gfi_points:
+        fig_gfi.add_trace(go.Scatter(x=list(gfi_points), y=np.fromiter(gfi_points.values(), dtype=np.float32, count=len(gfi_points)), mode='markers+text', name='Petrobras Fleet Optimal WtW',
+                                     marker=dict(symbol='diamond', size=12, color="black"), text=[f"WtW: {gfi_val}<br>Year: {year_pt}" for year_pt, gfi_val in gfi_points.items()],
+                                     textposition="top right", textfont=dict(size=10, color="black"), yhoverformat='.2f'))
+    fig_gfi.update_layout(title='GFI Compliance Zones vs. Petrobras Fleet Optimal WtW', xaxis_title='Year', yaxis_title='GFI Value (gCO2eq/MJ) - Lower is Better', yaxis_range=[0, 95], height=500,
+                          legend_title_text='Compliance Zones', plot_bgcolor=_over_white(GFI_TOP_BAND[0]), yaxis_gridcolor='lightgrey', xaxis_gridcolor='lightgrey')
+    return fig_gfi
+
+
+def cii_band_figure(vessel_type, year):
+    return FIGURE_CACHE.get_or_build((vessel_type, year, DATA_VERSION), lambda: build_cii_band_figure(vessel_type, year))
+
+
+def cii_overview_figure(year):
+    return FIGURE_CACHE.get_or_build((CII_OVERVIEW_KEY, year, DATA_VERSION), lambda: build_cii_overview_figure(year))
+
+
+def gfi_zone_figure(compact=False):
+    return FIGURE_CACHE.get_or_build((GFI_FIGURE_KEY, compact, DATA_VERSION), build_gfi_zone_figure_compact if compact else build_gfi_zone_figure)
@@ -0,0 +1,78 @@
+"""Closed-form NPV, payback and cumulative cash-flow figures for the fleet dashboard.
+
+The dashboard's projection is a single up-front investment followed by a constant
+annual net cash flow (NCF). That makes every figure a geometric series, so NPV
+and discounted payback have closed forms. They are evaluated for whole grids of
+discount rate x analysis period at once instead of building a cash-flow list per
+(rate, horizon) pair. Rates are fractions (0.05 for 5%) unless the name says
+`_percent`.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+# The dashboard's projection: up-front investment of the annualised TCO over the asset lifespan, repaid by a constant NCF.
+PROJECTED_ANNUAL_NET_CASH_FLOW = 4000.0  # M USD
+
+
+def annuity_factor(rate, periods):
+    """Present value of 1 per year for `periods` years at `rate`: (1 - (1+r)^-n) / r, or n when r == 0."""
+    rate, periods = np.broadcast_arrays(np.asarray(rate, dtype=float), np.asarray(periods, dtype=float))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        factor = -np.expm1(-periods * np.log1p(rate)) / rate
+    return np.where(np.abs(rate) < 1e-12, periods, factor)
+
+
+def npv(investment, annual_cash_flow, rate, periods):
+    """NPV of -investment at t=0 and `annual_cash_flow` at t=1..periods (same convention as the old `numpy.npv` call)."""
+    return -np.asarray(investment, dtype=float) + np.asarray(annual_cash_flow, dtype=float) * annuity_factor(rate, periods)
+
+
+def simple_payback(investment, annual_cash_flow):
+    """Years until undiscounted cash flow repays `investment`; inf when the NCF is not positive."""
+    investment, annual_cash_flow = np.asarray(investment, dtype=float), np.asarray(annual_cash_flow, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(annual_cash_flow > 0, np.maximum(investment, 0.0) / annual_cash_flow, np.inf)
+
+
+def discounted_payback(investment, annual_cash_flow, rate):
+    """Fractional years until discounted cash flow repays `investment`; inf if it never does.
+
+    Solves NCF * annuity_factor(r, t) = investment for t: t = -ln(1 - I*r/NCF) / ln(1+r).
+    """
+    investment, annual_cash_flow, rate = np.broadcast_arrays(*(np.asarray(value, dtype=float) for value in (investment, annual_cash_flow, rate)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.maximum(investment, 0.0) * rate / annual_cash_flow
+        years = -np.log1p(-ratio) / np.log1p(rate)
+    years = np.where(np.abs(rate) < 1e-12, simple_payback(investment, annual_cash_flow), years)
+    return np.where((annual_cash_flow > 0) & (ratio < 1) | (np.abs(rate) < 1e-12), years, np.inf)
+
+
+def cumulative_cash_flow(investment, annual_cash_flow, periods, rate=0.0):
+    """(periods + 1,) cumulative net cash flow for years 0..periods; discounted when `rate` is non-zero."""
+    years = np.arange(int(periods) + 1)
+    return -float(investment) + float(annual_cash_flow) * annuity_factor(rate, years)
+
+
+@dataclass
+class FinanceGrid:
+    """NPV over a discount-rate x horizon grid, plus per-rate discounted payback."""
+    rates_percent: np.ndarray
+    horizons: np.ndarray
+    npv: np.ndarray
+    discounted_payback: np.ndarray
+
+    def npv_at(self, rate_percent, horizon):
+        """NPV at the grid point nearest to (`rate_percent`, `horizon`)."""
+        return float(self.npv[np.abs(self.rates_percent - rate_percent).argmin(), np.abs(self.horizons - horizon).argmin()])
+
+
+def npv_grid(investment, annual_cash_flow, rates_percent, horizons):
+    """Evaluate NPV for every (rate, horizon) pair in one broadcast; `npv` is (rates, horizons)."""
+    rates_percent, horizons = np.asarray(rates_percent, dtype=float), np.asarray(horizons, dtype=int)
+    rates = rates_percent[:, None] / 100.0
+    return FinanceGrid(
+        rates_percent=rates_percent, horizons=horizons,
+        npv=npv(investment, annual_cash_flow, rates, horizons[None, :]),
+        discounted_payback=discounted_payback(investment, annual_cash_flow, rates_percent / 100.0),
+    )
@@ -0,0 +1,288 @@
+"""Streaming ingestion of per-vessel fleet registers and per-voyage logs into the route-level inputs.
+
+A register has one row per vessel: id, route, ship category, ownership (owned or
+chartered) and annualised TCO. A voyage log has one row per voyage: vessel id,
+GHG, fuel cost and, optionally, the year. Both are read in chunks from CSV or
+Parquet, using only the needed columns. Each chunk is mapped to `TANKER_ROUTES` keys and
+`OWNED_SHIP_CATEGORIES_BY_YEAR` categories with vectorised lookups and folded
+into per-route sums. Memory therefore grows with the chunk size and the number
+of vessels, not with the file size.
+
+Routes match on key or display name, categories on display name or widget key,
+and ownership on the `OWNERSHIP_LOOKUP` labels, all case-insensitive. Vessels with
+an unknown route or ownership, and owned vessels with an unknown category, count
+as unmapped and are left out. Voyages of chartered vessels are counted but not
+added to route GHG/fuel, because the dashboard's per-route GHG and fuel inputs
+cover owned vessels only.
+
+    python fleet_ingest.py register.csv voyages.parquet --year 2030 --json route_inputs.json
+"""
+import argparse
+import json
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from fleet_data import OWNED_SHIP_CATEGORIES_BY_YEAR, ROUTE_KEYS, TANKER_ROUTES, category_key
+from fleet_engine import ROUTE_DISPLAY_NAMES
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+DEFAULT_CHUNK_ROWS = 500_000
+# pyarrow CSV block size; the reader buffers a fixed number of blocks ahead, so small blocks bound its memory.
+CSV_BLOCK_BYTES = 1 << 20
+# Logical field -> file column; pass a dict with other column names to the ingest functions.
+REGISTER_COLUMNS = {"vessel_id": "vessel_id", "route": "route", "category": "category", "ownership": "ownership", "tco": "tco_musd"}
+VOYAGE_COLUMNS = {"vessel_id": "vessel_id", "ghg": "ghg_t", "fuel_cost": "fuel_cost_usd", "year": "year"}
+# Voyage logs carry tonnes and USD; the dashboard inputs are in millions.
+VOYAGE_UNIT_SCALE = {"ghg": 1e-6, "fuel_cost": 1e-6}
+# Ownership label -> 1 owned / 0 chartered; anything else (blank, typos) is unmapped.
+OWNERSHIP_LOOKUP = {**{value: 1 for value in ("owned", "own", "company owned")}, **{value: 0 for value in ("charter", "chartered", "tc", "time charter")}}
+ROUTE_LOOKUP = {**{route_key.lower(): idx for idx, route_key in enumerate(ROUTE_KEYS)}, **{TANKER_ROUTES[route_key].lower(): idx for idx, route_key in enumerate(ROUTE_KEYS)}}
+
+
+def category_lookup(year):
+    """{lower-case category display name or widget key: category index} for `year`."""
+    categories = OWNED_SHIP_CATEGORIES_BY_YEAR.get(year, ())
+    return {**{cat.lower(): idx for idx, cat in enumerate(categories)}, **{category_key(cat): idx for idx, cat in enumerate(categories)}}
+
+
+def _is_parquet(path):
+    return str(getattr(path, "name", path)).lower().endswith((".parquet", ".pq"))
+
+
+def file_columns(path):
+    """Column names of a CSV or Parquet file (path or seekable binary file object), read from the header or schema only."""
+    if _is_parquet(path):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise ImportError("reading Parquet needs pyarrow (pip install pyarrow)") from exc
+        names = list(pq.ParquetFile(path).schema_arrow.names)
+    else:
+        names = list(pd.read_csv(path, nrows=0).columns)
+    if hasattr(path, "seek"): path.seek(0)
+    return names
+
+
+def iter_chunks(path, columns, chunk_rows=DEFAULT_CHUNK_ROWS, categorical=()):
+    """Yield DataFrames of `columns` from a CSV or Parquet file (path or binary file object), about `chunk_rows` rows each.
+
+    `categorical` columns come back dictionary-encoded (pandas Categorical), so lookups run once per distinct value.
+    CSV is read with pyarrow's streaming reader when pyarrow is installed, otherwise with pandas chunks.
+    """
+    columns, categorical = list(columns), list(categorical)
+    if _is_parquet(path):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise ImportError("reading Parquet needs pyarrow (pip install pyarrow)") from exc
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=columns): yield batch.to_pandas(categories=categorical)
+        return
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+    except ImportError:
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunk_rows, dtype={column: "category" for column in categorical})
+        return
+    # Regroup the small pyarrow batches into `chunk_rows` chunks.
+    reader = pa_csv.open_csv(path, read_options=pa_csv.ReadOptions(block_size=CSV_BLOCK_BYTES),
+                             convert_options=pa_csv.ConvertOptions(include_columns=columns, column_types={column: pa.dictionary(pa.int32(), pa.string()) for column in categorical}))
+    batches, rows = [], 0
+    for batch in reader:
+        batches.append(batch); rows += batch.num_rows
+        if rows >= chunk_rows:
+            yield pa.Table.from_batches(batches).to_pandas(); batches, rows = [], 0
+    if batches: yield pa.Table.from_batches(batches).to_pandas()
+
+
+def _codes(series, lookup):
+    """Index of each value in `lookup` (case-insensitive), -1 where unknown."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return np.append(_codes(pd.Series(series.cat.categories), lookup), -1)[series.cat.codes.to_numpy()]
+    return series.astype("string").str.strip().str.lower().map(lookup).fillna(-1).to_numpy(dtype=np.int64)
+
+
+def _positions(series, index):
+    """Position of each value in `index` (compared as strings), -1 where absent."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return np.append(index.get_indexer(series.cat.categories.astype("string").to_numpy()), -1)[series.cat.codes.to_numpy()]
+    return index.get_indexer(series.astype("string").to_numpy())
+
+
+def _peak_rss_bytes():
+    if resource is None: return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+@dataclass
+class IngestStats:
+    """Rows read, rejected rows and throughput for one file.
+
+    `peak_rss_bytes` is the whole process's high-water mark after reading, so it only describes the ingest in a fresh
+    process (the CLI, `benchmarks/bench_ingest.py`); it is left out of `str()`, which the dashboard shows.
+    """
+    rows: int = 0
+    chunks: int = 0
+    unmapped_rows: int = 0
+    seconds: float = 0.0
+    peak_rss_bytes: int = None
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return f"{self.rows:,} rows in {self.chunks} chunks, {self.seconds:.2f} s ({self.rows_per_second:,.0f} rows/s), {self.unmapped_rows:,} unmapped"
+
+
+@dataclass
+class VesselRegister:
+    """Vessels sorted by id with route/category index (-1 where unmapped), owned/chartered flags (neither where the
+    ownership is unknown) and annualised TCO (M USD)."""
+    year: int
+    vessel_ids: pd.Index
+    route_idx: np.ndarray
+    cat_idx: np.ndarray
+    owned: np.ndarray
+    chartered: np.ndarray
+    tco: np.ndarray
+    stats: IngestStats
+
+    @property
+    def mapped(self):
+        """Chartered vessels need a route; owned vessels also need a category."""
+        return (self.route_idx >= 0) & (self.chartered | (self.owned & (self.cat_idx >= 0)))
+
+
+def ingest_register(path, year, chunk_rows=DEFAULT_CHUNK_ROWS, columns=REGISTER_COLUMNS):
+    """Stream a vessel register; a vessel listed more than once keeps its last row."""
+    start = time.perf_counter(); stats = IngestStats()
+    cat_lookup = category_lookup(year)
+    parts = []
+    for chunk in iter_chunks(path, columns.values(), chunk_rows, categorical=[columns[field] for field in ("route", "category", "ownership")]):
+        stats.rows += len(chunk); stats.chunks += 1
+        parts.append(pd.DataFrame({
+            "vessel_id": chunk[columns["vessel_id"]].astype("string").to_numpy(), "route_idx": _codes(chunk[columns["route"]], ROUTE_LOOKUP),
+            "cat_idx": _codes(chunk[columns["category"]], cat_lookup),
+            "ownership": _codes(chunk[columns["ownership"]], OWNERSHIP_LOOKUP),
+            "tco": pd.to_numeric(chunk[columns["tco"]], errors="coerce").fillna(0.0).to_numpy(dtype=float),
+        }))
+    vessels = pd.concat(parts, ignore_index=True).drop_duplicates("vessel_id", keep="last").sort_values("vessel_id") if parts else pd.DataFrame(columns=["vessel_id", "route_idx", "cat_idx", "ownership", "tco"])
+    ownership = vessels["ownership"].to_numpy(dtype=np.int64)
+    register = VesselRegister(year, pd.Index(vessels["vessel_id"].to_numpy()), vessels["route_idx"].to_numpy(dtype=np.int64), vessels["cat_idx"].to_numpy(dtype=np.int64),
+                              ownership == 1, ownership == 0, vessels["tco"].to_numpy(dtype=float), stats)
+    stats.unmapped_rows = int((~register.mapped).sum())
+    stats.seconds = time.perf_counter() - start; stats.peak_rss_bytes = _peak_rss_bytes()
+    return register
+
+
+@dataclass
+class VoyageTotals:
+    """Per-route GHG (M t CO2e) and fuel cost (M USD) of owned vessels, plus chartered-vessel totals kept for reference."""
+    ghg: np.ndarray
+    fuel: np.ndarray
+    charter_ghg: np.ndarray
+    charter_fuel: np.ndarray
+    stats: IngestStats
+
+
+def ingest_voyages(path, register, chunk_rows=DEFAULT_CHUNK_ROWS, columns=VOYAGE_COLUMNS):
+    """Stream a voyage log and sum GHG/fuel per route for the register's vessels.
+
+    The year column is optional: when the file has it (checked against its header or schema), rows of other years are skipped.
+    Rows of vessels missing from the register or unmapped in it (see `VesselRegister.mapped`) count as unmapped.
+    """
+    start = time.perf_counter(); stats = IngestStats()
+    n_routes = len(ROUTE_KEYS)
+    totals = np.zeros((4, n_routes))  # owned ghg, owned fuel, charter ghg, charter fuel
+    # Unmapped vessels are left out, as in the register counts. A trailing sentinel makes unknown vessels (position -1)
+    # read as route -1 / not owned.
+    vessel_routes = np.append(np.where(register.mapped, register.route_idx, -1), -1); vessel_owned = np.append(register.owned, False)
+    wanted = {field: column for field, column in columns.items() if field != "year"}
+    has_year = "year" in columns and columns["year"] in file_columns(path)
+    for chunk in iter_chunks(path, list(wanted.values()) + ([columns["year"]] if has_year else []), chunk_rows, categorical=[wanted["vessel_id"]]):
+        stats.rows += len(chunk); stats.chunks += 1
+        if has_year: chunk = chunk[pd.to_numeric(chunk[columns["year"]], errors="coerce").to_numpy() == register.year]
+        vessel_pos = _positions(chunk[wanted["vessel_id"]], register.vessel_ids)
+        route_idx = vessel_routes[vessel_pos]
+        known = route_idx >= 0
+        stats.unmapped_rows += int((~known).sum())
+        owned = vessel_owned[vessel_pos] & known; chartered = ~vessel_owned[vessel_pos] & known
+        ghg = pd.to_numeric(chunk[wanted["ghg"]], errors="coerce").fillna(0.0).to_numpy(dtype=float) * VOYAGE_UNIT_SCALE["ghg"]
+        fuel = pd.to_numeric(chunk[wanted["fuel_cost"]], errors="coerce").fillna(0.0).to_numpy(dtype=float) * VOYAGE_UNIT_SCALE["fuel_cost"]
+        for row, (mask, values) in enumerate(((owned, ghg), (owned, fuel), (chartered, ghg), (chartered, fuel))):
+            totals[row] += np.bincount(route_idx[mask], weights=values[mask], minlength=n_routes)
+    stats.seconds = time.perf_counter() - start; stats.peak_rss_bytes = _peak_rss_bytes()
+    return VoyageTotals(*totals, stats=stats)
+
+
+@dataclass
+class IngestResult:
+    """Route-level inputs for `year`: owned is (routes, categories of the year), the rest (routes,)."""
+    year: int
+    owned: np.ndarray
+    charter: np.ndarray
+    tco: np.ndarray
+    ghg: np.ndarray
+    fuel: np.ndarray
+    register_stats: IngestStats
+    voyage_stats: IngestStats = None
+
+    def route_table(self):
+        return pd.DataFrame({"Route": ROUTE_DISPLAY_NAMES, "Owned Vessels": self.owned.sum(axis=1), "Charter Vessels": self.charter,
+                             "TCO (M USD)": self.tco, "GHG (M Tons CO2e)": self.ghg, "Fuel Cost (M USD)": self.fuel})
+
+    def to_widget_values(self):
+        """{widget key: value} in the dashboard's `owned_`/`charter_`/`tco_`/`ghg_`/`fuel_cost_route_` keys."""
+        values = {}
+        for route_idx, route_key in enumerate(ROUTE_KEYS):
+            for cat_idx, cat in enumerate(OWNED_SHIP_CATEGORIES_BY_YEAR.get(self.year, ())): values[f"owned_{route_key}_{category_key(cat)}"] = int(self.owned[route_idx, cat_idx])
+            values[f"charter_{route_key}"] = int(self.charter[route_idx]); values[f"tco_{route_key}"] = float(self.tco[route_idx])
+            values[f"ghg_{route_key}"] = float(self.ghg[route_idx]); values[f"fuel_cost_route_{route_key}"] = float(self.fuel[route_idx])
+        return values
+
+
+def ingest_fleet(register_path, year, voyage_path=None, chunk_rows=DEFAULT_CHUNK_ROWS, register_columns=REGISTER_COLUMNS, voyage_columns=VOYAGE_COLUMNS):
+    """Aggregate a register (and optionally a voyage log) into route-level inputs; without a log GHG and fuel are zero."""
+    register = ingest_register(register_path, year, chunk_rows, register_columns)
+    n_routes, n_cats = len(ROUTE_KEYS), len(OWNED_SHIP_CATEGORIES_BY_YEAR.get(year, ()))
+    owned_mask = register.owned & register.mapped
+    charter_mask = register.chartered & register.mapped
+    owned = np.bincount(register.route_idx[owned_mask] * n_cats + register.cat_idx[owned_mask], minlength=n_routes * n_cats).reshape(n_routes, n_cats)
+    voyages = ingest_voyages(voyage_path, register, chunk_rows, voyage_columns) if voyage_path is not None else None
+    return IngestResult(
+        year=year, owned=owned, charter=np.bincount(register.route_idx[charter_mask], minlength=n_routes),
+        tco=np.bincount(register.route_idx[owned_mask], weights=register.tco[owned_mask], minlength=n_routes),
+        ghg=voyages.ghg if voyages else np.zeros(n_routes), fuel=voyages.fuel if voyages else np.zeros(n_routes),
+        register_stats=register.stats, voyage_stats=voyages.stats if voyages else None,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aggregate a vessel register and voyage log into the dashboard's route-level inputs.")
+    parser.add_argument("register", type=Path)
+    parser.add_argument("voyages", type=Path, nargs="?")
+    parser.add_argument("--year", type=int, required=True)
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--json", type=Path, help="write the widget values as JSON")
+    args = parser.parse_args(argv)
+    result = ingest_fleet(args.register, args.year, args.voyages, args.chunk_rows)
+    print(result.route_table().to_string(index=False))
+    print("register:", result.register_stats)
+    if result.voyage_stats: print("voyages: ", result.voyage_stats)
+    peak = (result.voyage_stats or result.register_stats).peak_rss_bytes
+    if peak: print(f"peak RSS {peak / 2**20:,.0f} MiB")
+    if args.json: args.json.write_text(json.dumps(result.to_widget_values(), indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""Dependency-tracked live results for one dashboard session.
+
+`LiveResults` holds the route table, fleet totals and built figures of the last
+analysis. An edit to one widget touches one input cell. That cell maps to one
+route row, a few of that row's columns, the fleet totals fed by those columns
+and the figures that read them:
+
+    owned[r, c] -> "Total Owned Ships"[r] -> owned total   -> composition, owned vs chartered, pathway
+    charter[r]  -> charter, charter cost[r] -> charter cost -> charter charts, cost comparison, benchmark, ...
+
+Only those cells, totals and figures are updated. Totals change by the edit's
+delta instead of being re-summed. Figures are rebuilt on their next render and
+every other figure is reused. Each update records an `EditWork`, so the cost of
+an edit can be checked against the number of inputs it changed.
+
+`RESULT_CACHE` is shared by every session in the process. It keeps copies of
+rendered `LiveResults`, keyed by `scenario_key`, a canonical hash of the full
+input vector. A session that runs or edits its way to a scenario someone
+already rendered takes a copy and reuses its route table, totals and figures.
+
+Figures dominate a session's memory: a small Plotly figure object takes 60-130
+KiB. After each render a session hands its figures to the cached copy of its
+scenario (`release_figures`) and later borrows them from there, so a session
+keeps only its inputs, route table and totals (`SESSION_MEMORY_BUDGET_BYTES`).
+The figures live once, in `RESULT_CACHE`, which is bounded in bytes. A session
+whose scenario was evicted rebuilds the figures it renders next.
+"""
+import collections
+import hashlib
+import sys
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from fleet_cache import LRUCache
+from fleet_data import DATA_VERSION, ROUTE_KEYS
+from fleet_engine import charter_factors_for_year, evaluate_snapshot, route_charter_costs
+from fleet_state import WIDGET_INDEX_BY_YEAR, FleetState
+
+# Input field -> route table columns it feeds.
+FIELD_ROUTE_COLUMNS = {
+    "owned": ("Total Owned Ships",), "charter": ("Charter Vessels", "Charter Cost (M USD)"), "tco": ("TCO (M USD)",),
+    "ghg": ("GHG (M Tons CO2e)",), "fuel": ("Total Fuel Cost (M USD)",),
+}
+# Input field -> the route column whose change feeds its totals, and those totals (keys of `SnapshotResult.fleet_totals`).
+FIELD_TOTAL_COLUMN = {"owned": "Total Owned Ships", "charter": "Charter Cost (M USD)", "tco": "TCO (M USD)", "ghg": "GHG (M Tons CO2e)", "fuel": "Total Fuel Cost (M USD)"}
+FIELD_TOTALS = {
+    "owned": ("calculated_total_owned_vessels_all_routes",), "charter": ("total_charter_cost_fleet", "total_investment_fleet_snapshot"),
+    "tco": ("total_tco_fleet", "total_investment_fleet_snapshot"), "ghg": ("total_ghg_fleet",), "fuel": ("total_annual_fuel_expenditure_fleet_million",),
+}
+# Input field -> dashboard figures that read it ("pathway" is the pathway result and its charts); "finance" is the discount rate and analysis period.
+FIELD_FIGURES = {
+    "owned": ("owned_composition", "owned_vs_chartered", "pathway"),
+    "charter": ("owned_vs_chartered", "charter_cost", "cost_comparison", "benchmark_charter_cost", "scatter", "pathway"),
+    "tco": ("tco", "cost_comparison", "npv_sensitivity", "cumulative_cash_flow", "benchmark_tco", "scatter"),
+    "ghg": ("ghg", "benchmark_ghg", "scatter"),
+    "fuel": ("fuel", "cost_comparison", "benchmark_fuel"),
+    "finance": ("npv_sensitivity", "cumulative_cash_flow"),
+}
+FIGURE_NAMES = tuple(sorted(set().union(*FIELD_FIGURES.values())))
+
+
+# Memory of one small Plotly figure object (layout, template and trace objects measured at 60-130 KiB); data arrays are counted on top at 8 bytes per value.
+FIGURE_OVERHEAD_BYTES = 80 * 2**10
+# State one session may hold on its own (inputs, route table, totals, profiles, widget values); results shared through `RESULT_CACHE` are not counted.
+SESSION_MEMORY_BUDGET_BYTES = 256 * 2**10
+
+
+def _is_figure(value):
+    return hasattr(value, "data") and hasattr(value, "layout")
+
+
+def _estimated_bytes(value):
+    """Rough in-memory size of cached results: route table, figure data points, arrays and frames (cheap enough for every insert)."""
+    if isinstance(value, LiveResults): return _estimated_bytes(value.route_table) + sum(_estimated_bytes(item) for item in value.figures.values())
+    if isinstance(value, (tuple, list)): return sum(_estimated_bytes(item) for item in value)
+    if isinstance(value, pd.DataFrame): return int(value.memory_usage(deep=False).sum())
+    if isinstance(value, np.ndarray): return value.nbytes
+    if _is_figure(value):
+        return FIGURE_OVERHEAD_BYTES + 8 * sum(np.size(points) for trace in value.data for points in (getattr(trace, axis, None) for axis in ("x", "y", "z")) if points is not None)
+    if hasattr(value, "__dataclass_fields__"): return sum(_estimated_bytes(item) for item in vars(value).values())
+    return 0
+
+
+def session_bytes(values):
+    """Estimated bytes held by one session's `values` (e.g. `st.session_state.to_dict()`); objects reached twice count once.
+
+    Figures a `LiveResults` borrows from `RESULT_CACHE` are not in its `figures`, so only figures it holds on its own are counted.
+    """
+    seen, total, pending = set(), 0, [values]
+    while pending:
+        value = pending.pop()
+        if id(value) in seen: continue
+        seen.add(id(value))
+        if isinstance(value, (pd.DataFrame, pd.Series)): total += int(value.memory_usage(deep=True).sum() if isinstance(value, pd.DataFrame) else value.memory_usage(deep=True)); continue
+        if isinstance(value, np.ndarray) or _is_figure(value): total += _estimated_bytes(value); continue
+        total += sys.getsizeof(value)
+        if isinstance(value, dict): pending.extend(value.keys()); pending.extend(value.values())
+        elif isinstance(value, (list, tuple, set, frozenset, collections.deque)): pending.extend(value)
+        elif hasattr(value, "__dict__") and not isinstance(value, type): pending.append(vars(value))
+    return total
+
+
+RESULT_CACHE = LRUCache(max_entries=256, max_bytes=64 * 2**20, sizer=_estimated_bytes)
+
+
+def scenario_key(year, inputs, discount_rate_percent, analysis_period_years):
+    """Canonical hash of a scenario: data version, year, {field: array} inputs, discount rate and horizon.
+
+    Arrays are hashed as little-endian int64 (owned) or float64 (route values) with -0.0
+    folded into 0.0, so equal inputs give equal keys whatever their dtype.
+    """
+    digest = hashlib.blake2b(f"{DATA_VERSION}|{int(year)}|{float(discount_rate_percent)!r}|{int(analysis_period_years)}".encode(), digest_size=16)
+    digest.update(np.ascontiguousarray(inputs["owned"], dtype="<i8").tobytes())
+    for field in FleetState.FIELDS[1:]: digest.update((np.ascontiguousarray(inputs[field], dtype="<f8") + 0.0).tobytes())
+    return digest.hexdigest()
+
+
+@dataclass
+class EditWork:
+    """What one update touched: changed inputs, route table cells, fleet totals and invalidated figures."""
+    inputs: int
+    route_cells: int
+    totals: int
+    figures: tuple
+    seconds: float
+
+    def __str__(self):
+        return (f"{self.inputs} input(s) -> {self.route_cells} route cell(s), {self.totals} total(s), "
+                f"{len(self.figures)} figure(s) invalidated in {self.seconds * 1000:.2f} ms")
+
+
+class LiveResults:
+    """Route table, fleet totals and figures for a `FleetState`, kept current edit by edit."""
+
+    def __init__(self, fleet_state):
+        start = time.perf_counter()
+        snapshot = evaluate_snapshot(fleet_state.to_scenario())
+        self.year = fleet_state.year
+        self.inputs = {field: getattr(fleet_state, field).copy() for field in FleetState.FIELDS}
+        self.factors = charter_factors_for_year(self.year)
+        self.route_table = snapshot.route_table()
+        self.totals = snapshot.fleet_totals()
+        self.missing_factor_routes = list(snapshot.missing_factor_routes)
+        self.figures = {}
+        self.stale = set(FIGURE_NAMES)
+        self.figures_built = self.figures_reused = self.edits = 0
+        self.shared_key = None
+        self._column_positions = {column: self.route_table.columns.get_loc(column) for columns in FIELD_ROUTE_COLUMNS.values() for column in columns}
+        self.last_edit = EditWork(sum(values.size for values in self.inputs.values()), self.route_table.size, len(self.totals), FIGURE_NAMES, time.perf_counter() - start)
+
+    def update(self, fleet_state, widget_key=None):
+        """Bring the results up to date with `fleet_state`; returns the `EditWork`.
+
+        With `widget_key` only that widget's cell is compared; otherwise every input is diffed
+        (for bulk changes such as applying an optimized fleet). A year change rebuilds everything.
+        """
+        if fleet_state.year != self.year:
+            self.__init__(fleet_state)
+            return self.last_edit
+        start = time.perf_counter()
+        if widget_key is not None:
+            field, route_idx, cat_idx = WIDGET_INDEX_BY_YEAR[self.year][widget_key]
+            index = route_idx if cat_idx is None else (route_idx, cat_idx)
+            changes = [(field, route_idx)] if getattr(fleet_state, field)[index] != self.inputs[field][index] else []
+        else:
+            changes = [(field, int(route_idx)) for field in FleetState.FIELDS
+                       for route_idx in np.flatnonzero((getattr(fleet_state, field) != self.inputs[field]).reshape(len(self.inputs[field]), -1).any(axis=1))]
+        totals, figures = set(), set()
+        for field, route_idx in changes:
+            self._apply(fleet_state, field, route_idx)
+            totals.update(FIELD_TOTALS[field]); figures.update(FIELD_FIGURES[field])
+        self.stale |= figures
+        self.edits += 1
+        self.last_edit = EditWork(len(changes), sum(len(FIELD_ROUTE_COLUMNS[field]) for field, _ in changes), len(totals), tuple(sorted(figures)), time.perf_counter() - start)
+        return self.last_edit
+
+    def _apply(self, fleet_state, field, route_idx):
+        row = getattr(fleet_state, field)[route_idx]
+        self.inputs[field][route_idx] = row
+        if field == "owned": values = {"Total Owned Ships": int(row.sum())}
+        elif field == "charter": values = {"Charter Vessels": float(row), "Charter Cost (M USD)": float(route_charter_costs(float(row), self.factors[route_idx]))}
+        else: values = {FIELD_ROUTE_COLUMNS[field][0]: float(row)}
+        for column, value in values.items():
+            position = self._column_positions[column]
+            delta = value - type(value)(self.route_table.iat[route_idx, position])
+            self.route_table.iat[route_idx, position] = value
+            if column == FIELD_TOTAL_COLUMN[field]:
+                for total_key in FIELD_TOTALS[field]: self.totals[total_key] += delta
+        if field == "charter":
+            route_key = ROUTE_KEYS[route_idx]
+            missing = row > 0 and np.isnan(self.factors[route_idx]).any()
+            self.missing_factor_routes = [key for key in self.missing_factor_routes if key != route_key] + ([route_key] if missing else [])
+
+    def key(self, discount_rate_percent, analysis_period_years):
+        return scenario_key(self.year, self.inputs, discount_rate_percent, analysis_period_years)
+
+    def copy(self):
+        """Independent results with the same figures (figures are replaced on rebuild, never mutated, so they can be shared)."""
+        clone = object.__new__(LiveResults)
+        clone.__dict__.update(self.__dict__)
+        clone.inputs = {field: values.copy() for field, values in self.inputs.items()}
+        clone.route_table, clone.totals = self.route_table.copy(), dict(self.totals)
+        clone.missing_factor_routes, clone.figures, clone.stale = list(self.missing_factor_routes), dict(self.figures), set(self.stale)
+        return clone
+
+    def invalidate(self, field):
+        """Mark the figures that read `field` (e.g. "finance") for rebuilding; returns the `EditWork`."""
+        self.stale.update(FIELD_FIGURES[field])
+        self.edits += 1
+        self.last_edit = EditWork(1, 0, 0, FIELD_FIGURES[field], 0.0)
+        return self.last_edit
+
+    def figure(self, name, builder):
+        """The figure (or figure bundle) `name`, rebuilt with `builder()` only if an edit invalidated it since it was last built."""
+        if name in self.stale or name not in self.figures:
+            shared = self.shared_figure(name)
+            if shared is None:
+                self.figures[name] = builder(); self.stale.discard(name); self.figures_built += 1
+                return self.figures[name]
+            self.figures[name] = shared
+        self.figures_reused += 1
+        return self.figures[name]
+
+    def shared_figure(self, name):
+        """`name` from the cached results these figures were released to, if that entry is still cached and `name` is current in both."""
+        if self.shared_key is None or name in self.stale: return None
+        shared = RESULT_CACHE.peek(self.shared_key)
+        return None if shared is None or name in shared.stale else shared.figures.get(name)
+
+    def release_figures(self, key):
+        """Drop the figures the results cached under `key` hold as well; later renders borrow them from there. Returns how many were dropped.
+
+        Stale figures are dropped too (they are rebuilt before use). Figures the cached entry lacks stay with the session.
+        """
+        shared = RESULT_CACHE.peek(key)
+        if shared is None: return 0
+        kept = {name: figure for name, figure in self.figures.items() if name not in self.stale and (name in shared.stale or name not in shared.figures)}
+        released = len(self.figures) - len(kept)
+        self.figures, self.shared_key = kept, key
+        return released
+
+
+def cached_live_results(key, count=True):
+    """A copy of the results cached under `key`, or None.
+
+    Edits probe with `count=False` (a `peek`), so the cache's hit/miss statistics count only "Run Analysis" lookups.
+    """
+    cached = RESULT_CACHE.get(key) if count else RESULT_CACHE.peek(key)
+    return None if cached is None else cached.copy()
+
+
+def live_results_for(fleet_state, discount_rate_percent, analysis_period_years):
+    """(LiveResults, from cache) for `fleet_state`: a cached copy when the scenario was seen before, else a fresh evaluation."""
+    cached = cached_live_results(scenario_key(fleet_state.year, {field: getattr(fleet_state, field) for field in FleetState.FIELDS}, discount_rate_percent, analysis_period_years))
+    return (cached, True) if cached is not None else (LiveResults(fleet_state), False)
+
+
+def remember_live_results(live, discount_rate_percent, analysis_period_years):
+    """Cache a copy of `live` unless an entry with at least as many current figures is cached already; returns whether it stored one."""
+    key = live.key(discount_rate_percent, analysis_period_years)
+    current = len(set(live.figures) - live.stale)
+    cached = RESULT_CACHE.peek(key)
+    if cached is not None and len(set(cached.figures) - cached.stale) >= current: return False
+    RESULT_CACHE.put(key, live.copy())
+    return True
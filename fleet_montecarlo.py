@@ -0,0 +1,258 @@
+"""Monte Carlo uncertainty of fleet cost, GHG and NPV under fuel, charter and revenue assumptions.
+
+Every uncertain input is a multiplier on its scenario value. The inputs are:
+- each `ALL_CHARTER_FACTORS` entry of a chartered route;
+- each route's fuel cost, revenue (`ROUTE_REVENUES_BY_YEAR`) and GHG.
+
+Each input group gets one `InputDistribution`. All distributions have mean 1 and
+a standard deviation of `spread_percent` / 100. Correlations use a Gaussian copula:
+- One matrix covers every input variable. Variables of the same group share
+  `route_correlation`; variables of different groups take the pair's entry in
+  `input_correlations`.
+- Correlated standard normals are mapped onto each marginal.
+
+Samples are drawn and evaluated `chunk_size` at a time with `evaluate_batch`.
+Each chunk is folded into running sums, benchmark counts and fixed-bin
+histograms, then dropped. Memory therefore depends on the chunk size, not the
+sample count. NPV follows the dashboard's projection (investment = TCO over the
+asset lifespan). The projected annual cash flow scales with each sample's
+revenue (a constant margin), less its fuel and charter cost increase over the
+scenario.
+
+    python fleet_montecarlo.py --year 2040 --samples 1000000
+"""
+import argparse
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from fleet_data import ANALYSIS_LIFESPAN_YEARS, BENCHMARK_2024, BENCHMARK_YEAR, YEAR_OPTIONS
+from fleet_engine import BENCHMARK_TOTAL_KEYS, ROUTE_DISPLAY_NAMES, Scenario, ScenarioBatch, charter_factors_for_year, evaluate_batch, route_revenues_for_year
+from fleet_finance import PROJECTED_ANNUAL_NET_CASH_FLOW, npv
+
+DISTRIBUTION_KINDS = ("normal", "lognormal", "triangular", "uniform")
+UNCERTAIN_INPUTS = {"fuel": "Fuel Cost", "charter_factor": "Charter Factors", "revenue": "Route Revenue", "ghg": "GHG"}
+# Metric key -> label; keys shared with BENCHMARK_TOTAL_KEYS are compared against BENCHMARK_2024, "total_cost" against the sum of its parts.
+MONTE_CARLO_METRICS = {
+    "total_cost": "Fleet Cost (M USD)", "total_tco": "Fleet TCO (M USD)", "total_ghg": "Fleet GHG (M Tons CO2e)", "total_charter_cost": "Charter Cost (M USD)",
+    "total_fuel": "Fuel Cost (M USD)", "total_revenue": "Revenue (M USD)", "npv": "NPV (M USD)",
+}
+BENCHMARK_VALUES = {**{name: BENCHMARK_2024[key] for name, key in BENCHMARK_TOTAL_KEYS.items()},
+                    "total_cost": sum(BENCHMARK_2024[BENCHMARK_TOTAL_KEYS[name]] for name in ("total_tco", "total_charter_cost", "total_fuel"))}
+HIGHER_IS_BETTER = {"total_revenue"}
+HISTOGRAM_BINS = 4096
+PERCENTILE_GRID = np.arange(101)
+# Each chunk holds ~1.5 KiB of draws and temporaries per sample; 20k samples kept throughput at its best with a ~32 MiB peak (50k: ~79 MiB).
+MONTE_CARLO_CHUNK_SIZE = 20_000
+
+
+@dataclass(frozen=True)
+class InputDistribution:
+    """Multiplier on an input's scenario value: mean 1, standard deviation `spread_percent` / 100, clipped at 0."""
+    kind: str = "normal"
+    spread_percent: float = 10.0
+
+    def __post_init__(self):
+        if self.kind not in DISTRIBUTION_KINDS: raise ValueError(f"kind must be one of {DISTRIBUTION_KINDS}, got {self.kind!r}")
+        if self.spread_percent < 0: raise ValueError(f"spread_percent must be >= 0, got {self.spread_percent}")
+
+    def multipliers(self, z):
+        """Multipliers for standard-normal draws `z` (the copula keeps their rank correlation)."""
+        spread = self.spread_percent / 100.0
+        if self.kind == "normal": values = 1.0 + spread * z
+        elif self.kind == "lognormal": sigma = np.sqrt(np.log1p(spread ** 2)); values = np.exp(sigma * z - sigma ** 2 / 2)
+        elif self.kind == "uniform": values = 1.0 + spread * np.sqrt(3.0) * (2.0 * normal_cdf(z) - 1.0)
+        else:
+            # Symmetric triangular on 1 +/- h with h = spread * sqrt(6), by its inverse CDF; min(u, 1 - u) is the lower tail at -|z|.
+            values = 1.0 + np.sign(z) * spread * np.sqrt(6.0) * (1.0 - np.sqrt(2.0 * normal_cdf(-np.abs(z))))
+        return np.maximum(values, 0.0)
+
+
+DEFAULT_DISTRIBUTIONS = {"fuel": InputDistribution("lognormal", 20.0), "charter_factor": InputDistribution("triangular", 15.0),
+                         "revenue": InputDistribution("normal", 10.0), "ghg": InputDistribution("normal", 5.0)}
+DEFAULT_ROUTE_CORRELATION = 0.5
+DEFAULT_INPUT_CORRELATIONS = {("fuel", "charter_factor"): 0.3, ("fuel", "revenue"): 0.0, ("charter_factor", "revenue"): 0.0, ("fuel", "ghg"): 0.0}
+
+
+def normal_cdf(z):
+    """Standard normal CDF via the Abramowitz-Stegun 7.1.26 erf approximation (|error| < 1.5e-7); SciPy is not a dependency."""
+    x = np.abs(z) / np.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.3275911 * x)
+    erf = 1.0 - t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429)))) * np.exp(-x * x)
+    return 0.5 * (1.0 + np.copysign(erf, z))
+
+
+def correlation_matrix(groups, route_correlation=0.0, input_correlations=None):
+    """(k, k) correlation of k input variables from their group names; `input_correlations` maps (group, group) pairs in either order."""
+    groups = np.asarray(groups)
+    cross = {frozenset(pair): rho for pair, rho in (input_correlations or {}).items()}
+    corr = np.array([[route_correlation if a == b else cross.get(frozenset((a, b)), 0.0) for b in groups] for a in groups], dtype=float).reshape(len(groups), len(groups))
+    np.fill_diagonal(corr, 1.0)
+    return corr
+
+
+def correlation_factor(corr):
+    """L with L @ L.T == corr, via an eigendecomposition so singular (e.g. fully correlated) matrices work; raises ValueError if not positive semidefinite."""
+    if corr.size == 0: return corr
+    if np.any(np.abs(corr) > 1 + 1e-12): raise ValueError("correlations must lie in [-1, 1]")
+    eigenvalues, eigenvectors = np.linalg.eigh(corr)
+    if eigenvalues.min() < -1e-9: raise ValueError(f"the correlations are inconsistent (not a valid correlation matrix, smallest eigenvalue {eigenvalues.min():.3f})")
+    return eigenvectors * np.sqrt(np.clip(eigenvalues, 0.0, None))
+
+
+@dataclass
+class MonteCarloResult:
+    """Summary of a Monte Carlo run: per-metric base value, mean, std, percentiles on `PERCENTILE_GRID` and P(beating `BENCHMARK_2024`)."""
+    year: int
+    samples: int
+    chunks: int
+    chunk_size: int
+    variables: list
+    base: dict
+    mean: dict
+    std: dict
+    percentile_grid: dict
+    beat_benchmark: dict
+    beat_all_benchmarks: float
+    seconds: float
+    settings: dict = field(default_factory=dict)
+
+    @property
+    def samples_per_second(self):
+        return self.samples / self.seconds if self.seconds > 0 else float("inf")
+
+    def percentile(self, metric, q):
+        """Percentile(s) `q` (0-100) of `metric`, interpolated on the stored grid."""
+        return np.interp(q, PERCENTILE_GRID, self.percentile_grid[metric])
+
+    def to_frame(self, percentiles=(5, 25, 50, 75, 95)):
+        rows = []
+        for name, label in MONTE_CARLO_METRICS.items():
+            row = {"Metric": label, "Scenario": self.base[name], "Mean": self.mean[name], "Std": self.std[name]}
+            row |= {f"P{q:g}": value for q, value in zip(percentiles, self.percentile(name, percentiles))}
+            row[f"P(Beats {BENCHMARK_YEAR})"] = self.beat_benchmark.get(name, np.nan)
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    def __str__(self):
+        return f"{self.samples:,} samples of {len(self.variables)} inputs in {self.seconds:.3f}s ({self.samples_per_second:,.0f} samples/s, {self.chunks} chunks of <= {self.chunk_size:,})"
+
+
+def _input_cells(scenario, factors, revenues):
+    """(group per multiplier column, {group: slice of columns}, labels of the inputs that can move) for the column layout fuel | charter factors | revenue | GHG."""
+    n_routes = len(ROUTE_DISPLAY_NAMES)
+    sizes = {"fuel": n_routes, "charter_factor": 2 * n_routes, "revenue": n_routes, "ghg": n_routes}
+    bounds = np.cumsum([0, *sizes.values()])
+    slices = {group: slice(bounds[idx], bounds[idx + 1]) for idx, group in enumerate(sizes)}
+    labels = [f"Fuel Cost: {ROUTE_DISPLAY_NAMES[idx]}" for idx in np.flatnonzero(scenario.fuel != 0)]
+    labels += [f"Charter Factor {factor_idx + 1}: {ROUTE_DISPLAY_NAMES[route_idx]}" for route_idx, factor_idx in zip(*np.nonzero(~np.isnan(factors) & (factors != 0) & (scenario.charter[:, None] > 0)))]
+    labels += [f"Route Revenue: {ROUTE_DISPLAY_NAMES[idx]}" for idx in np.flatnonzero(revenues != 0)]
+    labels += [f"GHG: {ROUTE_DISPLAY_NAMES[idx]}" for idx in np.flatnonzero(scenario.ghg != 0)]
+    return np.repeat(list(sizes), list(sizes.values())), slices, labels
+
+
+def simulate(scenario, distributions=None, route_correlation=0.0, input_correlations=None, samples=100_000, discount_rate_percent=5.0,
+             analysis_period_years=ANALYSIS_LIFESPAN_YEARS, seed=0, chunk_size=MONTE_CARLO_CHUNK_SIZE):
+    """Draw `samples` correlated input multipliers around `scenario` and summarise fleet cost, GHG, NPV and P(beating the benchmark)."""
+    start = time.perf_counter()
+    distributions = DEFAULT_DISTRIBUTIONS | (distributions or {})
+    factors, revenues = charter_factors_for_year(scenario.year), route_revenues_for_year(scenario.year)
+    # Every route cell gets a multiplier column, zero or not: a multiplier on 0 (or a NaN factor, or an unchartered route) changes nothing,
+    # and contiguous column blocks per input avoid scattering multipliers into the route arrays.
+    groups, slices, labels = _input_cells(scenario, factors, revenues)
+    loading = correlation_factor(correlation_matrix(groups, route_correlation, input_correlations))
+    base_totals = evaluate_batch(ScenarioBatch.stack([scenario]))
+    base = {"total_tco": base_totals.total_tco[0], "total_ghg": base_totals.total_ghg[0], "total_charter_cost": base_totals.total_charter_cost[0],
+            "total_fuel": base_totals.total_fuel[0], "total_revenue": float(revenues.sum())}
+    base["total_cost"] = base["total_tco"] + base["total_charter_cost"] + base["total_fuel"]
+    base["npv"] = float(npv(base["total_tco"] * ANALYSIS_LIFESPAN_YEARS, PROJECTED_ANNUAL_NET_CASH_FLOW, discount_rate_percent / 100.0, analysis_period_years))
+
+    rng = np.random.default_rng(seed)
+    metric_names = list(MONTE_CARLO_METRICS)
+    totals, squares = np.zeros(len(metric_names)), np.zeros(len(metric_names))
+    beat_counts, beat_all_count = dict.fromkeys(BENCHMARK_VALUES, 0), 0
+    counts = np.zeros((len(metric_names), HISTOGRAM_BINS), dtype=np.int64)
+    low = high = lowest = highest = None
+    n_chunks = 0
+    for chunk_start in range(0, samples, chunk_size):
+        n = min(chunk_size, samples - chunk_start); n_chunks += 1
+        z = rng.standard_normal((n, len(groups))) @ loading.T
+        multipliers = {group: distributions[group].multipliers(z[:, cells]) for group, cells in slices.items()}
+        revenue = revenues * multipliers["revenue"]
+        batch = ScenarioBatch(scenario.year, np.broadcast_to(scenario.owned, (n, *scenario.owned.shape)), np.broadcast_to(scenario.charter.astype(float), (n, len(scenario.charter))),
+                              np.broadcast_to(scenario.tco.astype(float), (n, len(scenario.tco))), scenario.ghg * multipliers["ghg"], scenario.fuel * multipliers["fuel"])
+        factor_stack = factors * multipliers["charter_factor"].reshape(n, *factors.shape)
+        chunk_totals = evaluate_batch(batch, factor_stack)
+        chunk = {"total_tco": chunk_totals.total_tco, "total_ghg": chunk_totals.total_ghg, "total_charter_cost": chunk_totals.total_charter_cost,
+                 "total_fuel": chunk_totals.total_fuel, "total_revenue": revenue.sum(axis=1)}
+        chunk["total_cost"] = chunk["total_tco"] + chunk["total_charter_cost"] + chunk["total_fuel"]
+        revenue_ratio = chunk["total_revenue"] / base["total_revenue"] if base["total_revenue"] else 1.0
+        cash_flow = PROJECTED_ANNUAL_NET_CASH_FLOW * revenue_ratio - (chunk["total_fuel"] - base["total_fuel"]) - (chunk["total_charter_cost"] - base["total_charter_cost"])
+        chunk["npv"] = npv(chunk["total_tco"] * ANALYSIS_LIFESPAN_YEARS, cash_flow, discount_rate_percent / 100.0, analysis_period_years)
+        values = np.stack([np.broadcast_to(chunk[name], (n,)) for name in metric_names])
+        totals += values.sum(axis=1); squares += (values ** 2).sum(axis=1)
+        beats = {name: chunk[name] > target if name in HIGHER_IS_BETTER else chunk[name] < target for name, target in BENCHMARK_VALUES.items()}
+        for name, beat in beats.items(): beat_counts[name] += int(np.count_nonzero(beat))
+        beat_all_count += int(np.count_nonzero(np.logical_and.reduce([beats[name] for name in ("total_tco", "total_ghg", "total_charter_cost", "total_fuel")])))
+        # Histogram ranges come from the first chunk with 50% headroom each side; later outliers land in the edge bins, and min/max are tracked exactly.
+        if low is None:
+            lowest, highest = values.min(axis=1), values.max(axis=1)
+            pad = np.maximum((highest - lowest) * 0.5, np.maximum(np.abs(highest), 1.0) * 1e-9)
+            low, high = lowest - pad, highest + pad
+        lowest, highest = np.minimum(lowest, values.min(axis=1)), np.maximum(highest, values.max(axis=1))
+        bins = np.clip(((values - low[:, None]) / (high - low)[:, None] * HISTOGRAM_BINS).astype(np.int64), 0, HISTOGRAM_BINS - 1)
+        counts += np.bincount((bins + np.arange(len(metric_names))[:, None] * HISTOGRAM_BINS).ravel(), minlength=len(metric_names) * HISTOGRAM_BINS).reshape(counts.shape)
+
+    mean = totals / max(samples, 1)
+    std = np.sqrt(np.maximum(squares / max(samples, 1) - mean ** 2, 0.0))
+    edges = low[:, None] + (high - low)[:, None] * np.arange(HISTOGRAM_BINS + 1) / HISTOGRAM_BINS
+    cdf = np.concatenate([np.zeros((len(metric_names), 1)), np.cumsum(counts, axis=1)], axis=1) / max(samples, 1)
+    percentile_grid = {name: np.clip(np.interp(PERCENTILE_GRID / 100.0, cdf[idx], edges[idx]), lowest[idx], highest[idx]) for idx, name in enumerate(metric_names)}
+    settings = {"distributions": {group: (dist.kind, dist.spread_percent) for group, dist in distributions.items()}, "route_correlation": route_correlation,
+                "input_correlations": {f"{a}/{b}": rho for (a, b), rho in (input_correlations or {}).items()}, "discount_rate_percent": discount_rate_percent,
+                "analysis_period_years": analysis_period_years, "seed": seed}
+    return MonteCarloResult(
+        year=scenario.year, samples=samples, chunks=n_chunks, chunk_size=chunk_size, variables=labels, base=base,
+        mean=dict(zip(metric_names, mean)), std=dict(zip(metric_names, std)), percentile_grid=percentile_grid,
+        beat_benchmark={name: count / max(samples, 1) for name, count in beat_counts.items()}, beat_all_benchmarks=beat_all_count / max(samples, 1),
+        seconds=time.perf_counter() - start, settings=settings,
+    )
+
+
+def with_percentile_band(fig, result, metric, category, low=5, high=95):
+    """Copy of a benchmark bar chart with the P`low`-P`high` band and median of `metric` drawn on the `category` bar."""
+    # Copy through the plain spec without its template: the dashboard's charts use the default template, which plotly fills in again
+    # on serialization, and re-validating it in the copy costs ~20 ms per chart.
+    spec = fig.to_plotly_json()
+    band = go.Figure(data=spec["data"], layout={key: value for key, value in spec["layout"].items() if key != "template"})
+    p_low, p50, p_high = result.percentile(metric, [low, 50, high])
+    band.add_trace(go.Scatter(
+        x=[category], y=[p50], mode="markers", marker=dict(color="black", symbol="line-ew-open", size=18), name=f"P{low}-P{high}", showlegend=False,
+        error_y=dict(type="data", symmetric=False, array=[p_high - p50], arrayminus=[p50 - p_low], color="black", thickness=2, width=10),
+        hovertemplate=f"P{low} {p_low:,.2f}<br>P50 {p50:,.2f}<br>P{high} {p_high:,.2f}<br>P(beats {BENCHMARK_YEAR}) {result.beat_benchmark[metric]:.1%}<extra></extra>",
+    ))
+    return band
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo uncertainty of fleet cost, GHG and NPV for a year's default scenario.")
+    parser.add_argument("--year", type=int, choices=YEAR_OPTIONS, default=YEAR_OPTIONS[0])
+    parser.add_argument("--samples", type=int, default=100_000)
+    parser.add_argument("--chunk-size", type=int, default=MONTE_CARLO_CHUNK_SIZE)
+    parser.add_argument("--route-correlation", type=float, default=DEFAULT_ROUTE_CORRELATION, help="Correlation between routes of the same input.")
+    parser.add_argument("--fuel-charter-correlation", type=float, default=DEFAULT_INPUT_CORRELATIONS[("fuel", "charter_factor")])
+    parser.add_argument("--discount-rate", type=float, default=5.0, help="Discount rate in percent.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    result = simulate(Scenario.from_defaults(args.year), route_correlation=args.route_correlation, input_correlations=DEFAULT_INPUT_CORRELATIONS | {("fuel", "charter_factor"): args.fuel_charter_correlation},
+                      samples=args.samples, discount_rate_percent=args.discount_rate, seed=args.seed, chunk_size=args.chunk_size)
+    print(result)
+    print(result.to_frame().round(3).to_string(index=False))
+    print(f"P(beating every {BENCHMARK_YEAR} benchmark chart: TCO, GHG, charter and fuel cost) = {result.beat_all_benchmarks:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""Fleet composition optimizer: integer owned/charter counts per route and category for one year.
+
+Each route must be served by `demand` vessels (owned + chartered, default: the
+year's default fleet). The optimizer minimises annualised TCO + charter + fuel
+cost subject to any of: a fleet GHG cap, a fleet GFI limit (e.g. a
+`GFI_COMPLIANCE_ZONES_DF` boundary) or a worst allowed CII rating per route.
+Per-vessel figures come from the pathway model in `fleet_pathway`. Charter
+costs use `ALL_CHARTER_FACTORS` and revenue uses `ROUTE_REVENUES_BY_YEAR`.
+
+The reference data has no cost split by ship category, so owned vessels on a
+route cost the same whatever their category, unless `category_cost_premium` is
+given. The search is exact. Each route's integer compositions are enumerated as
+one array. Categories that are dominated on cost and GHG are dropped first, and
+only the route's Pareto frontier of (cost, constrained quantities) is kept.
+Frontiers are then merged route by route; partial fleets that can no longer meet
+the GHG/GFI limits are pruned as they go.
+"""
+import math
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from fleet_compliance import CII_RATING_LABELS, ROUTE_CII_TYPE_INDEX, rate_cii
+from fleet_data import GFI_COMPLIANCE_ZONES_DF, OWNED_SHIP_CATEGORIES_BY_YEAR, ROUTE_KEYS
+from fleet_engine import CHARTER_FACTOR_MATRIX, CHARTER_FACTOR_YEARS, REVENUE_MATRIX, REVENUE_YEARS, ROUTE_DISPLAY_NAMES
+from fleet_pathway import (
+    CATEGORY_CII, DEFAULT_ANCHOR_YEARS, DEFAULT_CHARTER_BY_ANCHOR, DEFAULT_OWNED_BY_ANCHOR, GFI_PER_CII, PATHWAY_CATEGORIES, PATHWAY_CATEGORY_INDEX,
+    PATHWAY_START_YEAR, PATHWAY_YEARS, PER_VESSEL_BY_YEAR, VESSEL_WORK_BY_YEAR, fleet_gfi_from, interpolate_years,
+)
+
+GFI_LIMIT_COLUMNS = {"base": "GFI Base", "dc": "GFI DC", "credit": "GFI_Credit_Upper_Limit"}
+# Owned compositions enumerated per route, C(demand + categories, categories); the default fleets need at most a few thousand.
+MAX_ROUTE_COMPOSITIONS = 1_000_000
+
+
+def gfi_zone_limit(year, boundary="dc"):
+    """GFI value at a `GFI_COMPLIANCE_ZONES_DF` boundary ('base', 'dc' or 'credit') for `year`."""
+    rows = GFI_COMPLIANCE_ZONES_DF[GFI_COMPLIANCE_ZONES_DF["Year"] == year]
+    if rows.empty: raise ValueError(f"no GFI compliance zones for {year}")
+    return float(rows.iloc[0][GFI_LIMIT_COLUMNS[boundary]])
+
+
+def _year_categories(year):
+    """Ship categories offered in `year`: those of the latest scenario year up to `year` (earliest before that)."""
+    scenario_years = sorted(OWNED_SHIP_CATEGORIES_BY_YEAR)
+    earlier = [scenario_year for scenario_year in scenario_years if scenario_year <= year]
+    return OWNED_SHIP_CATEGORIES_BY_YEAR[earlier[-1] if earlier else scenario_years[0]]
+
+
+@dataclass
+class CompositionProblem:
+    """Per-route demand/charter limits and per-vessel figures; (routes, categories) arrays follow `PATHWAY_CATEGORIES`."""
+    year: int
+    demand: np.ndarray
+    charter_max: np.ndarray
+    available: np.ndarray
+    tco_per_vessel: np.ndarray
+    fuel_per_vessel: np.ndarray
+    ghg_per_vessel: np.ndarray
+    cii: np.ndarray
+    charter_rate: np.ndarray
+    revenue: np.ndarray
+    work_per_vessel: np.ndarray
+    gfi_per_cii: float
+
+    @classmethod
+    def for_year(cls, year, demand=None, charter_max=None, category_cost_premium=None):
+        """Problem for `year` from the reference tables.
+
+        `demand` and `charter_max` default to the default fleet (owned + charter) and default charter counts for the year;
+        `category_cost_premium` is an optional {category: fractional premium on TCO and fuel}.
+        """
+        year_idx = int(np.clip(year - PATHWAY_START_YEAR, 0, len(PATHWAY_YEARS) - 1))
+        default_charter = np.rint(interpolate_years(DEFAULT_ANCHOR_YEARS, DEFAULT_CHARTER_BY_ANCHOR, [year])[0])
+        default_owned = np.rint(interpolate_years(DEFAULT_ANCHOR_YEARS, DEFAULT_OWNED_BY_ANCHOR, [year])[0]).sum(axis=1)
+        revenue = interpolate_years(REVENUE_YEARS, REVENUE_MATRIX, [year])[0]
+        demand = np.where(revenue > 0, default_owned + default_charter, 0) if demand is None else np.asarray(demand)
+        factors = interpolate_years(CHARTER_FACTOR_YEARS, CHARTER_FACTOR_MATRIX, [year])[0]
+        has_factors = ~np.isnan(factors).any(axis=1)
+        charter_max = default_charter if charter_max is None else np.asarray(charter_max)
+        available = np.zeros((len(ROUTE_KEYS), len(PATHWAY_CATEGORIES)), dtype=bool)
+        available[:, [PATHWAY_CATEGORY_INDEX[cat] for cat in _year_categories(year)]] = True
+        premium = np.zeros(len(PATHWAY_CATEGORIES))
+        for cat, value in (category_cost_premium or {}).items(): premium[PATHWAY_CATEGORY_INDEX[cat]] = value
+        cii = CATEGORY_CII[year_idx]
+        work = VESSEL_WORK_BY_YEAR[year_idx]
+        return cls(
+            year=year, demand=demand.astype(np.int64), charter_max=np.where(has_factors, charter_max, 0).astype(np.int64), available=available,
+            tco_per_vessel=PER_VESSEL_BY_YEAR["tco"][year_idx][:, None] * (1 + premium), fuel_per_vessel=PER_VESSEL_BY_YEAR["fuel"][year_idx][:, None] * (1 + premium),
+            ghg_per_vessel=work[:, None] * cii, cii=cii, charter_rate=np.where(has_factors, np.nan_to_num(factors[:, 0] * factors[:, 1]), 0.0),
+            revenue=revenue, work_per_vessel=work, gfi_per_cii=float(GFI_PER_CII[year_idx]),
+        )
+
+    def fleet_gfi(self, owned):
+        """Fleet GFI of (routes, categories) owned counts: fleet GHG per unit of transport work, times `gfi_per_cii`."""
+        owned = np.asarray(owned)
+        return float(fleet_gfi_from((owned * self.ghg_per_vessel).sum(), (owned.sum(axis=1) * self.work_per_vessel).sum(), self.gfi_per_cii))
+
+
+@dataclass
+class CompositionResult:
+    """Chosen fleet plus solver statistics; route arrays are (routes,), `owned` is (routes, PATHWAY_CATEGORIES)."""
+    year: int
+    feasible: bool
+    owned: np.ndarray
+    charter: np.ndarray
+    tco: np.ndarray
+    fuel: np.ndarray
+    ghg: np.ndarray
+    charter_cost: np.ndarray
+    revenue: np.ndarray
+    fleet_gfi: float
+    cii_rating: np.ndarray
+    candidates_evaluated: int
+    solve_seconds: float
+    constraints: dict = field(default_factory=dict)
+
+    @property
+    def total_cost(self):
+        return float((self.tco + self.fuel + self.charter_cost).sum())
+
+    @property
+    def total_ghg(self):
+        return float(self.ghg.sum())
+
+    def owned_for_year(self, year=None):
+        """Owned counts as (routes, categories of `year`) for `FleetState`; defaults to the result's year."""
+        categories = OWNED_SHIP_CATEGORIES_BY_YEAR[year or self.year]
+        return self.owned[:, [PATHWAY_CATEGORY_INDEX[cat] for cat in categories]]
+
+    def route_table(self):
+        composition = [", ".join(f"{count} {PATHWAY_CATEGORIES[cat_idx]}" for cat_idx, count in enumerate(row) if count) or "-" for row in self.owned.tolist()]
+        letters = np.array(CII_RATING_LABELS + ("-",))[self.cii_rating]
+        return pd.DataFrame({
+            "Route": ROUTE_DISPLAY_NAMES, "Owned Composition": composition, "Charter Vessels": self.charter, "TCO (M USD)": self.tco,
+            "Fuel Cost (M USD)": self.fuel, "Charter Cost (M USD)": self.charter_cost, "GHG (M Tons CO2e)": self.ghg,
+            "Margin (M USD)": self.revenue - self.tco - self.fuel - self.charter_cost, "CII Rating": letters,
+        })
+
+
+def _compositions(total, parts):
+    """(n, parts) non-negative integer rows with row sums <= total."""
+    rows = np.zeros((1, 0), dtype=np.int64); used = np.zeros(1, dtype=np.int64)
+    for _ in range(parts):
+        repeat = total - used + 1
+        counts = np.arange(repeat.sum()) - np.repeat(np.cumsum(repeat) - repeat, repeat)
+        rows = np.column_stack([np.repeat(rows, repeat, axis=0), counts]); used = np.repeat(used, repeat) + counts
+    return rows
+
+
+def _pareto(cost, resource):
+    """Indices of the points not dominated on (cost, resource); the cheapest point if `resource` is None."""
+    if resource is None: return np.argsort(cost, kind="stable")[:1]
+    order = np.lexsort((resource, cost))
+    sorted_resource = resource[order]
+    best_before = np.minimum.accumulate(np.concatenate([[np.inf], sorted_resource[:-1]]))
+    return order[sorted_resource < best_before]
+
+
+def _pareto_categories(problem, route_idx):
+    """Available categories of a route not dominated on (cost, GHG) by another available category."""
+    cats = np.flatnonzero(problem.available[route_idx])
+    cost = problem.tco_per_vessel[route_idx, cats] + problem.fuel_per_vessel[route_idx, cats]
+    return cats[_pareto(cost, problem.ghg_per_vessel[route_idx, cats])]
+
+
+def optimize_composition(problem, ghg_cap=None, gfi_limit=None, max_cii_rating=None):
+    """Cheapest integer fleet for `problem` meeting the given constraints (None = unconstrained).
+
+    `ghg_cap` is in M tons CO2e and `gfi_limit` a fleet GFI value (see `gfi_zone_limit`); give at most one of them.
+    `max_cii_rating` is the worst allowed letter for any route with owned vessels and combines with either.
+    Raises ValueError if a route has more than `MAX_ROUTE_COMPOSITIONS` owned compositions to enumerate.
+    """
+    if ghg_cap is not None and gfi_limit is not None: raise ValueError("give either ghg_cap or gfi_limit, not both")
+    start = time.perf_counter()
+    n_routes = len(ROUTE_KEYS)
+    # Fleet-coupling resource per route: GHG for a cap, or GHG - limit / GFI_PER_CII * work, whose fleet sum is <= 0 iff GFI <= limit.
+    limit = ghg_cap if ghg_cap is not None else (0.0 if gfi_limit is not None else None)
+    max_rating = None if max_cii_rating is None else CII_RATING_LABELS.index(max_cii_rating)
+    candidates = 0
+    route_options = []
+    for route_idx in range(n_routes):
+        cats = _pareto_categories(problem, route_idx)
+        demand, charter_max = int(problem.demand[route_idx]), int(problem.charter_max[route_idx])
+        if math.comb(demand + len(cats), len(cats)) > MAX_ROUTE_COMPOSITIONS:
+            raise ValueError(f"{ROUTE_DISPLAY_NAMES[route_idx]}: a demand of {demand} vessels over {len(cats)} categories gives "
+                             f"{math.comb(demand + len(cats), len(cats)):,} compositions (limit {MAX_ROUTE_COMPOSITIONS:,}); lower the demand")
+        owned = _compositions(demand, len(cats))
+        charter = demand - owned.sum(axis=1)
+        owned = owned[charter <= charter_max]; charter = charter[charter <= charter_max]
+        candidates += len(owned)
+        route_owned = owned.sum(axis=1)
+        cost = owned @ (problem.tco_per_vessel[route_idx, cats] + problem.fuel_per_vessel[route_idx, cats]) + charter * problem.charter_rate[route_idx]
+        ghg = owned @ problem.ghg_per_vessel[route_idx, cats]
+        if max_rating is not None:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                attained = np.where(route_owned > 0, owned @ problem.cii[route_idx, cats] / route_owned, np.nan)
+            ok = np.isnan(attained) | (rate_cii(ROUTE_CII_TYPE_INDEX[route_idx], problem.year, attained) <= max_rating)
+            owned, charter, cost, ghg, route_owned = owned[ok], charter[ok], cost[ok], ghg[ok], route_owned[ok]
+        resource = ghg if ghg_cap is not None else (ghg - gfi_limit / problem.gfi_per_cii * problem.work_per_vessel[route_idx] * route_owned if gfi_limit is not None else None)
+        keep = _pareto(cost, resource)
+        full_owned = np.zeros((len(keep), len(PATHWAY_CATEGORIES)), dtype=np.int64); full_owned[:, cats] = owned[keep]
+        route_options.append({"owned": full_owned, "charter": charter[keep], "cost": cost[keep], "resource": np.zeros(len(keep)) if resource is None else resource[keep]})
+
+    # Merge the route frontiers; drop partial fleets that cannot meet the limit even with the leanest remaining routes.
+    min_remaining = np.zeros(n_routes + 1)
+    for route_idx in range(n_routes - 1, -1, -1):
+        options = route_options[route_idx]
+        min_remaining[route_idx] = min_remaining[route_idx + 1] + (options["resource"].min() if len(options["cost"]) else np.inf)
+    cost, resource, choice = np.zeros(1), np.zeros(1), np.zeros((1, 0), dtype=np.int64)
+    for route_idx, options in enumerate(route_options):
+        candidates += len(cost) * len(options["cost"])
+        cost = (cost[:, None] + options["cost"][None, :]).ravel()
+        resource = (resource[:, None] + options["resource"][None, :]).ravel()
+        choice = np.column_stack([np.repeat(choice, len(options["cost"]), axis=0), np.tile(np.arange(len(options["cost"])), len(choice))])
+        reachable = resource + min_remaining[route_idx + 1] <= (np.inf if limit is None else limit + 1e-9)
+        if not reachable.any(): break
+        keep = _pareto(cost[reachable], None if limit is None else resource[reachable])
+        cost, resource, choice = cost[reachable][keep], resource[reachable][keep], choice[reachable][keep]
+    feasible = choice.shape[1] == n_routes and len(cost) > 0
+    best = int(np.argmin(cost)) if feasible else None
+
+    owned = np.zeros((n_routes, len(PATHWAY_CATEGORIES)), dtype=np.int64); charter = np.zeros(n_routes, dtype=np.int64)
+    if feasible:
+        for route_idx, option_idx in enumerate(choice[best].tolist()):
+            owned[route_idx] = route_options[route_idx]["owned"][option_idx]; charter[route_idx] = route_options[route_idx]["charter"][option_idx]
+    route_owned = owned.sum(axis=1)
+    ghg = (owned * problem.ghg_per_vessel).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        attained = np.where(route_owned > 0, (owned * problem.cii).sum(axis=1) / route_owned, np.nan)
+    return CompositionResult(
+        year=problem.year, feasible=feasible, owned=owned, charter=charter, tco=(owned * problem.tco_per_vessel).sum(axis=1),
+        fuel=(owned * problem.fuel_per_vessel).sum(axis=1), ghg=ghg, charter_cost=charter * problem.charter_rate, revenue=problem.revenue,
+        fleet_gfi=problem.fleet_gfi(owned), cii_rating=rate_cii(ROUTE_CII_TYPE_INDEX, problem.year, attained),
+        candidates_evaluated=int(candidates), solve_seconds=time.perf_counter() - start,
+        constraints={"ghg_cap": ghg_cap, "gfi_limit": gfi_limit, "max_cii_rating": max_cii_rating},
+    )
@@ -0,0 +1,286 @@
+"""Year-by-year transition pathway from the benchmark year to 2050.
+
+A `FleetTrajectory` gives the starting owned fleet plus yearly additions and
+retirements per route and ship category, over the union of the categories of
+every scenario year. Revenues, charter factors and the default per-vessel
+TCO/GHG/fuel figures are interpolated linearly between their anchor years
+(2024/2030/2040/2050, held flat outside them).
+
+GHG, CII and GFI share one intensity model. Each category's attained CII comes
+from the `PETROBRAS_CII_POINTS` label that describes it (`CII_POINT_LABEL_CATEGORIES`),
+falling back to the vessel type's baseline (VLSFO or the type-level point).
+- Each route has a transport work per owned vessel: the default per-vessel GHG
+  divided by the default mix's CII. Years in which a route owns no default
+  vessels hold the nearest year that does.
+- A vessel's GHG is its route's work times its category's CII.
+- The fleet GFI is the fleet's GHG per unit of work times `GFI_PER_CII`. That
+  factor is fitted to the `PETROBRAS_FLEET_GFI_POINTS` years and interpolated
+  between them, so it does not depend on the fleet being evaluated.
+The default fleets therefore reproduce the dashboard's GHG inputs and the
+Petrobras GFI points in their anchor years. Every year is evaluated in one pass
+of array operations.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from fleet_compliance import CII_RATING_LABELS, GFI_ZONE_LABELS, ROUTE_CII_TYPE_INDEX, gfi_zone, rate_cii
+from fleet_data import (
+    ALL_YEAR_DEFAULT_INPUTS, BENCHMARK_YEAR, CII_POINT_LABEL_CATEGORIES, CII_RATING_DATA_BY_TYPE, OWNED_SHIP_CATEGORIES_BY_YEAR,
+    PETROBRAS_CII_POINTS, PETROBRAS_FLEET_GFI_POINTS, ROUTE_CII_VESSEL_TYPES, ROUTE_KEYS, category_key,
+)
+from fleet_engine import CHARTER_FACTOR_MATRIX, CHARTER_FACTOR_YEARS, REVENUE_MATRIX, REVENUE_YEARS, ROUTE_DISPLAY_NAMES, route_charter_costs
+
+PATHWAY_START_YEAR = BENCHMARK_YEAR
+PATHWAY_END_YEAR = 2050
+PATHWAY_YEARS = np.arange(PATHWAY_START_YEAR, PATHWAY_END_YEAR + 1)
+# Every owned ship category of any scenario year, in order of first appearance.
+PATHWAY_CATEGORIES = tuple(dict.fromkeys(cat for year in sorted(OWNED_SHIP_CATEGORIES_BY_YEAR) for cat in OWNED_SHIP_CATEGORIES_BY_YEAR[year]))
+PATHWAY_CATEGORY_INDEX = {cat: idx for idx, cat in enumerate(PATHWAY_CATEGORIES)}
+DEFAULT_ANCHOR_YEARS = sorted(ALL_YEAR_DEFAULT_INPUTS)
+
+
+def interpolate_years(anchor_years, anchor_values, years):
+    """Linear interpolation of `anchor_values` (anchors, ...) along axis 0 at `years`, held flat outside the anchors."""
+    anchor_years = np.asarray(anchor_years, dtype=float); anchor_values = np.asarray(anchor_values, dtype=float)
+    years = np.asarray(years, dtype=float)
+    if len(anchor_years) == 1: return np.broadcast_to(anchor_values[0], (len(years),) + anchor_values.shape[1:]).copy()
+    lower = np.clip(np.searchsorted(anchor_years, years, side="right") - 1, 0, len(anchor_years) - 2)
+    weight = np.clip((years - anchor_years[lower]) / (anchor_years[lower + 1] - anchor_years[lower]), 0.0, 1.0)
+    weight = weight.reshape((-1,) + (1,) * (anchor_values.ndim - 1))
+    return anchor_values[lower] * (1 - weight) + anchor_values[lower + 1] * weight
+
+
+def _interpolate_columns(anchor_years, anchor_values, years, fill=np.nan):
+    """Like `interpolate_years` for (anchors, columns), but each column only uses its non-NaN anchors."""
+    result = np.full((len(years), anchor_values.shape[1]), fill, dtype=float)
+    for col in range(anchor_values.shape[1]):
+        known = ~np.isnan(anchor_values[:, col])
+        if known.any(): result[:, col] = np.interp(years, np.asarray(anchor_years)[known], anchor_values[known, col])
+    return result
+
+
+# --- Default fleets on the union category axis ---
+def _default_fleet_arrays():
+    owned = np.zeros((len(DEFAULT_ANCHOR_YEARS), len(ROUTE_KEYS), len(PATHWAY_CATEGORIES)))
+    route_values = {field: np.zeros((len(DEFAULT_ANCHOR_YEARS), len(ROUTE_KEYS))) for field in ("charter", "tco", "ghg", "total_fuel_cost_route")}
+    for year_idx, year in enumerate(DEFAULT_ANCHOR_YEARS):
+        for route_idx, route_key in enumerate(ROUTE_KEYS):
+            route_data = ALL_YEAR_DEFAULT_INPUTS[year].get(route_key, {})
+            for cat in OWNED_SHIP_CATEGORIES_BY_YEAR[year]:
+                owned[year_idx, route_idx, PATHWAY_CATEGORY_INDEX[cat]] = route_data.get("owned_ships", {}).get(category_key(cat), 0)
+            for field, values in route_values.items(): values[year_idx, route_idx] = route_data.get(field, 0.0)
+    return owned, route_values
+
+
+DEFAULT_OWNED_BY_ANCHOR, _DEFAULT_ROUTE_VALUES = _default_fleet_arrays()
+DEFAULT_CHARTER_BY_ANCHOR = _DEFAULT_ROUTE_VALUES["charter"]
+
+
+def _per_vessel_intensities():
+    """(years, routes) default TCO/GHG/fuel per owned vessel, interpolated over the anchors where a route owns vessels."""
+    route_owned = DEFAULT_OWNED_BY_ANCHOR.sum(axis=2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {field: _interpolate_columns(DEFAULT_ANCHOR_YEARS, np.where(route_owned > 0, _DEFAULT_ROUTE_VALUES[source] / route_owned, np.nan), PATHWAY_YEARS, fill=0.0)
+                for field, source in (("tco", "tco"), ("ghg", "ghg"), ("fuel", "total_fuel_cost_route"))}
+
+
+PER_VESSEL_BY_YEAR = _per_vessel_intensities()
+
+
+# --- CII / GFI reference arrays over PATHWAY_YEARS ---
+def _category_cii_by_type():
+    """{vessel type: (years, categories) attained CII per category}."""
+    anchors = sorted(PETROBRAS_CII_POINTS)
+    tables = {}
+    for vessel_type in CII_RATING_DATA_BY_TYPE:
+        values = np.full((len(anchors), len(PATHWAY_CATEGORIES)), np.nan)
+        for anchor_idx, year in enumerate(anchors):
+            points = PETROBRAS_CII_POINTS[year].get(vessel_type, {})
+            type_level = [value for label, value in points.items() if label not in CII_POINT_LABEL_CATEGORIES]
+            baseline = points.get("VLSFO", type_level[0] if type_level else np.nan)
+            values[anchor_idx] = baseline
+            for label, value in points.items():
+                for cat in CII_POINT_LABEL_CATEGORIES.get(label, ()):
+                    if cat in PATHWAY_CATEGORY_INDEX: values[anchor_idx, PATHWAY_CATEGORY_INDEX[cat]] = value
+        tables[vessel_type] = _interpolate_columns(anchors, values, PATHWAY_YEARS)
+    return tables
+
+
+ROUTE_VESSEL_TYPES = tuple(ROUTE_CII_VESSEL_TYPES[route_key] for route_key in ROUTE_KEYS)
+_CII_BY_TYPE = _category_cii_by_type()
+# (years, routes, categories) attained CII of one vessel of each category on each route.
+CATEGORY_CII = np.stack([_CII_BY_TYPE[vessel_type] for vessel_type in ROUTE_VESSEL_TYPES], axis=1)
+
+
+def _weighted_cii(owned):
+    """(years, routes) owned-weighted mean CII; NaN where a route owns nothing."""
+    route_owned = owned.sum(axis=2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(route_owned > 0, (owned * CATEGORY_CII).sum(axis=2) / route_owned, np.nan)
+
+
+DEFAULT_OWNED_BY_YEAR = interpolate_years(DEFAULT_ANCHOR_YEARS, DEFAULT_OWNED_BY_ANCHOR, PATHWAY_YEARS)
+# CII of the default fleet mix, the reference the per-vessel GHG figures belong to.
+DEFAULT_MIX_CII = _weighted_cii(DEFAULT_OWNED_BY_YEAR)
+
+
+def _vessel_work():
+    """(years, routes) transport work per owned vessel (M t CO2e per unit of CII); years without a default mix hold the nearest defined year."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        work = PER_VESSEL_BY_YEAR["ghg"] / DEFAULT_MIX_CII
+    work = _interpolate_columns(PATHWAY_YEARS, work, PATHWAY_YEARS)
+    if np.isnan(work).any(): raise ValueError(f"no default owned vessels in any year for {[ROUTE_KEYS[idx] for idx in np.flatnonzero(np.isnan(work).any(axis=0))]}")
+    return work
+
+
+def _gfi_per_cii():
+    """(years,) fleet GFI per unit of fleet GHG per work, fitted to the default fleets in the Petrobras GFI point years."""
+    route_work = DEFAULT_OWNED_BY_YEAR.sum(axis=2) * VESSEL_WORK_BY_YEAR
+    default_intensity = (route_work * np.nan_to_num(DEFAULT_MIX_CII)).sum(axis=1) / route_work.sum(axis=1)
+    point_years = sorted(PETROBRAS_FLEET_GFI_POINTS)
+    factors = [PETROBRAS_FLEET_GFI_POINTS[year] / default_intensity[year - PATHWAY_START_YEAR] for year in point_years]
+    return np.interp(PATHWAY_YEARS, point_years, factors)
+
+
+VESSEL_WORK_BY_YEAR = _vessel_work()
+GFI_PER_CII = _gfi_per_cii()
+
+
+def fleet_gfi_from(ghg, work, gfi_per_cii):
+    """Fleet GFI from fleet GHG and transport work (same shapes, or broadcastable); 0 where the fleet owns no vessels."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(work > 0, gfi_per_cii * ghg / work, 0.0)
+
+
+def fleet_cii_records(owned, year):
+    """(route index, attained CII) per owned vessel of a scenario's (routes, categories of `year`) fleet."""
+    counts = fleet_on_pathway_categories(owned, year).ravel()
+    year_idx = int(np.clip(year - PATHWAY_START_YEAR, 0, len(PATHWAY_YEARS) - 1))
+    return np.repeat(np.arange(counts.size) // len(PATHWAY_CATEGORIES), counts), np.repeat(CATEGORY_CII[year_idx].ravel(), counts)
+
+
+# --- Trajectory and result ---
+@dataclass
+class FleetTrajectory:
+    """Owned fleet at `PATHWAY_START_YEAR` (routes, categories) and yearly changes (years, routes, categories).
+
+    Categories follow `PATHWAY_CATEGORIES`, years follow `PATHWAY_YEARS`; changes in a year count from that year on.
+    `charter` is (years, routes); None uses the default charter counts interpolated between the anchor years.
+    """
+    initial_owned: np.ndarray
+    additions: np.ndarray
+    retirements: np.ndarray
+    charter: np.ndarray = None
+
+    def __post_init__(self):
+        fleet_shape = (len(ROUTE_KEYS), len(PATHWAY_CATEGORIES))
+        if self.initial_owned.shape != fleet_shape: raise ValueError(f"initial_owned must be {fleet_shape}, got {self.initial_owned.shape}")
+        for name in ("additions", "retirements"):
+            if getattr(self, name).shape != (len(PATHWAY_YEARS),) + fleet_shape:
+                raise ValueError(f"{name} must be {(len(PATHWAY_YEARS),) + fleet_shape}, got {getattr(self, name).shape}")
+        if self.charter is not None and self.charter.shape != (len(PATHWAY_YEARS), len(ROUTE_KEYS)):
+            raise ValueError(f"charter must be {(len(PATHWAY_YEARS), len(ROUTE_KEYS))}, got {self.charter.shape}")
+
+    def owned(self):
+        """(years, routes, categories) owned fleet in each year."""
+        owned = self.initial_owned + np.cumsum(self.additions - self.retirements, axis=0)
+        if (owned < 0).any():
+            year_idx, route_idx, cat_idx = np.argwhere(owned < 0)[0]
+            raise ValueError(f"retirements exceed the fleet: {ROUTE_KEYS[route_idx]} / {PATHWAY_CATEGORIES[cat_idx]} in {PATHWAY_YEARS[year_idx]}")
+        return owned
+
+    @classmethod
+    def from_fleets(cls, fleets_by_year, charter_by_year=None):
+        """Trajectory that moves linearly (rounded to whole vessels) between fleets given for some years.
+
+        `fleets_by_year` maps year -> (routes, categories) owned counts; `charter_by_year` maps year -> (routes,)
+        charter counts and defaults to the same interpolation of the default charter counts.
+        """
+        years = sorted(fleets_by_year)
+        owned = np.rint(interpolate_years(years, [fleets_by_year[year] for year in years], PATHWAY_YEARS)).astype(np.int64)
+        changes = np.diff(owned, axis=0, prepend=owned[:1])
+        charter = None
+        if charter_by_year:
+            charter_years = sorted(charter_by_year)
+            charter = np.rint(interpolate_years(charter_years, [charter_by_year[year] for year in charter_years], PATHWAY_YEARS))
+        return cls(owned[0], np.clip(changes, 0, None), np.clip(-changes, 0, None), charter)
+
+    @classmethod
+    def default(cls):
+        """Move between the 2030/2040/2050 default fleets, holding the 2030 fleet from the benchmark year."""
+        return cls.from_fleets(dict(zip(DEFAULT_ANCHOR_YEARS, DEFAULT_OWNED_BY_ANCHOR)))
+
+
+def fleet_on_pathway_categories(owned, year):
+    """Map a scenario's (routes, categories of `year`) owned counts onto `PATHWAY_CATEGORIES`."""
+    fleet = np.zeros((len(ROUTE_KEYS), len(PATHWAY_CATEGORIES)), dtype=np.int64)
+    fleet[:, [PATHWAY_CATEGORY_INDEX[cat] for cat in OWNED_SHIP_CATEGORIES_BY_YEAR.get(year, ())]] = owned
+    return fleet
+
+
+@dataclass
+class PathwayResult:
+    """Per-year route arrays (years, routes), fleet series (years,) and CII/GFI classification."""
+    years: np.ndarray
+    owned: np.ndarray
+    charter: np.ndarray
+    revenue: np.ndarray
+    tco: np.ndarray
+    ghg: np.ndarray
+    charter_cost: np.ndarray
+    fuel: np.ndarray
+    attained_cii: np.ndarray
+    cii_rating: np.ndarray
+    fleet_gfi: np.ndarray
+    gfi_zone: np.ndarray
+
+    @property
+    def annual_cost(self):
+        """Fleet TCO + charter + fuel cost per year (M USD)."""
+        return (self.tco + self.charter_cost + self.fuel).sum(axis=1)
+
+    @property
+    def annual_ghg(self):
+        return self.ghg.sum(axis=1)
+
+    @property
+    def cumulative_cost(self):
+        return np.cumsum(self.annual_cost)
+
+    @property
+    def cumulative_ghg(self):
+        return np.cumsum(self.annual_ghg)
+
+    def to_frame(self):
+        """One row per year with fleet totals, cumulative cost/GHG and the fleet GFI zone."""
+        return pd.DataFrame({
+            "Year": self.years, "Owned Vessels": self.owned.sum(axis=(1, 2)), "Charter Vessels": self.charter.sum(axis=1),
+            "Revenue (M USD)": self.revenue.sum(axis=1), "TCO (M USD)": self.tco.sum(axis=1), "Charter Cost (M USD)": self.charter_cost.sum(axis=1),
+            "Fuel Cost (M USD)": self.fuel.sum(axis=1), "Annual Cost (M USD)": self.annual_cost, "Cumulative Cost (M USD)": self.cumulative_cost,
+            "GHG (M Tons CO2e)": self.annual_ghg, "Cumulative GHG (M Tons CO2e)": self.cumulative_ghg,
+            "Fleet GFI": self.fleet_gfi, "GFI Zone": [GFI_ZONE_LABELS[zone] for zone in self.gfi_zone.tolist()],
+        })
+
+    def cii_rating_frame(self):
+        """CII rating letter per year (rows) and route (columns); '-' where a route owns no vessels."""
+        letters = np.array(CII_RATING_LABELS + ("-",))[self.cii_rating]
+        return pd.DataFrame(letters, index=pd.Index(self.years, name="Year"), columns=ROUTE_DISPLAY_NAMES)
+
+
+def evaluate_pathway(trajectory):
+    """Evaluate every year of `trajectory` at once."""
+    owned = trajectory.owned()
+    route_owned = owned.sum(axis=2)
+    charter = np.rint(interpolate_years(DEFAULT_ANCHOR_YEARS, DEFAULT_CHARTER_BY_ANCHOR, PATHWAY_YEARS)) if trajectory.charter is None else np.asarray(trajectory.charter, dtype=float)
+    factors = interpolate_years(CHARTER_FACTOR_YEARS, CHARTER_FACTOR_MATRIX, PATHWAY_YEARS)
+    attained_cii = _weighted_cii(owned)
+    work = route_owned * VESSEL_WORK_BY_YEAR
+    ghg = np.where(route_owned > 0, work * attained_cii, 0.0)
+    fleet_gfi = fleet_gfi_from(ghg.sum(axis=1), work.sum(axis=1), GFI_PER_CII)
+    return PathwayResult(
+        years=PATHWAY_YEARS, owned=owned, charter=charter, revenue=interpolate_years(REVENUE_YEARS, REVENUE_MATRIX, PATHWAY_YEARS),
+        tco=route_owned * PER_VESSEL_BY_YEAR["tco"], ghg=ghg, charter_cost=route_charter_costs(charter, factors), fuel=route_owned * PER_VESSEL_BY_YEAR["fuel"],
+        attained_cii=attained_cii, cii_rating=rate_cii(ROUTE_CII_TYPE_INDEX, PATHWAY_YEARS[:, None], attained_cii), fleet_gfi=fleet_gfi, gfi_zone=gfi_zone(PATHWAY_YEARS, fleet_gfi),
+    )
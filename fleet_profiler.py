@@ -0,0 +1,63 @@
+"""Per-rerun section timings for the dashboard script.
+
+The script calls `profiler.section(name)` at each section boundary. That closes
+the running section and opens the next, so sections are timed in script order
+without re-indenting the layout code. Streamlit serializes a chart inside
+`st.plotly_chart` and a styled table inside `st.dataframe`, so a section's time
+covers building and serializing its outputs. Profiles are plain dicts and can
+be kept in `st.session_state`, summarized and exported as JSON.
+"""
+import json
+import time
+
+import numpy as np
+
+# Profiles kept per session for the debug panel and its JSON export.
+PROFILE_HISTORY = 50
+
+
+class RerunProfiler:
+    """Wall time per named section of one script run."""
+
+    def __init__(self, **context):
+        self.context = context
+        self.started = time.perf_counter()
+        self.sections = {}
+        self.total = None
+        self._current = self._current_start = None
+
+    def section(self, name):
+        """Close the running section (if any) and start timing `name`; a repeated name adds to its time."""
+        now = time.perf_counter()
+        self._close(now)
+        self._current, self._current_start = name, now
+
+    def stop(self):
+        """Close the running section and fix the total; returns the profile dict."""
+        now = time.perf_counter()
+        self._close(now)
+        self.total = now - self.started
+        return self.to_dict()
+
+    def _close(self, now):
+        if self._current is not None: self.sections[self._current] = self.sections.get(self._current, 0.0) + now - self._current_start
+        self._current = None
+
+    def to_dict(self):
+        total = self.total if self.total is not None else time.perf_counter() - self.started
+        return {**self.context, "total_ms": total * 1000, "sections_ms": {name: seconds * 1000 for name, seconds in self.sections.items()}}
+
+
+def summarize(profiles, percentiles=(50, 95)):
+    """{section (and "total"): {"runs", "mean_ms", "p50_ms", ...}} over `profiles`; sections missing from a run are not counted for it."""
+    samples = {"total": [profile["total_ms"] for profile in profiles]}
+    for profile in profiles:
+        for name, ms in profile["sections_ms"].items(): samples.setdefault(name, []).append(ms)
+    return {name: {"runs": len(values), "mean_ms": float(np.mean(values)), **{f"p{pct}_ms": float(np.percentile(values, pct)) for pct in percentiles}}
+            for name, values in samples.items() if values}
+
+
+def profiles_json(profiles):
+    """JSON export of `profiles` with their summary."""
+    profiles = list(profiles)
+    return json.dumps({"profiles": profiles, "summary": summarize(profiles) if profiles else {}}, indent=2)
@@ -0,0 +1,110 @@
+"""Array-backed fleet inputs for one dashboard session.
+
+The sidebar and route widgets use string keys such as `owned_{route}_{category}`
+and `tco_{route}`. This module builds those keys once per process into a
+(route x category) index. A session's counts and route values sit in compact
+NumPy arrays: resetting to `ALL_YEAR_DEFAULT_INPUTS` is one array copy, and
+totals come from array sums instead of rebuilding and scanning keys.
+"""
+import numpy as np
+
+from fleet_data import ALL_YEAR_DEFAULT_INPUTS, EMPTY_ROUTE_DEFAULTS, OWNED_SHIP_CATEGORIES_BY_YEAR, ROUTE_KEYS, category_key
+from fleet_engine import Scenario
+
+# --- Precomputed key index ---
+CATEGORY_KEYS_BY_YEAR = {year: tuple(category_key(cat) for cat in categories) for year, categories in OWNED_SHIP_CATEGORIES_BY_YEAR.items()}
+# year -> (routes x categories) widget keys
+OWNED_WIDGET_KEYS_BY_YEAR = {year: tuple(tuple(f"owned_{route_key}_{cat_key}" for cat_key in cat_keys) for route_key in ROUTE_KEYS) for year, cat_keys in CATEGORY_KEYS_BY_YEAR.items()}
+# route field -> per-route widget keys
+ROUTE_WIDGET_KEYS = {
+    "charter": tuple(f"charter_{route_key}" for route_key in ROUTE_KEYS), "tco": tuple(f"tco_{route_key}" for route_key in ROUTE_KEYS),
+    "ghg": tuple(f"ghg_{route_key}" for route_key in ROUTE_KEYS), "fuel": tuple(f"fuel_cost_route_{route_key}" for route_key in ROUTE_KEYS),
+}
+ROUTE_FIELD_DEFAULT_KEYS = {"charter": "charter", "tco": "tco", "ghg": "ghg", "fuel": "total_fuel_cost_route"}
+# widget key -> (field, route index, category index or None)
+WIDGET_INDEX_BY_YEAR = {
+    year: {**{key: ("owned", route_idx, cat_idx) for route_idx, route_keys in enumerate(owned_keys) for cat_idx, key in enumerate(route_keys)},
+           **{key: (field, route_idx, None) for field, keys in ROUTE_WIDGET_KEYS.items() for route_idx, key in enumerate(keys)}}
+    for year, owned_keys in OWNED_WIDGET_KEYS_BY_YEAR.items()
+}
+
+
+def _read_only(array):
+    array.flags.writeable = False
+    return array
+
+
+def _default_arrays(year):
+    defaults_for_year = ALL_YEAR_DEFAULT_INPUTS.get(year, {})
+    route_inputs = [defaults_for_year.get(route_key, EMPTY_ROUTE_DEFAULTS) for route_key in ROUTE_KEYS]
+    owned = np.array([[route_data.get("owned_ships", {}).get(cat_key, 0) for cat_key in CATEGORY_KEYS_BY_YEAR.get(year, ())] for route_data in route_inputs], dtype=np.int32).reshape(len(ROUTE_KEYS), -1)
+    arrays = {"owned": _read_only(owned), "charter": _read_only(np.array([route_data["charter"] for route_data in route_inputs], dtype=np.int32))}
+    for field in ("tco", "ghg", "fuel"):
+        arrays[field] = _read_only(np.array([route_data.get(ROUTE_FIELD_DEFAULT_KEYS[field], 0.0) for route_data in route_inputs], dtype=float))
+    return arrays
+
+
+DEFAULT_ARRAYS_BY_YEAR = {year: _default_arrays(year) for year in OWNED_SHIP_CATEGORIES_BY_YEAR}
+
+
+class FleetState:
+    """Owned counts (routes x categories, int32) and per-route charter/TCO/GHG/fuel for one year."""
+    __slots__ = ("year", "owned", "charter", "tco", "ghg", "fuel")
+    FIELDS = ("owned", "charter", "tco", "ghg", "fuel")
+
+    def __init__(self, year, owned, charter, tco, ghg, fuel):
+        self.year = year
+        self.owned, self.charter, self.tco, self.ghg, self.fuel = owned, charter, tco, ghg, fuel
+
+    @property
+    def categories(self):
+        return OWNED_SHIP_CATEGORIES_BY_YEAR.get(self.year, ())
+
+    @classmethod
+    def defaults(cls, year):
+        arrays = DEFAULT_ARRAYS_BY_YEAR.get(year) or _default_arrays(year)
+        return cls(year, *(arrays[field].copy() for field in cls.FIELDS))
+
+    @classmethod
+    def from_widgets(cls, state, year):
+        """Read the year's widget values from `state` (e.g. `st.session_state`); missing owned counts read as 0."""
+        owned = np.array([[state.get(key, 0) for key in route_keys] for route_keys in OWNED_WIDGET_KEYS_BY_YEAR.get(year, ())], dtype=np.int32).reshape(len(ROUTE_KEYS), -1)
+        return cls(year, owned, *(np.array([state.get(key, 0) for key in ROUTE_WIDGET_KEYS[field]], dtype=np.int32 if field == "charter" else float) for field in cls.FIELDS[1:]))
+
+    def reset(self, year=None):
+        """Reset to the defaults of `year` (default: the current year) with one copy per array."""
+        if year is not None and year != self.year:
+            fresh = FleetState.defaults(year)
+            for field in ("year",) + self.FIELDS: setattr(self, field, getattr(fresh, field))
+            return
+        for field in self.FIELDS: np.copyto(getattr(self, field), DEFAULT_ARRAYS_BY_YEAR[self.year][field])
+
+    def to_widgets(self, state):
+        """Write every value back to the widget keys in `state`."""
+        for route_keys, route_counts in zip(OWNED_WIDGET_KEYS_BY_YEAR.get(self.year, ()), self.owned.tolist()):
+            for key, count in zip(route_keys, route_counts): state[key] = count
+        for field, keys in ROUTE_WIDGET_KEYS.items():
+            for key, value in zip(keys, getattr(self, field).tolist()): state[key] = value
+
+    def sync_widget(self, state, key):
+        """Copy one widget's value from `state` into the arrays (used from widget `on_change` callbacks)."""
+        field, route_idx, cat_idx = WIDGET_INDEX_BY_YEAR[self.year][key]
+        value = state.get(key, 0)
+        if field == "owned": self.owned[route_idx, cat_idx] = value
+        else: getattr(self, field)[route_idx] = value
+
+    # --- Aggregations ---
+    @property
+    def total_owned(self):
+        return int(self.owned.sum())
+
+    def route_owned(self):
+        return self.owned.sum(axis=1)
+
+    def composition_by_category(self, include_zero=False):
+        """{category display name: owned vessels across all routes}."""
+        totals = self.owned.sum(axis=0).tolist()
+        return {cat: count for cat, count in zip(self.categories, totals) if include_zero or count > 0}
+
+    def to_scenario(self):
+        return Scenario(self.year, self.owned.astype(np.int64), self.charter.astype(float), self.tco.copy(), self.ghg.copy(), self.fuel.copy())
@@ -0,0 +1,253 @@
+"""Local SQLite store of saved analyses: inputs, route tables and fleet totals, indexed for comparison.
+
+Each saved run is one `scenarios` row:
+- the year, discount rate and horizon;
+- the fleet totals and NPV as indexed columns;
+- the input arrays as little-endian blobs.
+
+Its route table is stored twice:
+- as a blob on that row, for bulk reads;
+- in `scenario_routes`, one row per route, indexed by route and key route
+  metrics for route filters. Decoding 60k small rows costs more than the rest
+  of a 10k-scenario load.
+
+Rows are keyed by `scenario_key` (the canonical input hash the shared result
+cache uses), so saving the same scenario again only renames it. Writes are
+batched: `save_many` inserts any number of records in one transaction with
+`executemany`. A comparison reads totals, inputs and route tables for hundreds
+or thousands of scenarios in one query and decodes them into arrays. Nothing is
+recomputed. The store uses WAL mode, so sessions can read while another session
+saves. It needs only the standard library's `sqlite3`.
+
+    python fleet_store.py --year 2040 --order-by total_ghg --limit 20
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from fleet_data import ANALYSIS_LIFESPAN_YEARS, DATA_VERSION, OWNED_SHIP_CATEGORIES_BY_YEAR, ROUTE_KEYS
+from fleet_engine import ROUTE_TABLE_COLUMNS
+from fleet_finance import PROJECTED_ANNUAL_NET_CASH_FLOW, npv
+from fleet_live import scenario_key
+from fleet_state import FleetState
+
+DEFAULT_STORE_PATH = Path(os.environ.get("FLEET_SCENARIO_STORE", Path.home() / ".fleet_dashboard" / "scenarios.sqlite"))
+SCHEMA_VERSION = 1
+# Store column -> key in `st.session_state.results` / `SnapshotResult.fleet_totals()`; "npv" is computed on save.
+STORE_METRICS = {
+    "total_owned": "calculated_total_owned_vessels_all_routes", "total_tco": "total_tco_fleet", "total_ghg": "total_ghg_fleet",
+    "total_charter_cost": "total_charter_cost_fleet", "total_fuel": "total_annual_fuel_expenditure_fleet_million",
+    "total_revenue": "total_fleet_revenue_scenario", "total_investment": "total_investment_fleet_snapshot",
+}
+METRIC_LABELS = {
+    "total_owned": "Owned Vessels", "total_tco": "TCO (M USD)", "total_ghg": "GHG (M Tons CO2e)", "total_charter_cost": "Charter Cost (M USD)",
+    "total_fuel": "Fuel Cost (M USD)", "total_revenue": "Revenue (M USD)", "total_investment": "Investment (M USD)", "npv": "NPV (M USD)",
+}
+INDEXED_METRICS = ("total_tco", "total_ghg", "total_charter_cost", "total_fuel", "total_investment", "npv")
+# Store column -> route table column (ROUTE_TABLE_COLUMNS without "Route").
+ROUTE_COLUMNS = dict(zip(("total_owned", "charter", "revenue", "tco", "ghg", "charter_cost", "fuel"), ROUTE_TABLE_COLUMNS[1:]))
+INDEXED_ROUTE_COLUMNS = ("tco", "ghg", "charter_cost")
+ORDER_COLUMNS = ("saved_at", "year", "name", *METRIC_LABELS)
+
+_SCHEMA = [
+    f"""CREATE TABLE IF NOT EXISTS scenarios (
+        id INTEGER PRIMARY KEY, scenario_key TEXT NOT NULL UNIQUE, name TEXT NOT NULL, saved_at TEXT NOT NULL, data_version TEXT NOT NULL,
+        year INTEGER NOT NULL, discount_rate_percent REAL NOT NULL, analysis_period_years INTEGER NOT NULL,
+        {", ".join(f"{metric} REAL NOT NULL" for metric in METRIC_LABELS)},
+        {", ".join(f"{field} BLOB NOT NULL" for field in FleetState.FIELDS)}, route_table BLOB NOT NULL)""",
+    f"""CREATE TABLE IF NOT EXISTS scenario_routes (
+        scenario_id INTEGER NOT NULL REFERENCES scenarios(id) ON DELETE CASCADE, route_idx INTEGER NOT NULL,
+        {", ".join(f"{column} REAL NOT NULL" for column in ROUTE_COLUMNS)}, PRIMARY KEY (scenario_id, route_idx)) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS scenarios_year_saved ON scenarios (year, saved_at)",
+    *(f"CREATE INDEX IF NOT EXISTS scenarios_year_{metric} ON scenarios (year, {metric})" for metric in INDEXED_METRICS),
+    *(f"CREATE INDEX IF NOT EXISTS scenario_routes_{column} ON scenario_routes (route_idx, {column})" for column in INDEXED_ROUTE_COLUMNS),
+]
+
+
+def _blob(values, dtype):
+    return np.ascontiguousarray(values, dtype=dtype).tobytes()
+
+
+@dataclass
+class ScenarioRecord:
+    """One analysis to save: inputs ({field: array}), the (routes, 7) route table values, `STORE_METRICS` totals and NPV."""
+    year: int
+    inputs: dict
+    routes: np.ndarray
+    totals: dict
+    discount_rate_percent: float
+    analysis_period_years: int
+    name: str = ""
+
+    @property
+    def key(self):
+        return scenario_key(self.year, self.inputs, self.discount_rate_percent, self.analysis_period_years)
+
+    @classmethod
+    def from_results(cls, year, inputs, route_table, fleet_totals, discount_rate_percent, analysis_period_years, name=""):
+        """From a route table with `ROUTE_TABLE_COLUMNS` and fleet totals under the `st.session_state.results` keys (e.g. `LiveResults`)."""
+        totals = {metric: float(fleet_totals[key]) for metric, key in STORE_METRICS.items()}
+        totals["npv"] = float(npv(totals["total_tco"] * ANALYSIS_LIFESPAN_YEARS, PROJECTED_ANNUAL_NET_CASH_FLOW, discount_rate_percent / 100.0, analysis_period_years))
+        routes = route_table[list(ROUTE_COLUMNS.values())].to_numpy(dtype=float) if isinstance(route_table, pd.DataFrame) else np.asarray(route_table, dtype=float)
+        return cls(year, {field: np.asarray(inputs[field]) for field in FleetState.FIELDS}, routes, totals, float(discount_rate_percent), int(analysis_period_years), name)
+
+    @classmethod
+    def from_snapshot(cls, scenario, snapshot, discount_rate_percent=5.0, analysis_period_years=ANALYSIS_LIFESPAN_YEARS, name=""):
+        """From a `Scenario` and its `SnapshotResult`, without building the route table DataFrame."""
+        routes = np.column_stack([snapshot.route_owned, snapshot.charter, snapshot.revenue, snapshot.tco, snapshot.ghg, snapshot.charter_cost, snapshot.fuel])
+        inputs = {field: getattr(scenario, field) for field in FleetState.FIELDS}
+        return cls.from_results(scenario.year, inputs, routes, snapshot.fleet_totals(), discount_rate_percent, analysis_period_years, name)
+
+
+@dataclass
+class StoredScenarios:
+    """A bulk read: one `frame` row per scenario (metadata and totals), route values as (scenarios, routes, 7) and inputs per field."""
+    frame: pd.DataFrame
+    routes: np.ndarray
+    inputs: dict
+    seconds: float
+
+    def __len__(self):
+        return len(self.frame)
+
+    def diff(self, reference):
+        """Totals minus `reference` ({metric: value}, e.g. `ScenarioRecord.totals`), as "Δ <label>" columns next to `frame`."""
+        deltas = {f"Δ {label}": self.frame[metric].to_numpy() - reference[metric] for metric, label in METRIC_LABELS.items() if metric in reference}
+        return pd.concat([self.frame, pd.DataFrame(deltas, index=self.frame.index)], axis=1)
+
+    def changed_routes(self, reference_routes, rtol=1e-9):
+        """Routes whose route table row differs from `reference_routes` ((routes, 7)), per scenario."""
+        return (~np.isclose(self.routes, reference_routes[None], rtol=rtol, atol=0.0)).any(axis=2).sum(axis=1)
+
+    def changed_inputs(self, reference):
+        """Input cells that differ from a `ScenarioRecord`'s inputs, per scenario; -1 where the year differs (owned categories are not comparable)."""
+        same_year = (self.frame["year"] == reference.year).to_numpy()
+        changed = np.full(len(self), -1)
+        if same_year.any():
+            stored = {field: self.inputs[field][same_year] for field in FleetState.FIELDS}
+            stored["owned"] = stored["owned"][:, :, :np.shape(reference.inputs["owned"])[1]]
+            changed[same_year] = sum(np.count_nonzero((stored[field] != np.asarray(reference.inputs[field])[None]).reshape(same_year.sum(), -1), axis=1) for field in FleetState.FIELDS)
+        return changed
+
+
+class ScenarioStore:
+    """Saved analyses in one SQLite file; every call opens a short-lived connection, so one store serves all sessions and threads."""
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = Path(path)
+        self._ready = False
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """A connection in one transaction (committed on success); creates the file and schema on first use."""
+        if not self._ready:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with contextlib.closing(sqlite3.connect(self.path, timeout=30)) as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                with conn:
+                    for statement in _SCHEMA: conn.execute(statement)
+                    conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+            self._ready = True
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA synchronous=NORMAL"); conn.execute("PRAGMA foreign_keys=ON")
+            with conn: yield conn
+        finally:
+            conn.close()
+
+    def save_many(self, records):
+        """Save `records` in one transaction; returns their scenario ids. A scenario already stored keeps its id and route rows and takes the new name."""
+        records = list(records)
+        if not records: return []
+        saved_at = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="milliseconds")
+        keys = [record.key for record in records]
+        rows = [(key, record.name, saved_at, DATA_VERSION, record.year, record.discount_rate_percent, record.analysis_period_years,
+                 *(record.totals[metric] for metric in METRIC_LABELS), _blob(record.inputs["owned"], "<i8"), *(_blob(record.inputs[field], "<f8") for field in FleetState.FIELDS[1:]), _blob(record.routes, "<f8"))
+                for key, record in zip(keys, records)]
+        columns = ["scenario_key", "name", "saved_at", "data_version", "year", "discount_rate_percent", "analysis_period_years", *METRIC_LABELS, *FleetState.FIELDS, "route_table"]
+        with self._connect() as conn:
+            conn.executemany(f"INSERT INTO scenarios ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+                             "ON CONFLICT (scenario_key) DO UPDATE SET name = excluded.name, saved_at = excluded.saved_at", rows)
+            id_by_key = dict(conn.execute("SELECT scenario_key, id FROM scenarios WHERE scenario_key IN (SELECT value FROM json_each(?))", (json.dumps(keys),)).fetchall())
+            ids = np.array([id_by_key[key] for key in keys], dtype=np.int64)
+            route_values = np.stack([record.routes for record in records])
+            n_routes = route_values.shape[1]
+            route_rows = zip(np.repeat(ids, n_routes).tolist(), np.tile(np.arange(n_routes), len(records)).tolist(), *route_values.reshape(-1, len(ROUTE_COLUMNS)).T.tolist())
+            conn.executemany(f"INSERT OR IGNORE INTO scenario_routes VALUES ({', '.join('?' * (2 + len(ROUTE_COLUMNS)))})", route_rows)
+        return ids.tolist()
+
+    def save(self, record):
+        return self.save_many([record])[0]
+
+    def delete(self, scenario_ids):
+        with self._connect() as conn: conn.executemany("DELETE FROM scenarios WHERE id = ?", [(int(scenario_id),) for scenario_id in scenario_ids])
+
+    def count(self, years=None):
+        where, params = self._where(years, None, None)
+        with self._connect() as conn: return conn.execute(f"SELECT COUNT(*) FROM scenarios{where}", params).fetchone()[0]
+
+    @staticmethod
+    def _where(years, metric_ranges, route_ranges):
+        """(WHERE clause, parameters) for years, {metric: (low, high)} and {(route_key, route column): (low, high)}; None bounds are open."""
+        clauses, params = [], []
+        if years: clauses.append(f"year IN ({', '.join('?' * len(years))})"); params += [int(year) for year in years]
+        for metric, (low, high) in (metric_ranges or {}).items():
+            if metric not in METRIC_LABELS: raise ValueError(f"unknown metric {metric!r}; expected one of {tuple(METRIC_LABELS)}")
+            if low is not None: clauses.append(f"{metric} >= ?"); params.append(low)
+            if high is not None: clauses.append(f"{metric} <= ?"); params.append(high)
+        for (route_key, column), (low, high) in (route_ranges or {}).items():
+            if column not in ROUTE_COLUMNS: raise ValueError(f"unknown route column {column!r}; expected one of {tuple(ROUTE_COLUMNS)}")
+            bounds = [f"r.{column} {op} ?" for op, bound in ((">=", low), ("<=", high)) if bound is not None]
+            clauses.append(f"id IN (SELECT r.scenario_id FROM scenario_routes r WHERE r.route_idx = ?{''.join(f' AND {bound}' for bound in bounds)})")
+            params += [ROUTE_KEYS.index(route_key), *(bound for bound in (low, high) if bound is not None)]
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def load(self, years=None, metric_ranges=None, route_ranges=None, order_by="saved_at", descending=True, limit=None):
+        """Bulk-read matching scenarios (newest first by default) in one query: totals, inputs and route tables decoded into arrays."""
+        if order_by not in ORDER_COLUMNS: raise ValueError(f"order_by must be one of {ORDER_COLUMNS}, got {order_by!r}")
+        start = time.perf_counter()
+        where, params = self._where(years, metric_ranges, route_ranges)
+        meta = ["id", "scenario_key", "name", "saved_at", "year", "discount_rate_percent", "analysis_period_years", *METRIC_LABELS]
+        blobs = [*FleetState.FIELDS, "route_table"]
+        query = f"SELECT {', '.join(meta + blobs)} FROM scenarios{where} ORDER BY {order_by} {'DESC' if descending else 'ASC'}, id" + (" LIMIT ?" if limit else "")
+        with self._connect() as conn: rows = conn.execute(query, params + ([int(limit)] if limit else [])).fetchall()
+        frame = pd.DataFrame([row[:len(meta)] for row in rows], columns=meta)
+        column = lambda name: [row[len(meta) + blobs.index(name)] for row in rows]
+        routes = np.frombuffer(b"".join(column("route_table")), dtype="<f8").reshape(len(rows), len(ROUTE_KEYS), len(ROUTE_COLUMNS))
+        inputs = {field: np.frombuffer(b"".join(column(field)), dtype="<f8").reshape(len(rows), len(ROUTE_KEYS)) for field in FleetState.FIELDS[1:]}
+        # Owned counts are (routes, categories) with a per-year category count; they are padded to the widest year with -1.
+        max_categories = max((len(categories) for categories in OWNED_SHIP_CATEGORIES_BY_YEAR.values()), default=0)
+        inputs["owned"] = np.full((len(rows), len(ROUTE_KEYS), max_categories), -1, dtype=np.int64)
+        for row_idx, owned in enumerate(column("owned")):
+            counts = np.frombuffer(owned, dtype="<i8").reshape(len(ROUTE_KEYS), -1); inputs["owned"][row_idx, :, :counts.shape[1]] = counts
+        return StoredScenarios(frame, routes, inputs, time.perf_counter() - start)
+
+
+SCENARIO_STORE = ScenarioStore()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List analyses saved in the local scenario store.")
+    parser.add_argument("--path", type=Path, default=DEFAULT_STORE_PATH)
+    parser.add_argument("--year", type=int, action="append", help="Only these years (repeatable).")
+    parser.add_argument("--order-by", choices=ORDER_COLUMNS, default="saved_at")
+    parser.add_argument("--ascending", action="store_true")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+    store = ScenarioStore(args.path)
+    stored = store.load(args.year, order_by=args.order_by, descending=not args.ascending, limit=args.limit)
+    print(f"{len(stored)} of {store.count(args.year):,} stored scenarios loaded in {stored.seconds * 1000:.1f} ms from {args.path}")
+    if len(stored): print(stored.frame.drop(columns=["id", "scenario_key"]).rename(columns=METRIC_LABELS).round(2).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""Headless batch runner: evaluate a folder of scenario files and write route tables and fleet totals.
+
+Each `.json` file holds one scenario object or a list of them:
+
+    {"name": "vlcc-heavy", "year": 2040, "discount_rate_percent": 6.0, "analysis_period_years": 20,
+     "routes": {"vlcc_china": {"owned_ships": {"b50_ships": 4}, "charter": 2, "tco": 310.0, "ghg": 0.9, "total_fuel_cost_route": 120.0}}}
+
+`owned_ships` keys are the year's category widget keys (`b50_ships`, `diesel_ships`, ...).
+Dashboard widget keys (`owned_vlcc_china_b30_ships` for 2030, `tco_vlcc_china`, ... as
+written by `fleet_ingest.py --json`) are accepted at the top level too. Owned and charter
+counts must be non-negative whole numbers. Anything a file leaves out keeps the year's
+default input. Scenarios are grouped by year and evaluated as
+stacked arrays, with file chunks spread over a process pool. Only the engine
+modules are imported: no Streamlit and no Plotly.
+
+    python scenario_batch.py scenarios/ --out results/ --format parquet --workers 4
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from fleet_data import ANALYSIS_LIFESPAN_YEARS, OWNED_SHIP_CATEGORIES_BY_YEAR
+from fleet_engine import ROUTE_DISPLAY_NAMES, ROUTE_INDEX, ROUTE_TABLE_COLUMNS, ScenarioBatch, charter_factors_for_year, evaluate_batch, route_charter_costs, route_revenues_for_year
+from fleet_finance import PROJECTED_ANNUAL_NET_CASH_FLOW, discounted_payback, npv, simple_payback
+from fleet_state import WIDGET_INDEX_BY_YEAR, FleetState
+from scenario_sweep import SweepStats
+
+DEFAULT_DISCOUNT_RATE_PERCENT = 5.0
+DEFAULT_FILES_PER_TASK = 200
+OUTPUT_FORMATS = ("parquet", "json")
+COUNT_FIELDS = ("owned", "charter")
+# "routes" entry field -> widget key prefix
+ROUTE_FIELD_WIDGET_PREFIXES = {"charter": "charter_", "tco": "tco_", "ghg": "ghg_", "total_fuel_cost_route": "fuel_cost_route_"}
+
+
+@dataclass
+class ScenarioSpec:
+    """One scenario file entry: the fleet inputs plus the NPV discount rate and horizon."""
+    name: str
+    fleet: FleetState
+    discount_rate_percent: float = DEFAULT_DISCOUNT_RATE_PERCENT
+    analysis_period_years: int = ANALYSIS_LIFESPAN_YEARS
+
+    @classmethod
+    def from_dict(cls, raw, name):
+        """Apply the entry's values on top of the year's defaults; unknown routes, categories or years and invalid vessel counts raise ValueError."""
+        name = str(raw.get("name", name)); year = raw.get("year")
+        if year not in OWNED_SHIP_CATEGORIES_BY_YEAR: raise ValueError(f"{name}: year must be one of {sorted(OWNED_SHIP_CATEGORIES_BY_YEAR)}, got {year!r}")
+        widget_index = WIDGET_INDEX_BY_YEAR[year]
+        values = dict(_route_widget_values(raw.get("routes", {}), name))
+        values.update((key, value) for key, value in raw.items() if key in widget_index)
+        unknown = sorted(set(values) - set(widget_index))
+        if unknown: raise ValueError(f"{name}: no {year} inputs named {', '.join(unknown)}")
+        invalid = sorted(key for key, value in values.items() if widget_index[key][0] in COUNT_FIELDS and not _is_count(value))
+        if invalid: raise ValueError(f"{name}: vessel counts must be non-negative whole numbers, got " + ", ".join(f"{key}={values[key]!r}" for key in invalid))
+        fleet = FleetState.defaults(year)
+        for key in values: fleet.sync_widget(values, key)
+        return cls(name, fleet, float(raw.get("discount_rate_percent", DEFAULT_DISCOUNT_RATE_PERCENT)), int(raw.get("analysis_period_years", ANALYSIS_LIFESPAN_YEARS)))
+
+
+def _is_count(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and value >= 0 and float(value).is_integer()
+
+
+def _route_widget_values(routes, name):
+    for route_key, route_data in routes.items():
+        if route_key not in ROUTE_INDEX: raise ValueError(f"{name}: unknown route {route_key!r}")
+        for cat_key, count in route_data.get("owned_ships", {}).items(): yield f"owned_{route_key}_{cat_key}", count
+        for field, prefix in ROUTE_FIELD_WIDGET_PREFIXES.items():
+            if field in route_data: yield f"{prefix}{route_key}", route_data[field]
+
+
+def scenario_files(folder):
+    """Sorted `.json` scenario files in `folder` (or `folder` itself if it is a file)."""
+    folder = Path(folder)
+    if folder.is_file(): return [folder]
+    return sorted(path for path in folder.iterdir() if path.suffix.lower() == ".json")
+
+
+def load_scenarios(path):
+    """Scenario specs in one file; list entries are named `<stem>[<i>]` unless they carry a name."""
+    path = Path(path)
+    with open(path, encoding="utf-8") as handle: raw = json.load(handle)
+    if isinstance(raw, list): return [ScenarioSpec.from_dict(entry, f"{path.stem}[{idx}]") for idx, entry in enumerate(raw)]
+    return [ScenarioSpec.from_dict(raw, path.stem)]
+
+
+def evaluate_scenarios(specs):
+    """(route table, fleet totals) DataFrames for `specs`, in input order; one stacked evaluation per year."""
+    n_routes = len(ROUTE_DISPLAY_NAMES)
+    order = np.arange(len(specs))
+    years = np.array([spec.fleet.year for spec in specs])
+    route_frames, total_frames = [], []
+    for year in np.unique(years).tolist():
+        positions = order[years == year]
+        batch = ScenarioBatch.stack([specs[pos].fleet.to_scenario() for pos in positions])
+        names = np.array([specs[pos].name for pos in positions], dtype=object)
+        factors = charter_factors_for_year(year)
+        route_frames.append(pd.DataFrame({
+            "scenario": np.repeat(names, n_routes), "year": year, "Route": np.tile(ROUTE_DISPLAY_NAMES, len(batch)),
+            "Total Owned Ships": batch.owned.sum(axis=2).ravel(), "Charter Vessels": batch.charter.ravel(),
+            "Revenue (M USD)": np.broadcast_to(route_revenues_for_year(year), batch.charter.shape).ravel(), "TCO (M USD)": batch.tco.ravel(),
+            "GHG (M Tons CO2e)": batch.ghg.ravel(), "Charter Cost (M USD)": route_charter_costs(batch.charter, factors).ravel(), "Total Fuel Cost (M USD)": batch.fuel.ravel(),
+        }, index=(positions[:, None] * n_routes + np.arange(n_routes)).ravel()))
+        totals = evaluate_batch(batch, factors).to_frame().set_index(positions)
+        totals.insert(0, "scenario", names); totals.insert(1, "year", year)
+        total_frames.append(totals)
+    routes = pd.concat(route_frames).sort_index().reset_index(drop=True)[["scenario", "year"] + ROUTE_TABLE_COLUMNS]
+    totals = pd.concat(total_frames).sort_index().reset_index(drop=True)
+    # Same projection as the dashboard's "Projected Financial Performance" metrics.
+    rate = np.array([spec.discount_rate_percent for spec in specs]) / 100.0
+    horizon = np.array([spec.analysis_period_years for spec in specs])
+    investment = totals["total_tco"].to_numpy() * ANALYSIS_LIFESPAN_YEARS
+    totals["discount_rate_percent"] = rate * 100.0; totals["analysis_period_years"] = horizon
+    totals["initial_investment"] = investment
+    totals["npv"] = npv(investment, PROJECTED_ANNUAL_NET_CASH_FLOW, rate, horizon)
+    totals["payback_years"] = simple_payback(investment, PROJECTED_ANNUAL_NET_CASH_FLOW)
+    totals["discounted_payback_years"] = discounted_payback(investment, PROJECTED_ANNUAL_NET_CASH_FLOW, rate)
+    return routes, totals
+
+
+def _evaluate_files(paths):
+    return evaluate_scenarios([spec for path in paths for spec in load_scenarios(path)])
+
+
+def run_batch(paths, workers=None, files_per_task=DEFAULT_FILES_PER_TASK):
+    """Evaluate every scenario in `paths`; returns (route table, fleet totals, SweepStats).
+
+    Files are split into tasks of `files_per_task` and, when `workers` allows more than one
+    process, evaluated in a process pool. `workers=None` uses every core.
+    """
+    start = time.perf_counter()
+    paths = list(paths)
+    tasks = [paths[idx:idx + files_per_task] for idx in range(0, len(paths), files_per_task)]
+    if not tasks: raise ValueError("no scenario files to evaluate")
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks)))
+    if workers == 1:
+        task_results = [_evaluate_files(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool: task_results = list(pool.map(_evaluate_files, tasks))
+    routes = pd.concat([task_routes for task_routes, _ in task_results], ignore_index=True)
+    totals = pd.concat([task_totals for _, task_totals in task_results], ignore_index=True)
+    return routes, totals, SweepStats(len(totals), len(tasks), workers, time.perf_counter() - start)
+
+
+def write_results(routes, totals, out_dir, output_format="parquet"):
+    """Write `routes.<ext>` and `totals.<ext>` to `out_dir`; Parquet needs pyarrow. Returns the paths."""
+    if output_format not in OUTPUT_FORMATS: raise ValueError(f"output_format must be one of {OUTPUT_FORMATS}, got {output_format!r}")
+    out_dir = Path(out_dir); out_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+    for stem, frame in (("routes", routes), ("totals", totals)):
+        path = out_dir / f"{stem}.{output_format}"
+        if output_format == "parquet": frame.to_parquet(path, index=False)
+        else: frame.to_json(path, orient="records")
+        written.append(path)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate a folder of scenario files without the dashboard.")
+    parser.add_argument("scenarios", type=Path, help="folder of .json scenario files (or a single file)")
+    parser.add_argument("--out", type=Path, default=None, help="output folder (default: <scenarios>/results)")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="parquet")
+    parser.add_argument("--workers", type=int, default=None, help="Process count (default: all cores).")
+    parser.add_argument("--files-per-task", type=int, default=DEFAULT_FILES_PER_TASK)
+    args = parser.parse_args(argv)
+    paths = scenario_files(args.scenarios)
+    routes, totals, stats = run_batch(paths, workers=args.workers, files_per_task=args.files_per_task)
+    out_dir = args.out or (args.scenarios if args.scenarios.is_dir() else args.scenarios.parent) / "results"
+    write_start = time.perf_counter()
+    written = write_results(routes, totals, out_dir, args.format)
+    print(f"{len(paths):,} files: {stats}")
+    print(f"wrote {', '.join(str(path) for path in written)} in {time.perf_counter() - write_start:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Batch scenario sweeps over fleet compositions for the dashboard's target years.
+
+A sweep evaluates a `ScenarioBatch` (scenarios x routes x categories) with the
+array engine. Large stacks are split into chunks and spread over a process pool.
+
+    python scenario_sweep.py --year 2040 --scenarios 100000 --workers 4
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from fleet_data import BENCHMARK_YEAR, YEAR_OPTIONS
+from fleet_engine import BatchResult, Scenario, ScenarioBatch, evaluate_batch
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+
+@dataclass
+class SweepStats:
+    scenarios: int
+    chunks: int
+    workers: int
+    seconds: float
+
+    @property
+    def scenarios_per_second(self):
+        return self.scenarios / self.seconds if self.seconds > 0 else float("inf")
+
+    def __str__(self):
+        return f"{self.scenarios:,} scenarios in {self.seconds:.3f}s ({self.scenarios_per_second:,.0f} scenarios/s, {self.chunks} chunks, {self.workers} workers)"
+
+
+def sweep(batch, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Evaluate every scenario in `batch`; returns (BatchResult, SweepStats).
+
+    Batches larger than `chunk_size` are split and, when `workers` allows more than one
+    process, evaluated in a process pool. `workers=None` uses every core.
+    """
+    if batch.year not in YEAR_OPTIONS: raise ValueError(f"year must be one of {YEAR_OPTIONS}, got {batch.year}")
+    start = time.perf_counter()
+    chunks = [batch[idx:idx + chunk_size] for idx in range(0, len(batch), chunk_size)] or [batch]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(chunks)))
+    if workers == 1:
+        chunk_results = [evaluate_batch(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool: chunk_results = list(pool.map(evaluate_batch, chunks))
+    result = BatchResult.concat(chunk_results)
+    return result, SweepStats(len(batch), len(chunks), workers, time.perf_counter() - start)
+
+
+def random_batch(year, n_scenarios, seed=0, spread=0.5):
+    """Random fleet mixes around the year's defaults: owned/charter counts redrawn, route values scaled by +/- `spread`."""
+    rng = np.random.default_rng(seed)
+    base = Scenario.from_defaults(year)
+    n_routes, n_cats = base.owned.shape
+    owned_upper = base.owned.sum(axis=1, keepdims=True) // max(n_cats, 1) + 2
+    owned = rng.integers(0, np.broadcast_to(owned_upper, (n_scenarios, n_routes, n_cats)))
+    charter = rng.integers(0, 2 * base.charter.astype(np.int64) + 2, size=(n_scenarios, n_routes)).astype(float)
+    scale = lambda values: values * rng.uniform(1 - spread, 1 + spread, size=(n_scenarios, n_routes))
+    return ScenarioBatch(year, owned, charter, scale(base.tco), scale(base.ghg), scale(base.fuel))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate a random sweep of fleet compositions.")
+    parser.add_argument("--year", type=int, choices=YEAR_OPTIONS, default=YEAR_OPTIONS[0])
+    parser.add_argument("--scenarios", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=None, help="Process count (default: all cores).")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    batch = random_batch(args.year, args.scenarios, seed=args.seed)
+    result, stats = sweep(batch, workers=args.workers, chunk_size=args.chunk_size)
+    print(stats)
+    frame = result.to_frame()
+    print(frame.describe(percentiles=[0.05, 0.5, 0.95]).T[["min", "5%", "50%", "95%", "max"]].round(2).to_string())
+    print(f"Scenarios below the {BENCHMARK_YEAR} GHG benchmark: {(frame[f'total_ghg_vs_{BENCHMARK_YEAR}_pct'] < 0).mean():.1%}")
+
+
+if __name__ == "__main__":
+    main()